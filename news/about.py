@@ -0,0 +1,88 @@
+"""
+Страница «О нас» и её статистика без запросов к базе на каждый ответ.
+
+Сама страница хранится в общем кэше под ключом с версией и дополнительно
+в памяти процесса; сохранение AboutPage меняет версию (сигнал), и все процессы
+перечитывают страницу при следующем обращении. Живые показатели (репортёры,
+читатели, публикации) пересчитываются агрегатами не чаще раза в NEWS_ABOUT_STATS_TTL
+секунд и дополняют статичные значения из AboutPage.stats.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+
+from .fragments import bump, get_versions
+
+PAGE_KEY = 'about:page:{}'
+STATS_KEY = 'about:stats'
+# Пустой результат тоже кэшируется: страницы может не быть вовсе
+MISSING = 'missing'
+
+_local = {}
+
+
+def _version():
+    return get_versions('aboutpage', [0])[0]
+
+
+def get_about_page():
+    version = _version()
+    memo = _local.get('page')
+    if memo is not None and memo[0] == version:
+        page = memo[1]
+    else:
+        key = PAGE_KEY.format(version)
+        page = cache.get(key)
+        if page is None:
+            from .models import AboutPage
+
+            page = AboutPage.objects.first() or MISSING
+            cache.set(key, page, timeout=None)
+        _local['page'] = (version, page)
+    return None if page == MISSING else page
+
+
+def invalidate_about_page():
+    _local.pop('page', None)
+    bump('aboutpage', 0)
+
+
+def compute_live_stats():
+    from .models import NewsItem, Reporter, User
+
+    return {
+        'reporters': Reporter.objects.count(),
+        'readers': User.objects.filter(is_active=True).count(),
+        'posts': NewsItem.objects.count(),
+        'comments': NewsItem.objects.aggregate(total=Sum('comment_count'))['total'] or 0,
+    }
+
+
+def live_stats():
+    ttl = getattr(settings, 'NEWS_ABOUT_STATS_TTL', 600)
+    memo = _local.get('stats')
+    if memo is not None and memo[0] > time.monotonic():
+        return memo[1]
+
+    stats = cache.get(STATS_KEY)
+    if stats is None:
+        stats = compute_live_stats()
+        cache.set(STATS_KEY, stats, timeout=ttl)
+    # В памяти процесса храним меньше, чтобы не отставать от общего кэша
+    _local['stats'] = (time.monotonic() + min(ttl, 60), stats)
+    return stats
+
+
+def about_stats(page=None):
+    """Статистика для шаблона: значения из AboutPage.stats, поверх — живые показатели."""
+    page = page if page is not None else get_about_page()
+    stats = dict(page.stats) if page is not None and page.stats else {}
+    stats.update(live_stats())
+    return stats
+
+
+def about_context():
+    page = get_about_page()
+    return {'about_page': page, 'about_stats': about_stats(page) if page is not None else {}}
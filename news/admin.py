@@ -1,12 +1,39 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
+from . import export
 from .models import Reporter, NewsItem, AboutPage, Comment, UserProfile
+from .search import search_ids
+
+class SearchIndexAdminMixin:
+    """Поиск в списке объектов через поисковый индекс вместо LIKE '%...%'."""
+    search_index_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(pk__in=search_ids(search_term, self.search_index_kind)), False
+
+class ExportAdminMixin:
+    """Действие «Выгрузить в CSV» для выбранных объектов — потоком, через news.export."""
+    export_name = None
+    actions = ['export_csv']
+
+    def export_csv(self, request, queryset):
+        rows = export.export_rows(self.export_name, queryset=queryset)
+        response = StreamingHttpResponse(
+            export.render(self.export_name, rows, 'csv'), content_type=export.FORMATS['csv']
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export.filename(self.export_name, "csv")}"'
+        return response
+    export_csv.short_description = "Выгрузить в CSV"
 
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(ExportAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'status', 'is_reporter', 'last_activity')
     list_filter = ('status', 'is_reporter')
     search_fields = ('user__username',)
-    actions = ['make_reporter', 'remove_reporter']
+    actions = ['make_reporter', 'remove_reporter', 'export_csv']
+    export_name = 'profiles'
     
     def make_reporter(self, request, queryset):
         queryset.update(is_reporter=True)
@@ -18,21 +45,51 @@ class UserProfileAdmin(admin.ModelAdmin):
 
 @admin.register(Reporter)
 class ReporterAdmin(admin.ModelAdmin):
-    list_display = ('user', 'specialization', 'hire_date')
+    list_display = (
+        'user', 'specialization', 'hire_date', 'post_count', 'total_views', 'comments_received', 'last_post_at',
+    )
     search_fields = ('user__username', 'specialization')
+    # Итоги читаются из ReporterStats одним JOIN, без агрегации по новостям
+    list_select_related = ('user', 'stats')
+
+    @admin.display(description="Публикаций", ordering='stats__post_count')
+    def post_count(self, obj):
+        return self._stats(obj, 'post_count')
+
+    @admin.display(description="Просмотров", ordering='stats__total_views')
+    def total_views(self, obj):
+        return self._stats(obj, 'total_views')
+
+    @admin.display(description="Комментариев", ordering='stats__comments_received')
+    def comments_received(self, obj):
+        return self._stats(obj, 'comments_received')
+
+    @admin.display(description="Последняя публикация", ordering='stats__last_post_at')
+    def last_post_at(self, obj):
+        return self._stats(obj, 'last_post_at')
+
+    def _stats(self, obj, field):
+        stats = getattr(obj, 'stats', None)
+        return getattr(stats, field) if stats is not None else None
 
 @admin.register(NewsItem)
-class NewsItemAdmin(admin.ModelAdmin):
-    list_display = ('title', 'reporter', 'created_at', 'views')
+class NewsItemAdmin(ExportAdminMixin, SearchIndexAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'reporter', 'created_at', 'views', 'comment_count', 'last_comment_at')
     list_filter = ('reporter', 'created_at')
+    # Просмотры меняет только сброс буфера (news.counters); save() их не пишет
+    readonly_fields = ('views',)
     search_fields = ('title', 'text')
+    search_index_kind = 'news'
+    export_name = 'news'
 
 @admin.register(AboutPage)
 class AboutPageAdmin(admin.ModelAdmin):
     list_display = ('title',)
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ExportAdminMixin, SearchIndexAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'news_item', 'created_at')
     list_filter = ('user', 'news_item')
-    search_fields = ('text', 'user__username')
\ No newline at end of file
+    search_fields = ('text', 'user__username')
+    search_index_kind = 'comment'
+    export_name = 'comments'
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Аналитика просмотров: почасовые корзины NewsItemViewBucket и рейтинг «в тренде».
+
+Оба источника пополняются из сброса буфера просмотров (news.counters), то есть
+пачкой на каждые NEWS_VIEWS_FLUSH_INTERVAL секунд, а не на каждый просмотр.
+Просмотры относятся к часу сброса, поэтому на границе часа возможен сдвиг не
+больше интервала сброса. Границы часов и суток — в UTC.
+
+Рейтинг — сумма просмотров с весом 2^(-возраст / NEWS_TRENDING_HALF_LIFE).
+Он хранится уже свёрнутым (NewsItemTrend.score на момент updated_at), поэтому
+сброс только домножает старое значение на затухание и прибавляет новые
+просмотры, а чтение рейтинга не трогает корзины.
+"""
+import heapq
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import NewsItem, NewsItemTrend, NewsItemViewBucket
+
+HOUR = NewsItemViewBucket.HOUR
+DAY = NewsItemViewBucket.DAY
+TRENDING_KEY = 'trending:{}'
+# Дальше этого числа периодов полураспада вклад просмотров меньше 0.1%
+HORIZON_HALF_LIVES = 10
+
+
+def bucket_start(moment, resolution=HOUR):
+    """Начало часа или суток (UTC), в которые попадает moment."""
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if resolution == DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def half_life():
+    return getattr(settings, 'NEWS_TRENDING_HALF_LIFE', 6 * 60 * 60)
+
+
+def decay(elapsed):
+    """Множитель затухания за elapsed (timedelta)."""
+    return 0.5 ** (max(elapsed.total_seconds(), 0) / half_life())
+
+
+def _upsert_buckets(rows):
+    """rows: (news_id, resolution, bucket, count). Существующие строки увеличиваются на count."""
+    if not rows:
+        return
+    table = connection.ops.quote_name(NewsItemViewBucket._meta.db_table)
+    adapt = connection.ops.adapt_datetimefield_value
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} (news_item_id, resolution, bucket, count) VALUES (%s, %s, %s, %s) "
+            f"ON CONFLICT (news_item_id, resolution, bucket) DO UPDATE SET count = {table}.count + excluded.count",
+            [(news_id, resolution, adapt(bucket), count) for news_id, resolution, bucket, count in rows],
+        )
+
+
+def _update_trends(deltas, now):
+    trends = NewsItemTrend.objects.select_for_update().in_bulk(deltas)
+    updated = []
+    for news_id, delta in deltas.items():
+        trend = trends.get(news_id)
+        score = trend.score * decay(now - trend.updated_at) if trend is not None else 0.0
+        updated.append(NewsItemTrend(news_item_id=news_id, score=score + delta, updated_at=now))
+    NewsItemTrend.objects.bulk_create(
+        updated, update_conflicts=True, unique_fields=['news_item'], update_fields=['score', 'updated_at'],
+    )
+
+
+def record_views(deltas, now=None):
+    """
+    Учитывает пачку просмотров {news_id: прирост}: часовые корзины и рейтинг.
+    Вызывается из сброса буфера просмотров.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Новость могли удалить, пока просмотры ждали в буфере
+        existing = set(NewsItem.objects.filter(pk__in=list(deltas)).values_list('pk', flat=True))
+        deltas = {news_id: delta for news_id, delta in deltas.items() if news_id in existing and delta}
+        if not deltas:
+            return
+        hour = bucket_start(now)
+        _upsert_buckets([(news_id, HOUR, hour, delta) for news_id, delta in deltas.items()])
+        _update_trends(deltas, now)
+
+
+def trending(limit=None):
+    """
+    Топ новостей по затухающему счёту: список словарей id, title, url, score.
+    Кэшируется на NEWS_TRENDING_CACHE_TTL секунд.
+    """
+    limit = limit or getattr(settings, 'NEWS_TRENDING_SIZE', 10)
+    key = TRENDING_KEY.format(limit)
+    items = cache.get(key)
+    if items is None:
+        items = compute_trending(limit)
+        cache.set(key, items, timeout=getattr(settings, 'NEWS_TRENDING_CACHE_TTL', 60))
+    return items
+
+
+def compute_trending(limit, now=None):
+    """Пересчёт топа: только новости, которые смотрели в пределах горизонта затухания."""
+    now = now or timezone.now()
+    horizon = now - timedelta(seconds=half_life() * HORIZON_HALF_LIVES)
+    rows = NewsItemTrend.objects.filter(updated_at__gte=horizon).values_list('news_item_id', 'score', 'updated_at')
+    top = heapq.nlargest(limit, ((score * decay(now - updated_at), news_id) for news_id, score, updated_at in rows))
+    titles = dict(NewsItem.objects.filter(pk__in=[news_id for _, news_id in top]).values_list('pk', 'title'))
+    return [
+        {
+            'id': news_id,
+            'title': titles[news_id],
+            'url': reverse('news:news_comments', args=[news_id]),
+            'score': round(score, 2),
+        }
+        for score, news_id in top
+        if news_id in titles
+    ]
+
+
+def rollup(now=None):
+    """
+    Сворачивает часовые корзины старше NEWS_ANALYTICS_HOURLY_RETENTION_DAYS в суточные
+    (сутки за транзакцию) и удаляет суточные старше NEWS_ANALYTICS_DAILY_RETENTION_DAYS.
+    Возвращает (свёрнуто часовых строк, записано суточных, удалено суточных).
+    """
+    now = now or timezone.now()
+    cutoff = bucket_start(now - timedelta(days=getattr(settings, 'NEWS_ANALYTICS_HOURLY_RETENTION_DAYS', 7)), DAY)
+    hours = NewsItemViewBucket.objects.filter(resolution=HOUR, bucket__lt=cutoff)
+    folded = days_written = 0
+    while True:
+        first = hours.order_by('bucket').values_list('bucket', flat=True).first()
+        if first is None:
+            break
+        day = bucket_start(first, DAY)
+        with transaction.atomic():
+            chunk = hours.filter(bucket__gte=day, bucket__lt=day + timedelta(days=1))
+            totals = list(chunk.values('news_item_id').annotate(total=Sum('count')).values_list('news_item_id', 'total'))
+            _upsert_buckets([(news_id, DAY, day, total) for news_id, total in totals])
+            folded += chunk.delete()[0]
+            days_written += len(totals)
+
+    expired = 0
+    daily_days = getattr(settings, 'NEWS_ANALYTICS_DAILY_RETENTION_DAYS', None)
+    if daily_days:
+        expired = NewsItemViewBucket.objects.filter(
+            resolution=DAY, bucket__lt=bucket_start(now - timedelta(days=daily_days), DAY),
+        ).delete()[0]
+    return folded, days_written, expired
+
+
+def rebuild_trends(now=None):
+    """Пересчитывает рейтинг с нуля по часовым корзинам в пределах горизонта затухания."""
+    now = now or timezone.now()
+    horizon = now - timedelta(seconds=half_life() * HORIZON_HALF_LIVES)
+    scores = {}
+    rows = NewsItemViewBucket.objects.filter(resolution=HOUR, bucket__gte=bucket_start(horizon))
+    for news_id, bucket, count in rows.values_list('news_item_id', 'bucket', 'count').iterator():
+        # Середина часа — среднее время просмотров в корзине
+        scores[news_id] = scores.get(news_id, 0.0) + count * decay(now - bucket - timedelta(minutes=30))
+    with transaction.atomic():
+        NewsItemTrend.objects.all().delete()
+        NewsItemTrend.objects.bulk_create(
+            [NewsItemTrend(news_item_id=news_id, score=score, updated_at=now) for news_id, score in scores.items()],
+            batch_size=500,
+        )
+    return len(scores)
@@ -1,8 +1,50 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
 
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
 
     def ready(self):
-        import news.signals  # noqa
\ No newline at end of file
+        import news.checks  # noqa
+        import news.signals  # noqa
+        from .db import configure_sqlite
+        from .instrumentation import install as install_instrumentation
+
+        post_migrate.connect(index_after_migrate, sender=self)
+        post_migrate.connect(bootstrap_after_migrate, sender=self)
+        connection_created.connect(configure_sqlite, dispatch_uid='news_configure_sqlite')
+        install_instrumentation()
+
+
+SEARCH_INDEX_MIGRATION = ('news', '0015_search_index')
+
+
+def index_after_migrate(sender, using, plan=None, **kwargs):
+    """Заполняет поисковый индекс, если migrate только что создал его таблицу."""
+    from django.db import DEFAULT_DB_ALIAS
+
+    if using != DEFAULT_DB_ALIAS or not plan:
+        return
+    if any((migration.app_label, migration.name) == SEARCH_INDEX_MIGRATION and not backwards
+           for migration, backwards in plan):
+        from .search import rebuild_index
+        rebuild_index()
+
+
+def bootstrap_after_migrate(sender, using, **kwargs):
+    """
+    Один раз за деплой (после migrate) досоздаёт начальные данные. Тестовые базы
+    создаются с NEWS_AUTO_BOOTSTRAP = False (news.test_runner, temporary_database):
+    тесты и замеры создают свои данные.
+    """
+    from django.conf import settings
+    from django.db import DEFAULT_DB_ALIAS
+
+    if not getattr(settings, 'NEWS_AUTO_BOOTSTRAP', True) or using != DEFAULT_DB_ALIAS:
+        return
+
+    from .seeding import bootstrap
+    bootstrap()
@@ -0,0 +1,5 @@
+"""
+Инструменты для замеров производительности: генерация данных и «горячие» запросы.
+Используются командами bench_*; данные создаются во временной базе
+(news.benchmarks.database.temporary_database), боевая база не затрагивается.
+"""
@@ -0,0 +1,109 @@
+import random
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import OperationalError, close_old_connections, connections, transaction
+
+from news.db import current_pragmas, use_profile
+from news.models import Comment, NewsItem, User, UserProfile
+
+# Варианты настройки базы для сравнения: профиль PRAGMA, время жизни соединения
+# и режим транзакций SQLite
+SETUPS = {
+    'default': {'profile': 'default', 'conn_max_age': 0, 'transaction_mode': None},
+    'production': {'profile': 'production', 'conn_max_age': 60, 'transaction_mode': 'IMMEDIATE'},
+}
+
+
+@contextmanager
+def database_setup(name, alias='default'):
+    """Применяет вариант настройки к новым соединениям; по выходе возвращает настройки."""
+    setup = SETUPS[name]
+    settings_dict = connections[alias].settings_dict
+    options = settings_dict.setdefault('OPTIONS', {})
+    saved = (settings_dict.get('CONN_MAX_AGE', 0), options.get('transaction_mode'))
+
+    connections.close_all()
+    use_profile(setup['profile'])
+    settings_dict['CONN_MAX_AGE'] = setup['conn_max_age']
+    if setup['transaction_mode']:
+        options['transaction_mode'] = setup['transaction_mode']
+    else:
+        options.pop('transaction_mode', None)
+    try:
+        yield setup
+    finally:
+        connections.close_all()
+        use_profile(None)
+        settings_dict['CONN_MAX_AGE'] = saved[0]
+        if saved[1]:
+            options['transaction_mode'] = saved[1]
+        else:
+            options.pop('transaction_mode', None)
+
+
+def prepare_data(users=20, news=20):
+    run = int(time.time())
+    authors = [User.objects.create_user(username=f'concurrency_{run}_{i}') for i in range(users)]
+    UserProfile.objects.bulk_create([UserProfile(user=user) for user in authors])
+    items = NewsItem.objects.bulk_create([NewsItem(title=f'Нагрузка {i}', text='Текст') for i in range(news)])
+    return [user.pk for user in authors], [item.pk for item in items]
+
+
+def _post_comments(count, user_ids, news_ids, latencies, errors, barrier):
+    barrier.wait()
+    try:
+        for i in range(count):
+            started = time.perf_counter()
+            try:
+                # Как в add_comment: комментарий и вся работа сигналов в одной транзакции
+                with transaction.atomic():
+                    Comment.objects.create(
+                        user_id=random.choice(user_ids),
+                        news_item_id=random.choice(news_ids),
+                        text=f'Параллельный комментарий {i}',
+                    )
+                latencies.append((time.perf_counter() - started) * 1000)
+            except OperationalError as error:
+                errors.append(str(error))
+            finally:
+                # Конец «запроса»: при CONN_MAX_AGE=0 соединение закрывается
+                close_old_connections()
+    finally:
+        connections.close_all()
+
+
+def run_comment_posting(setup_name, threads=8, per_thread=50, user_ids=(), news_ids=()):
+    with database_setup(setup_name):
+        pragmas = current_pragmas(connections['default'])
+        connections.close_all()
+
+        latencies, errors = [], []
+        barrier = threading.Barrier(threads)
+        workers = [
+            threading.Thread(target=_post_comments, args=(per_thread, user_ids, news_ids, latencies, errors, barrier))
+            for _ in range(threads)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        'setup': setup_name,
+        'pragmas': pragmas,
+        'threads': threads,
+        'attempted': threads * per_thread,
+        'committed': len(latencies),
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:3],
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'median_ms': round(statistics.median(ordered), 2) if ordered else None,
+        'p95_ms': round(ordered[int(len(ordered) * 0.95) - 1], 2) if ordered else None,
+    }
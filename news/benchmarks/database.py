@@ -0,0 +1,29 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import override_settings
+
+
+@contextmanager
+def temporary_database(alias='default'):
+    """
+    Создаёт во временном каталоге отдельную базу с применёнными миграциями и
+    переключает на неё alias; по выходе удаляет её и возвращает прежние настройки.
+    """
+    connection = connections[alias]
+    workdir = tempfile.mkdtemp(prefix='news-bench-')
+    test_settings = connection.settings_dict.get('TEST', {})
+    connection.settings_dict['TEST'] = {**test_settings, 'NAME': os.path.join(workdir, 'bench.sqlite3')}
+    # Демо-данные исказили бы замер: набор данных создаёт сама команда
+    with override_settings(NEWS_AUTO_BOOTSTRAP=False):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield workdir
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        connection.settings_dict['TEST'] = test_settings
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,169 @@
+"""
+Нагрузочный прогон публичных endpoint'ов внутри процесса: запросы идут через
+WSGI- (django.test.Client) или ASGI-обработчик (AsyncClient) без сети, поэтому
+замер показывает стоимость самого приложения. Число SQL-запросов берётся из
+заголовка Server-Timing (news.instrumentation).
+"""
+import asyncio
+import math
+import queue
+import random
+import re
+import threading
+import time
+
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from news.models import User
+
+SERVER_TIMING_QUERIES_RE = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def _scenarios(sample):
+    """Сценарий: (метод, функция адреса, данные, нужен ли вход)."""
+    news_ids = sample['news_ids']
+
+    def any_news():
+        return random.choice(news_ids)
+
+    return {
+        'landing': ('get', lambda: reverse('news:landing'), None, False),
+        'news_comments': ('get', lambda: reverse('news:news_comments', args=[any_news()]), None, True),
+        'add_comment': (
+            'post', lambda: reverse('news:add_comment', args=[any_news()]),
+            {'comment_text': 'Комментарий из нагрузочного теста'}, True,
+        ),
+        'increment_views': ('post', lambda: reverse('news:increment_views', args=[any_news()]), {}, False),
+        'update_activity': ('post', lambda: reverse('news:update_activity'), {}, True),
+        'get_user_status': ('get', lambda: reverse('news:get_user_status'), None, True),
+    }
+
+
+SCENARIOS = tuple(_scenarios({'news_ids': [0]}))
+
+
+def percentile(ordered, share):
+    """Процентиль по ближайшему рангу для отсортированного списка."""
+    if not ordered:
+        return None
+    rank = max(math.ceil(share * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def _queries(response):
+    match = SERVER_TIMING_QUERIES_RE.search(response.get('Server-Timing', ''))
+    return int(match.group(1)) if match else None
+
+
+def _plan(scenario_names, requests_per_scenario):
+    plan = [name for name in scenario_names for _ in range(requests_per_scenario)]
+    random.shuffle(plan)
+    return plan
+
+
+def _summary(name, samples):
+    latencies = sorted(sample[0] for sample in samples)
+    queries = [sample[2] for sample in samples if sample[2] is not None]
+    errors = [sample[1] for sample in samples if sample[1] >= 400]
+    return {
+        'scenario': name,
+        'requests': len(samples),
+        'errors': len(errors),
+        'error_statuses': sorted(set(errors)),
+        'p50_ms': round(percentile(latencies, 0.50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+        'avg_queries': round(sum(queries) / len(queries), 1) if queries else None,
+        'max_queries': max(queries) if queries else None,
+    }
+
+
+def _report(results, elapsed, mode, concurrency):
+    by_scenario = {}
+    for name, latency, status, queries in results:
+        by_scenario.setdefault(name, []).append((latency, status, queries))
+    return {
+        'mode': mode,
+        'concurrency': concurrency,
+        'requests': len(results),
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(results) / elapsed, 1) if elapsed else 0,
+        'scenarios': [_summary(name, samples) for name, samples in sorted(by_scenario.items())],
+    }
+
+
+def run_wsgi(sample, scenario_names, requests_per_scenario=100, concurrency=8):
+    scenarios = _scenarios(sample)
+    tasks = queue.Queue()
+    for name in _plan(scenario_names, requests_per_scenario):
+        tasks.put(name)
+    users = list(User.objects.filter(pk__in=sample['user_ids'][:concurrency]))
+    results, lock = [], threading.Lock()
+
+    def worker(user):
+        from django.db import connections
+
+        anonymous, signed_in = Client(), Client()
+        signed_in.force_login(user)
+        try:
+            while True:
+                try:
+                    name = tasks.get_nowait()
+                except queue.Empty:
+                    return
+                method, url, data, needs_login = scenarios[name]
+                client = signed_in if needs_login else anonymous
+                started = time.perf_counter()
+                if data is not None:
+                    response = getattr(client, method)(url(), data)
+                else:
+                    response = getattr(client, method)(url())
+                latency = (time.perf_counter() - started) * 1000
+                with lock:
+                    results.append((name, latency, response.status_code, _queries(response)))
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, args=(users[i % len(users)],)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return _report(results, time.perf_counter() - started, 'wsgi', concurrency)
+
+
+def run_asgi(sample, scenario_names, requests_per_scenario=100, concurrency=8):
+    scenarios = _scenarios(sample)
+    plan = _plan(scenario_names, requests_per_scenario)
+    users = list(User.objects.filter(pk__in=sample['user_ids'][:concurrency]))
+
+    def make_clients(user):
+        anonymous, signed_in = AsyncClient(), AsyncClient()
+        signed_in.force_login(user)
+        return anonymous, signed_in
+
+    clients = [make_clients(users[i % len(users)]) for i in range(concurrency)]
+
+    async def main():
+        results = []
+        pending = iter(plan)
+
+        async def worker(anonymous, signed_in):
+            for name in pending:
+                method, url, data, needs_login = scenarios[name]
+                client = signed_in if needs_login else anonymous
+                started = time.perf_counter()
+                if data is not None:
+                    response = await getattr(client, method)(url(), data)
+                else:
+                    response = await getattr(client, method)(url())
+                results.append((name, (time.perf_counter() - started) * 1000, response.status_code, _queries(response)))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(*pair) for pair in clients))
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(main())
+    return _report(results, elapsed, 'asgi', concurrency)
@@ -0,0 +1,137 @@
+"""
+Ёмкость по одновременным соединениям под нагрузкой опроса: каждый клиент раз
+в interval секунд запрашивает get_user_status и раз в heartbeat_every опросов
+отправляет update_activity, как это делают открытые страницы.
+
+WSGI моделируется фиксированным числом потоков-воркеров (как gunicorn с
+sync/gthread-воркерами): клиенты ждут в очереди, пока поток освободится.
+Под ASGI каждый клиент — задача в одном цикле событий, async-view не занимают
+поток на время ожидания. Задержка считается от момента, когда опрос должен был
+уйти, поэтому в неё входит и ожидание свободного воркера.
+"""
+import asyncio
+import heapq
+import random
+import threading
+import time
+
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from news.models import User
+
+from .endpoints import percentile
+
+
+def _clients(factory, sample, count):
+    users = list(User.objects.filter(pk__in=sample['user_ids'][:count]))
+    clients = []
+    for i in range(count):
+        client = factory()
+        client.force_login(users[i % len(users)])
+        clients.append(client)
+    return clients
+
+
+def _request(index, poll, heartbeat_every):
+    """Какой запрос отправляет клиент index на опросе poll: (метод, адрес)."""
+    if heartbeat_every and (poll + index) % heartbeat_every == 0:
+        return 'post', reverse('news:update_activity')
+    return 'get', reverse('news:get_user_status')
+
+
+def _report(mode, clients, interval, seconds, samples, workers=None):
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, status in samples if status >= 400)
+    expected = clients / interval
+    achieved = len(samples) / seconds if seconds else 0
+    return {
+        'mode': mode,
+        'clients': clients,
+        'workers': workers,
+        'interval': interval,
+        'requests': len(samples),
+        'errors': errors,
+        'expected_rps': round(expected, 1),
+        'achieved_rps': round(achieved, 1),
+        'p50_ms': round(percentile(latencies, 0.50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+    }
+
+
+def run_wsgi(sample, clients, interval=1.0, duration=10.0, workers=8, heartbeat_every=6):
+    """clients клиентов обслуживают workers потоков; очередь — куча по времени следующего опроса."""
+    pool = _clients(Client, sample, clients)
+    started = time.perf_counter()
+    deadline = started + duration
+    # (когда отправить, номер клиента, номер опроса); старт клиентов разнесён по интервалу
+    due = [(started + random.uniform(0, interval), index, 0) for index in range(clients)]
+    heapq.heapify(due)
+    samples, lock = [], threading.Lock()
+
+    def worker():
+        from django.db import connections
+
+        try:
+            while True:
+                with lock:
+                    if not due or due[0][0] >= deadline:
+                        return
+                    scheduled, index, poll = heapq.heappop(due)
+                wait = scheduled - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                method, url = _request(index, poll, heartbeat_every)
+                response = getattr(pool[index], method)(url)
+                finished = time.perf_counter()
+                with lock:
+                    samples.append(((finished - scheduled) * 1000, response.status_code))
+                    # Следующий опрос — через interval, но не раньше, чем пришёл ответ
+                    heapq.heappush(due, (max(scheduled + interval, finished), index, poll + 1))
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return _report('wsgi', clients, interval, time.perf_counter() - started, samples, workers)
+
+
+def run_asgi(sample, clients, interval=1.0, duration=10.0, heartbeat_every=6):
+    """Каждый клиент — задача asyncio, все обслуживаются одним циклом событий."""
+    pool = _clients(AsyncClient, sample, clients)
+
+    async def main():
+        samples = []
+        started = time.perf_counter()
+        deadline = started + duration
+
+        async def poller(index, client):
+            scheduled = started + random.uniform(0, interval)
+            poll = 0
+            while scheduled < deadline:
+                wait = scheduled - time.perf_counter()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                method, url = _request(index, poll, heartbeat_every)
+                response = await getattr(client, method)(url)
+                finished = time.perf_counter()
+                samples.append(((finished - scheduled) * 1000, response.status_code))
+                scheduled = max(scheduled + interval, finished)
+                poll += 1
+
+        await asyncio.gather(*(poller(index, client) for index, client in enumerate(pool)))
+        return samples, time.perf_counter() - started
+
+    samples, seconds = asyncio.run(main())
+    return _report('asgi', clients, interval, seconds, samples)
+
+
+def within_slo(report, slo_ms, min_share=0.95):
+    """Выдерживает ли прогон нагрузку: p95 не выше slo_ms и отвечено не меньше min_share опросов."""
+    if report['errors'] or report['p95_ms'] is None:
+        return False
+    return report['p95_ms'] <= slo_ms and report['achieved_rps'] >= report['expected_rps'] * min_share
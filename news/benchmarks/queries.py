@@ -0,0 +1,90 @@
+import statistics
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from news.models import Comment, NewsItem, Reporter, User, UserProfile
+from news.pagination import encode_cursor, keyset_filter
+
+# build(sample) возвращает queryset; expected_index — индекс, который должен попасть в план
+HotQuery = namedtuple('HotQuery', ['name', 'build', 'expected_index'])
+
+
+def _middle_news(sample):
+    news_ids = sample['news_ids']
+    return NewsItem.objects.get(pk=news_ids[len(news_ids) // 2])
+
+
+def _feed_next_page(sample):
+    item = _middle_news(sample)
+    queryset, _ = keyset_filter(NewsItem.objects.all(), cursor=encode_cursor(item.created_at, item.pk, 0))
+    return queryset[:settings.NEWS_FEED_PAGE_SIZE]
+
+
+def _comment_thread(sample):
+    return Comment.objects.filter(news_item_id=_middle_news(sample).pk).order_by(
+        '-created_at', '-id'
+    )[:settings.NEWS_COMMENTS_PAGE_SIZE]
+
+
+HOT_QUERIES = [
+    HotQuery(
+        'feed_first_page',
+        lambda sample: NewsItem.objects.order_by('-created_at', '-id')[:settings.NEWS_FEED_PAGE_SIZE],
+        'newsitem_feed_idx',
+    ),
+    HotQuery('feed_next_page', _feed_next_page, 'newsitem_feed_idx'),
+    HotQuery('comment_thread', _comment_thread, 'comment_thread_idx'),
+    HotQuery(
+        'reporters_by_hire_date',
+        lambda sample: Reporter.objects.order_by('-hire_date')[:50],
+        'reporter_hire_date_idx',
+    ),
+    HotQuery(
+        'recently_active_online',
+        lambda sample: UserProfile.objects.filter(status='online').order_by('-last_activity')[:50],
+        'profile_status_activity_idx',
+    ),
+    HotQuery(
+        'email_is_taken',
+        lambda sample: User.objects.filter(email=sample['email'])[:1],
+        'user_email_idx',
+    ),
+]
+
+
+def explain(queryset):
+    return queryset.explain()
+
+
+def uses_index(plan, index_name):
+    return index_name in plan
+
+
+def time_query(queryset, repeat=20):
+    """Время выполнения запроса в миллисекундах (каждый раз новый queryset, без кэша результатов)."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset.all())
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def run_queries(sample, repeat=20, queries=HOT_QUERIES):
+    results = []
+    for query in queries:
+        queryset = query.build(sample)
+        plan = explain(queryset)
+        timings = time_query(queryset, repeat)
+        results.append({
+            'name': query.name,
+            'expected_index': query.expected_index,
+            'uses_index': uses_index(plan, query.expected_index),
+            'plan': plan,
+            'sql': str(queryset.query),
+            'min_ms': round(min(timings), 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'max_ms': round(max(timings), 3),
+        })
+    return results
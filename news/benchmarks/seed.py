@@ -0,0 +1,113 @@
+import random
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from news.comment_stats import LATEST_COMMENTS
+from news.media import WAVEFORM_BARS
+from news.models import Comment, NewsItem, Reporter, User, UserProfile
+from news.reporter_stats import refresh as refresh_reporter_stats
+
+BATCH_SIZE = 500
+
+
+def _spread(objects, field, span, now):
+    """bulk_create проставляет auto_now_add одним «сейчас» — разносим время по интервалу."""
+    for obj in objects:
+        setattr(obj, field, now - timedelta(seconds=random.uniform(0, span.total_seconds())))
+    type(objects[0]).objects.bulk_update(objects, [field], batch_size=BATCH_SIZE)
+
+
+def _comment(user, item, index, image_share, voice_share):
+    roll = random.random()
+    if roll < voice_share:
+        # Файлы не создаются: для отрисовки нужны только имена, длительность и пики
+        return Comment(
+            user=user, news_item=item, text='Голосовое сообщение', is_voice_message=True,
+            audio_file=f'voice_messages/bench_{index}.webm', audio_duration=random.randint(1, 120),
+            waveform=[random.randint(0, 100) for _ in range(WAVEFORM_BARS)],
+        )
+    if roll < voice_share + image_share:
+        return Comment(user=user, news_item=item, text='Фото', image=f'comment_images/bench_{index}.jpg')
+    return Comment(user=user, news_item=item, text=f'Комментарий {index}')
+
+
+def seed_dataset(news=1000, comments_per_news=20, users=200, reporters=20, days=365,
+                 image_share=0.05, voice_share=0.05):
+    """
+    Создаёт пачками пользователей с профилями, репортёров, новости и комментарии
+    (доли image_share и voice_share — с картинкой и голосовые).
+    Сигналы при bulk_create не срабатывают, поэтому кэши и поисковый индекс не трогаются.
+    Возвращает словарь с образцами значений для параметров запросов.
+    """
+    run = uuid.uuid4().hex[:8]
+    now = timezone.now()
+    span = timedelta(days=days)
+    password = make_password(None)
+    statuses = [choice for choice, _ in UserProfile.STATUS_CHOICES]
+
+    people = User.objects.bulk_create(
+        [
+            User(username=f'bench_{run}_{i}', email=f'bench_{run}_{i}@example.com', password=password)
+            for i in range(users + reporters)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    profiles = UserProfile.objects.bulk_create(
+        [UserProfile(user=user, status=random.choice(statuses)) for user in people],
+        batch_size=BATCH_SIZE,
+    )
+    _spread(profiles, 'last_activity', timedelta(days=30), now)
+
+    reporter_objects = Reporter.objects.bulk_create(
+        [Reporter(user=user, specialization='Бенчмарк') for user in people[users:]],
+        batch_size=BATCH_SIZE,
+    )
+    readers = people[:users] or people
+
+    news_items = NewsItem.objects.bulk_create(
+        [
+            NewsItem(
+                reporter=random.choice(reporter_objects) if reporter_objects else None,
+                title=f'Новость {run} {i}',
+                text='Текст новости для замеров. ' * 20,
+                views=random.randint(0, 10000),
+            )
+            for i in range(news)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    if news_items:
+        _spread(news_items, 'created_at', span, now)
+
+    comments = []
+    latest = {item.pk: [] for item in news_items}
+    for index, item in enumerate(news_items):
+        for j in range(comments_per_news):
+            comments.append(_comment(random.choice(readers), item, j, image_share, voice_share))
+        if len(comments) >= BATCH_SIZE * 10 or index == len(news_items) - 1:
+            created = Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+            if created:
+                _spread(created, 'created_at', span, now)
+            for comment in created:
+                latest[comment.news_item_id].append((comment.created_at, comment.pk))
+            comments = []
+
+    # Сигналы не срабатывали — заполняем денормализованные поля (news.comment_stats) сами
+    for item in news_items:
+        ordered = sorted(latest[item.pk], reverse=True)
+        item.comment_count = len(ordered)
+        item.last_comment_at = ordered[0][0] if ordered else None
+        item.latest_comment_ids = [pk for _, pk in ordered[:LATEST_COMMENTS]]
+    if news_items:
+        NewsItem.objects.bulk_update(news_items, NewsItem.COMMENT_STATS_FIELDS, batch_size=BATCH_SIZE)
+    refresh_reporter_stats([reporter.pk for reporter in reporter_objects])
+
+    return {
+        'run': run,
+        'news_ids': [item.pk for item in news_items],
+        'user_ids': [user.pk for user in readers],
+        'email': readers[len(readers) // 2].email if readers else 'nobody@example.com',
+    }
@@ -0,0 +1,91 @@
+import atexit
+import logging
+import operator
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Процессный буфер отложенной записи.
+    Накапливает значения по ключу (merge склеивает старое и новое) и передаёт их
+    в flush_func одной пачкой: при достижении threshold событий, раз в interval секунд
+    из фонового потока и при завершении процесса.
+    """
+
+    def __init__(self, flush_func, merge=operator.add, threshold=100, interval=10.0):
+        self.flush_func = flush_func
+        self.merge = merge
+        self.threshold = threshold
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._events = 0
+        self._timer = None
+        atexit.register(self.flush)
+
+    def add(self, key, value):
+        if self._add(key, value):
+            self.flush()
+
+    async def aadd(self, key, value):
+        """add для async-кода: сброс по порогу пишет в базу, поэтому уходит в поток."""
+        if self._add(key, value):
+            await sync_to_async(self.flush)()
+
+    def _add(self, key, value):
+        """Кладёт значение в буфер. True — если набрался порог и пора сбрасывать."""
+        with self._lock:
+            if key in self._pending:
+                self._pending[key] = self.merge(self._pending[key], value)
+            else:
+                self._pending[key] = value
+            self._events += 1
+            self._ensure_timer()
+            return self._events >= self.threshold
+
+    def pending(self, key, default=None):
+        with self._lock:
+            return self._pending.get(key, default)
+
+    def flush(self):
+        """Сбрасывает накопленное. Возвращает количество сброшенных ключей."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._events = 0
+            if not batch:
+                return 0
+            try:
+                self.flush_func(batch)
+            except Exception:
+                logger.exception("Не удалось сбросить буфер %s", self.flush_func.__name__)
+                self._restore(batch)
+                return 0
+            return len(batch)
+
+    def _restore(self, batch):
+        with self._lock:
+            for key, value in batch.items():
+                if key in self._pending:
+                    self._pending[key] = self.merge(value, self._pending[key])
+                else:
+                    self._pending[key] = value
+
+    def _ensure_timer(self):
+        if self._timer is None and self.interval:
+            self._timer = threading.Thread(target=self._run_timer, name='write-behind-flush', daemon=True)
+            self._timer.start()
+
+    def _run_timer(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+            # У фонового потока свои соединения с БД, не держим их открытыми
+            connections.close_all()
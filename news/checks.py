@@ -0,0 +1,17 @@
+from django.core.checks import Warning, register
+
+
+@register()
+def check_media_tools(app_configs, **kwargs):
+    """Без ffmpeg/ffprobe голосовые сообщения остаются без длительности, Opus-версии и волны."""
+    from .media import ffmpeg_binary, ffprobe_binary
+
+    missing = [name for name, binary in (('ffmpeg', ffmpeg_binary()), ('ffprobe', ffprobe_binary())) if not binary]
+    if not missing:
+        return []
+    return [Warning(
+        f"Не найдены {', '.join(missing)}: у голосовых сообщений не будет длительности, "
+        "компактной версии и волны.",
+        hint="Установите ffmpeg или укажите NEWS_FFMPEG_BINARY и NEWS_FFPROBE_BINARY.",
+        id='news.W001',
+    )]
@@ -0,0 +1,106 @@
+"""
+Денормализованные данные о комментариях в NewsItem: comment_count, last_comment_at
+и latest_comment_ids. Обновляются из сигналов при создании и удалении комментария,
+расхождения исправляет команда reconcile_comment_counts.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Value, Window
+from django.db.models.functions import Greatest, RowNumber
+
+from .models import Comment, NewsItem
+
+LATEST_COMMENTS = 3
+
+
+def _latest(news_id):
+    """Последние комментарии новости — короткий проход по индексу (news_item, created_at)."""
+    return list(
+        Comment.objects.filter(news_item_id=news_id)
+        .order_by('-created_at', '-id')
+        .values_list('pk', 'created_at')[:LATEST_COMMENTS]
+    )
+
+
+def _update(news_id, delta):
+    with transaction.atomic():
+        latest = _latest(news_id)
+        NewsItem.objects.filter(pk=news_id).update(
+            comment_count=Greatest(F('comment_count') + Value(delta), Value(0)),
+            last_comment_at=latest[0][1] if latest else None,
+            latest_comment_ids=[pk for pk, _ in latest],
+        )
+
+
+def comment_added(comment):
+    _update(comment.news_item_id, 1)
+
+
+def comment_removed(comment):
+    _update(comment.news_item_id, -1)
+
+
+def attach_latest_comments(items):
+    """
+    Подставляет в items.latest_comments последние комментарии по latest_comment_ids —
+    одним запросом на всю страницу ленты.
+    """
+    items = list(items)
+    ids = {pk for item in items for pk in item.latest_comment_ids}
+    comments = Comment.objects.select_related('user__profile').in_bulk(ids) if ids else {}
+    for item in items:
+        item.latest_comments = [comments[pk] for pk in item.latest_comment_ids if pk in comments]
+    return items
+
+
+def recount(news_ids, batch_size=500):
+    """
+    Пересчитывает денормализованные поля заданных новостей пачками: по запросу на
+    количества и на последние комментарии (оконная функция) на batch_size новостей.
+    Для массовой загрузки, где сигналы на каждый комментарий не срабатывают.
+    """
+    news_ids = sorted(set(news_ids))
+    for start in range(0, len(news_ids), batch_size):
+        chunk = news_ids[start:start + batch_size]
+        counts = dict(
+            Comment.objects.filter(news_item_id__in=chunk)
+            .values('news_item_id').annotate(total=Count('pk')).values_list('news_item_id', 'total')
+        )
+        latest = {}
+        rows = (
+            Comment.objects.filter(news_item_id__in=chunk)
+            .annotate(rank=Window(
+                RowNumber(), partition_by=F('news_item_id'), order_by=[F('created_at').desc(), F('id').desc()],
+            ))
+            .filter(rank__lte=LATEST_COMMENTS)
+            .order_by('news_item_id', 'rank')
+            .values_list('news_item_id', 'pk', 'created_at')
+        )
+        for news_id, pk, created_at in rows:
+            latest.setdefault(news_id, []).append((pk, created_at))
+        items = [
+            NewsItem(
+                pk=news_id,
+                comment_count=counts.get(news_id, 0),
+                last_comment_at=latest[news_id][0][1] if news_id in latest else None,
+                latest_comment_ids=[pk for pk, _ in latest.get(news_id, [])],
+            )
+            for news_id in chunk
+        ]
+        NewsItem.objects.bulk_update(items, ['comment_count', 'last_comment_at', 'latest_comment_ids'])
+
+
+def reconcile(chunk_size=500):
+    """Пересчитывает денормализованные поля всех новостей. Возвращает число исправленных."""
+    fixed = 0
+    queryset = NewsItem.objects.only('pk', 'comment_count', 'last_comment_at', 'latest_comment_ids')
+    for item in queryset.iterator(chunk_size=chunk_size):
+        latest = _latest(item.pk)
+        actual = {
+            'comment_count': Comment.objects.filter(news_item_id=item.pk).count(),
+            'last_comment_at': latest[0][1] if latest else None,
+            'latest_comment_ids': [pk for pk, _ in latest],
+        }
+        if any(getattr(item, field) != value for field, value in actual.items()):
+            NewsItem.objects.filter(pk=item.pk).update(**actual)
+            fixed += 1
+    return fixed
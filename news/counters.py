@@ -0,0 +1,141 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .analytics import record_views
+from .buffers import WriteBehindBuffer
+from .reporter_stats import views_added
+from .http_cache import touch_views
+from .models import NewsItem
+
+VIEWS_KEY = 'views:count:{}'
+SEEN_KEY = 'views:seen:{}:{}'
+FLUSH_BATCH_SIZE = 500
+
+
+def flush_view_deltas(deltas):
+    """
+    Применяет накопленные приросты одним UPDATE ... SET views = views + CASE ... на пачку
+    и в той же транзакции пополняет почасовую аналитику, рейтинг (news.analytics)
+    и просмотры в статистике репортёров (news.reporter_stats).
+    """
+    items = list(deltas.items())
+    now = timezone.now()
+    for start in range(0, len(items), FLUSH_BATCH_SIZE):
+        chunk = items[start:start + FLUSH_BATCH_SIZE]
+        increment = Case(*[When(pk=pk, then=Value(delta)) for pk, delta in chunk], default=Value(0))
+        with transaction.atomic():
+            NewsItem.objects.filter(pk__in=[pk for pk, _ in chunk]).update(views=F('views') + increment)
+            record_views(dict(chunk), now)
+            views_added(dict(chunk))
+    touch_views()
+
+
+view_buffer = WriteBehindBuffer(
+    flush_view_deltas,
+    threshold=getattr(settings, 'NEWS_VIEWS_FLUSH_THRESHOLD', 100),
+    interval=getattr(settings, 'NEWS_VIEWS_FLUSH_INTERVAL', 10),
+)
+
+
+def viewer_key(request):
+    """Ключ зрителя для отсечения повторов: сессия, а без неё — IP и User-Agent."""
+    session_key = getattr(request, 'session', None) and request.session.session_key
+    if session_key:
+        return session_key
+    raw = f"{request.META.get('REMOTE_ADDR', '')}|{request.META.get('HTTP_USER_AGENT', '')}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def current_views(news_id):
+    """
+    Приблизительное текущее число просмотров из кэша.
+    В базу идём только при промахе кэша; None — если новости нет.
+    """
+    views = cache.get(VIEWS_KEY.format(news_id))
+    if views is not None:
+        return views
+    stored = NewsItem.objects.filter(pk=news_id).values_list('views', flat=True).first()
+    if stored is None:
+        return None
+    views = stored + view_buffer.pending(news_id, 0)
+    cache.add(VIEWS_KEY.format(news_id), views, timeout=None)
+    return cache.get(VIEWS_KEY.format(news_id), views)
+
+
+async def acurrent_views(news_id):
+    """current_views для async-view."""
+    views = await cache.aget(VIEWS_KEY.format(news_id))
+    if views is not None:
+        return views
+    stored = await NewsItem.objects.filter(pk=news_id).values_list('views', flat=True).afirst()
+    if stored is None:
+        return None
+    views = stored + view_buffer.pending(news_id, 0)
+    await cache.aadd(VIEWS_KEY.format(news_id), views, timeout=None)
+    return await cache.aget(VIEWS_KEY.format(news_id), views)
+
+
+def prime_views(news_items):
+    """
+    Синхронизирует счётчики уже загруженных новостей с кэшем: отсутствующие
+    кладёт в кэш (чтобы increment_views не ходил в базу), а в объекты
+    подставляет актуальное значение с учётом ещё не сброшенных просмотров.
+    """
+    keys = {VIEWS_KEY.format(item.pk): item for item in news_items}
+    cached = cache.get_many(keys)
+    missing = {}
+    for key, item in keys.items():
+        if key in cached:
+            item.views = cached[key]
+        else:
+            item.views += view_buffer.pending(item.pk, 0)
+            missing[key] = item.views
+    if missing:
+        cache.set_many(missing, timeout=None)
+
+
+def record_view(news_id, viewer):
+    """
+    Засчитывает просмотр (не чаще раза за NEWS_VIEWS_DEDUPE_WINDOW для одного зрителя)
+    и возвращает приблизительное текущее число просмотров. Запись в базу — отложенная.
+    """
+    views = current_views(news_id)
+    if views is None:
+        return None
+
+    window = getattr(settings, 'NEWS_VIEWS_DEDUPE_WINDOW', 30 * 60)
+    if not cache.add(SEEN_KEY.format(news_id, viewer), 1, timeout=window):
+        return views
+
+    try:
+        views = cache.incr(VIEWS_KEY.format(news_id))
+    except ValueError:
+        # Ключ успел вытесниться между чтением и инкрементом
+        views += 1
+        cache.set(VIEWS_KEY.format(news_id), views, timeout=None)
+    view_buffer.add(news_id, 1)
+    return views
+
+
+async def arecord_view(news_id, viewer):
+    """record_view для async-view."""
+    views = await acurrent_views(news_id)
+    if views is None:
+        return None
+
+    window = getattr(settings, 'NEWS_VIEWS_DEDUPE_WINDOW', 30 * 60)
+    if not await cache.aadd(SEEN_KEY.format(news_id, viewer), 1, timeout=window):
+        return views
+
+    try:
+        views = await cache.aincr(VIEWS_KEY.format(news_id))
+    except ValueError:
+        views += 1
+        await cache.aset(VIEWS_KEY.format(news_id), views, timeout=None)
+    await view_buffer.aadd(news_id, 1)
+    return views
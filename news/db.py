@@ -0,0 +1,59 @@
+"""
+Настройка соединений SQLite: набор PRAGMA (профиль) применяется к каждому
+новому соединению через сигнал connection_created.
+"""
+from django.conf import settings
+
+SQLITE_PROFILES = {
+    # Поведение SQLite по умолчанию: журнал отката, synchronous=FULL
+    'default': {
+        'journal_mode': 'delete',
+    },
+    # WAL: читатели не блокируют писателя; synchronous=NORMAL в режиме WAL не теряет
+    # целостность, только последние транзакции при отключении питания
+    'production': {
+        'journal_mode': 'wal',
+        'synchronous': 'normal',
+        'busy_timeout': 20000,
+        'cache_size': -64 * 1024,  # отрицательное значение — в КиБ, то есть 64 МиБ на соединение
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'memory',
+    },
+}
+
+# Профиль, принудительно выбранный на время замеров (bench_concurrency)
+_profile_override = None
+
+
+def sqlite_pragmas():
+    name = _profile_override or getattr(settings, 'NEWS_SQLITE_PROFILE', 'production')
+    pragmas = dict(SQLITE_PROFILES[name])
+    if not _profile_override:
+        pragmas.update(getattr(settings, 'NEWS_SQLITE_PRAGMAS', {}))
+    return pragmas
+
+
+def use_profile(name):
+    """Выбирает профиль для новых соединений (None — вернуть профиль из настроек)."""
+    global _profile_override
+    if name is not None and name not in SQLITE_PROFILES:
+        raise ValueError(f"Неизвестный профиль SQLite: {name}")
+    _profile_override = name
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+def current_pragmas(connection, names=('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size')):
+    with connection.cursor() as cursor:
+        values = {}
+        for name in names:
+            cursor.execute(f"PRAGMA {name}")
+            row = cursor.fetchone()
+            values[name] = row[0] if row else None
+    return values
@@ -0,0 +1,198 @@
+"""
+Потоковая выгрузка новостей, комментариев и присутствия пользователей в NDJSON и CSV.
+
+Строки читаются через values_list() и iterator(chunk_size) — без создания моделей и без
+кэша результатов QuerySet, поэтому память не растёт с размером таблицы. Данные,
+которые живут вне строки таблицы (несброшенные просмотры, свежий heartbeat),
+подставляются пачкой на каждые chunk_size строк.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .counters import view_buffer
+from .models import Comment, NewsItem, UserProfile
+from .presence import PRESENCE_KEY
+
+# Ячейки, которые табличные редакторы считают формулой (CSV/formula injection)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+class ExportError(ValueError):
+    """Некорректные параметры выгрузки."""
+
+
+def _media_url(model, field, name):
+    return model._meta.get_field(field).storage.url(name) if name else ''
+
+
+def _news_rows(rows):
+    for row in rows:
+        row['views'] += view_buffer.pending(row['id'], 0)
+    return rows
+
+
+def _comment_rows(rows):
+    for row in rows:
+        for field in ('image', 'image_thumb', 'audio_file', 'audio_compact'):
+            row[f'{field}_url'] = _media_url(Comment, field, row.pop(field))
+    return rows
+
+
+def _profile_rows(rows):
+    from django.core.cache import cache
+
+    keys = {PRESENCE_KEY.format(row['user_id']): row for row in rows}
+    seen = cache.get_many(keys)
+    for key, row in keys.items():
+        heartbeat = seen.get(key)
+        row['online'] = heartbeat is not None
+        if heartbeat is not None and heartbeat > row['last_activity']:
+            row['last_activity'] = heartbeat
+    return rows
+
+
+class Export:
+    """Описание выгрузки: поля (имя в выгрузке → путь в values_list), колонки CSV, поле даты для фильтра."""
+
+    def __init__(self, model, fields, columns, date_field, enrich):
+        self.model = model
+        self.fields = fields
+        self.columns = columns
+        self.date_field = date_field
+        self.enrich = enrich
+
+
+EXPORTS = {
+    'news': Export(
+        NewsItem,
+        {
+            'id': 'id', 'title': 'title', 'reporter': 'reporter__user__username', 'created_at': 'created_at',
+            'views': 'views', 'comment_count': 'comment_count', 'last_comment_at': 'last_comment_at',
+        },
+        ('id', 'title', 'reporter', 'created_at', 'views', 'comment_count', 'last_comment_at'),
+        'created_at',
+        _news_rows,
+    ),
+    'comments': Export(
+        Comment,
+        {
+            'id': 'id', 'news_item': 'news_item_id', 'user': 'user__username', 'created_at': 'created_at',
+            'text': 'text', 'is_voice_message': 'is_voice_message', 'audio_duration': 'audio_duration',
+            'image': 'image', 'image_thumb': 'image_thumb', 'audio_file': 'audio_file',
+            'audio_compact': 'audio_compact',
+        },
+        (
+            'id', 'news_item', 'user', 'created_at', 'text', 'is_voice_message', 'audio_duration',
+            'image_url', 'image_thumb_url', 'audio_file_url', 'audio_compact_url',
+        ),
+        'created_at',
+        _comment_rows,
+    ),
+    'profiles': Export(
+        UserProfile,
+        {
+            'user_id': 'user_id', 'username': 'user__username', 'status': 'status',
+            'custom_status': 'custom_status', 'is_reporter': 'is_reporter', 'last_activity': 'last_activity',
+        },
+        ('user_id', 'username', 'status', 'custom_status', 'is_reporter', 'last_activity', 'online'),
+        'last_activity',
+        _profile_rows,
+    ),
+}
+
+
+def parse_bound(value, upper=False):
+    """
+    Граница диапазона дат: дата или дата со временем в ISO 8601. Дата в верхней
+    границе включается целиком.
+    """
+    if not value:
+        return None
+    try:
+        # Сначала дата: parse_datetime приняла бы её как полночь
+        day = parse_date(value)
+        parsed = parse_datetime(value) if day is None else None
+    except ValueError:
+        day = parsed = None
+    if day is not None:
+        parsed = datetime.combine(day + timedelta(days=1) if upper else day, time.min)
+    elif parsed is None:
+        raise ExportError(f"Некорректная дата: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def export_rows(name, since=None, until=None, chunk_size=2000, queryset=None):
+    """Словари строк выгрузки name в порядке id, с датой в [since, until)."""
+    try:
+        export = EXPORTS[name]
+    except KeyError:
+        raise ExportError(f"Неизвестная выгрузка: {name}")
+    queryset = export.model.objects.all() if queryset is None else queryset
+    if since is not None:
+        queryset = queryset.filter(**{f'{export.date_field}__gte': since})
+    if until is not None:
+        queryset = queryset.filter(**{f'{export.date_field}__lt': until})
+    rows = queryset.order_by('pk').values_list(*export.fields.values())
+    return _chunked(export, rows, chunk_size)
+
+
+def _chunked(export, rows, chunk_size):
+    aliases = tuple(export.fields)
+    chunk = []
+    for values in rows.iterator(chunk_size=chunk_size):
+        chunk.append(dict(zip(aliases, values)))
+        if len(chunk) >= chunk_size:
+            yield from export.enrich(chunk)
+            chunk = []
+    if chunk:
+        yield from export.enrich(chunk)
+
+
+class _Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def render(name, rows, fmt):
+    """Строки выгрузки в формате fmt ('ndjson' или 'csv') — генератор str."""
+    if fmt not in FORMATS:
+        raise ExportError(f"Неизвестный формат: {fmt}")
+    if fmt == 'ndjson':
+        return (json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in rows)
+    return _render_csv(EXPORTS[name].columns, rows)
+
+
+def _render_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[column]) for column in columns])
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    # Текст пользователей (заголовки, имена, комментарии) не должен стать формулой при открытии выгрузки
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def filename(name, fmt):
+    return f"{name}-{timezone.localdate():%Y%m%d}.{fmt}"
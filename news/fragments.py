@@ -0,0 +1,54 @@
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'fragver:{}:{}'
+
+
+def _new_token():
+    return format(time.time_ns(), 'x')
+
+
+def get_versions(kind, ids):
+    """
+    Версии фрагментов по id одним обращением к кэшу. Отсутствующие версии создаются
+    заново, а не считаются нулевыми: после вытеснения из кэша старый HTML не оживёт.
+    """
+    keys = {VERSION_KEY.format(kind, pk): pk for pk in set(ids)}
+    found = cache.get_many(keys)
+    missing = {key: _new_token() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return {pk: found[key] for key, pk in keys.items()}
+
+
+def bump(kind, *ids):
+    """Инвалидирует закэшированные фрагменты объектов, выдав им новые версии."""
+    if ids:
+        cache.set_many({VERSION_KEY.format(kind, pk): _new_token() for pk in ids}, timeout=None)
+
+
+def attach_versions(objects):
+    """
+    Проставляет объектам fragment_version — часть ключа кэша их HTML.
+    Новость: версия самой новости. Комментарий: версия комментария и аватара автора.
+    """
+    from .models import Comment, NewsItem
+
+    objects = list(objects)
+    news_items = [obj for obj in objects if isinstance(obj, NewsItem)]
+    comments = [obj for obj in objects if isinstance(obj, Comment)]
+
+    if news_items:
+        versions = get_versions('newsitem', [item.pk for item in news_items])
+        for item in news_items:
+            item.fragment_version = versions[item.pk]
+
+    if comments:
+        comment_versions = get_versions('comment', [comment.pk for comment in comments])
+        avatar_versions = get_versions('avatar', [comment.user_id for comment in comments])
+        for comment in comments:
+            comment.fragment_version = f"{comment_versions[comment.pk]}.{avatar_versions[comment.user_id]}"
+
+    return objects
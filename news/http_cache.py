@@ -0,0 +1,131 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+CONTENT_KEY = 'content:last_modified'
+VIEWS_FLUSHED_KEY = 'views:flushed_at'
+PAGE_KEY = 'page:anon:{}:{}'
+
+
+def touch_content():
+    """Отмечает изменение контента: меняет валидаторы и ключи закэшированных страниц."""
+    cache.set(CONTENT_KEY, timezone.now(), timeout=None)
+
+
+def touch_views():
+    cache.set(VIEWS_FLUSHED_KEY, timezone.now(), timeout=None)
+
+
+def content_last_modified():
+    """
+    Время последнего изменения контента. Если отметки в кэше нет (холодный старт),
+    считаем, что всё изменилось сейчас: лишний 200 безопаснее устаревшего 304.
+    """
+    stamp = cache.get(CONTENT_KEY)
+    if stamp is None:
+        cache.add(CONTENT_KEY, timezone.now(), timeout=None)
+        stamp = cache.get(CONTENT_KEY)
+    return stamp
+
+
+def viewer_variant(request):
+    """
+    Часть валидатора, зависящая от посетителя. Все анонимы видят одну и ту же страницу;
+    у вошедшего пользователя в шапке имя, аватар и статус.
+    """
+    if not request.user.is_authenticated:
+        return 'anon'
+    from .fragments import get_versions
+    from .presence import status_payload
+
+    avatar_version = get_versions('avatar', [request.user.pk])[request.user.pk]
+    return f"user:{request.user.pk}:{avatar_version}:{status_payload(request.user)}"
+
+
+def _etag(*parts):
+    return hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def landing_last_modified(request, *args, **kwargs):
+    if request.user.is_authenticated:
+        return None
+    return max(filter(None, [content_last_modified(), cache.get(VIEWS_FLUSHED_KEY)]))
+
+
+def landing_etag(request, *args, **kwargs):
+    # Нужен и condition(), и cache_anonymous_page — считаем один раз на запрос
+    etag = getattr(request, '_landing_etag', None)
+    if etag is None:
+        etag = request._landing_etag = _etag(
+            content_last_modified().isoformat(),
+            cache.get(VIEWS_FLUSHED_KEY),
+            viewer_variant(request),
+            request.get_full_path(),
+        )
+    return etag
+
+
+def news_comments_etag(request, news_id, *args, **kwargs):
+    """Версия карточки новости меняется при любом изменении новости и её комментариев."""
+    from .fragments import get_versions
+
+    return _etag(get_versions('newsitem', [news_id])[news_id], viewer_variant(request), request.get_full_path())
+
+
+def has_pending_messages(request):
+    return bool(len(get_messages(request)))
+
+
+def cache_anonymous_page(view_func):
+    """
+    Кэширует страницу целиком для анонимных GET-запросов. Ключ включает ETag,
+    поэтому при изменении контента записи просто перестают находиться.
+    Вошедшим пользователям страница отдаётся как private.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        cacheable = (
+            request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated
+            and not has_pending_messages(request)
+        )
+        if not cacheable:
+            response = view_func(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        etag = landing_etag(request, *args, **kwargs)
+        key = PAGE_KEY.format(hashlib.md5(request.get_full_path().encode()).hexdigest(), etag)
+        response = cache.get(key)
+        if response is None:
+            response = view_func(request, *args, **kwargs)
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+                and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+            ):
+                cache.set(key, response, timeout=getattr(settings, 'NEWS_PAGE_CACHE_TIMEOUT', 300))
+
+        # Браузер всегда перепроверяет страницу по ETag, обратный прокси может отдавать её сам
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=0,
+            must_revalidate=True,
+            s_maxage=getattr(settings, 'NEWS_PROXY_CACHE_TIMEOUT', 60),
+        )
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    return wrapper
+
+
+landing_conditional = condition(etag_func=landing_etag, last_modified_func=landing_last_modified)
+news_comments_conditional = condition(etag_func=news_comments_etag)
@@ -0,0 +1,231 @@
+"""
+Массовая загрузка комментариев: перенос архивов со старой платформы и миграции.
+
+Вход — JSON Lines, по объекту на строку:
+
+    {"news_item": 42, "user": 7, "text": "...", "created_at": "2019-05-01T12:00:00+03:00"}
+
+Вместо "user" (id) можно передать "username"; created_at необязателен (по
+умолчанию — время загрузки, без часового пояса — TIME_ZONE). Загружаются только
+текстовые комментарии.
+
+Строки читаются потоком и обрабатываются пачками по chunk_size. Пачка сначала
+проверяется: авторы и новости ищутся в словарях в памяти, в базу идёт один
+запрос на пачку — только за ещё не встречавшимися id. Затем одна транзакция на
+пачку: bulk_create по batch_size строк, пересчёт счётчиков затронутых новостей
+(comment_stats.recount) и их репортёров (reporter_stats.refresh), поисковый
+индекс. Сигналы post_save при bulk_create не срабатывают — то, что они делают
+для одиночного комментария, здесь делается пачкой.
+Ошибочные строки пропускаются и попадают в отчёт с номером строки.
+"""
+import json
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import fragments, reporter_stats, search
+from .comment_stats import recount
+from .http_cache import touch_content
+from .models import Comment, NewsItem, User
+
+
+class IngestError(ValueError):
+    """Запись нельзя загрузить; сообщение попадает в отчёт."""
+
+
+class IngestStats:
+    __slots__ = ('started', 'lines', 'created', 'skipped', 'chunks', 'last_line', 'errors', 'max_errors')
+
+    def __init__(self, max_errors=100):
+        self.started = time.perf_counter()
+        self.lines = 0
+        self.created = 0
+        self.skipped = 0
+        self.chunks = 0
+        # Последняя строка, вошедшая в закоммиченную пачку: с неё можно продолжить
+        self.last_line = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'error': message})
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        seconds = self.seconds
+        return self.created / seconds if seconds else 0.0
+
+    def as_dict(self):
+        return {
+            'lines': self.lines,
+            'created': self.created,
+            'skipped': self.skipped,
+            'chunks': self.chunks,
+            'last_line': self.last_line,
+            'seconds': round(self.seconds, 3),
+            'rate': round(self.rate, 1),
+            'errors': self.errors,
+        }
+
+
+def _integer(value, field):
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise IngestError(f"{field}: ожидается положительный целый id")
+    return value
+
+
+def parse_record(raw):
+    """Разбирает и проверяет одну строку входа. Возвращает словарь с полями комментария."""
+    try:
+        data = json.loads(raw)
+    except ValueError as exc:
+        raise IngestError(f"некорректный JSON: {exc}")
+    if not isinstance(data, dict):
+        raise IngestError("ожидается JSON-объект")
+
+    record = {'news_item': _integer(data.get('news_item'), 'news_item'), 'user': None, 'username': None}
+    if data.get('user') is not None:
+        record['user'] = _integer(data['user'], 'user')
+    elif isinstance(data.get('username'), str) and data['username']:
+        record['username'] = data['username']
+    else:
+        raise IngestError("нужен user (id) или username")
+
+    text = data.get('text')
+    if not isinstance(text, str) or not text.strip():
+        raise IngestError("text: пустой текст")
+    record['text'] = text
+
+    created_at = data.get('created_at')
+    if created_at is not None:
+        parsed = parse_datetime(created_at) if isinstance(created_at, str) else None
+        if parsed is None:
+            raise IngestError("created_at: ожидается дата и время в ISO 8601")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        created_at = parsed
+    record['created_at'] = created_at
+    return record
+
+
+class Resolver:
+    """
+    Словари авторов и новостей на всю загрузку. Ненайденные id тоже запоминаются,
+    чтобы не искать их повторно в следующих пачках.
+    """
+
+    def __init__(self):
+        self.users = {}
+        self.usernames = {}
+        self.news = {}
+
+    def prefetch(self, records):
+        users = User.objects.only('pk', 'username')
+        user_ids = {record['user'] for record in records if record['user']} - self.users.keys()
+        if user_ids:
+            found = users.in_bulk(user_ids)
+            self.users.update({pk: found.get(pk) for pk in user_ids})
+        usernames = {record['username'] for record in records if record['username']} - self.usernames.keys()
+        if usernames:
+            found = users.in_bulk(usernames, field_name='username')
+            self.usernames.update({name: found.get(name) for name in usernames})
+        news_ids = {record['news_item'] for record in records} - self.news.keys()
+        if news_ids:
+            found = NewsItem.objects.only('pk').in_bulk(news_ids)
+            self.news.update({pk: pk in found for pk in news_ids})
+
+    def user(self, record):
+        if record['user']:
+            return self.users.get(record['user'])
+        return self.usernames.get(record['username'])
+
+    def has_news(self, news_id):
+        return self.news.get(news_id, False)
+
+
+def _build(records, resolver, stats):
+    resolver.prefetch([record for _, record in records])
+    now = timezone.now()
+    comments = []
+    for line, record in records:
+        user = resolver.user(record)
+        if user is None:
+            stats.error(line, f"автор не найден: {record['user'] or record['username']}")
+            continue
+        if not resolver.has_news(record['news_item']):
+            stats.error(line, f"новость не найдена: {record['news_item']}")
+            continue
+        # Готовый объект автора нужен поисковому индексу (document_for) без лишних запросов
+        comments.append(Comment(
+            user=user, news_item_id=record['news_item'], text=record['text'],
+            created_at=record['created_at'] or now,
+        ))
+    return comments
+
+
+def _invalidate(news_ids):
+    fragments.bump('newsitem', *news_ids)
+    touch_content()
+
+
+def _save(comments, batch_size):
+    news_ids = {comment.news_item_id for comment in comments}
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments, batch_size=batch_size)
+        recount(news_ids, batch_size=batch_size)
+        reporter_stats.refresh(NewsItem.objects.filter(pk__in=news_ids).values_list('reporter_id', flat=True))
+        search.get_backend().index_many(comments)
+        transaction.on_commit(lambda: _invalidate(news_ids))
+
+
+def ingest_comments(lines, chunk_size=None, batch_size=None, dry_run=False, skip_lines=0,
+                    max_errors=None, progress=None):
+    """
+    Загружает комментарии из итерируемого источника строк (str или bytes).
+    skip_lines пропускает уже загруженное начало (см. IngestStats.last_line),
+    dry_run только проверяет записи. progress(stats) вызывается после каждой пачки.
+    Возвращает IngestStats.
+    """
+    chunk_size = chunk_size or getattr(settings, 'NEWS_INGEST_CHUNK_SIZE', 5000)
+    batch_size = batch_size or getattr(settings, 'NEWS_INGEST_BATCH_SIZE', 500)
+    if max_errors is None:
+        max_errors = getattr(settings, 'NEWS_INGEST_MAX_ERRORS', 100)
+    stats = IngestStats(max_errors=max_errors)
+    resolver = Resolver()
+    records = []
+
+    def flush():
+        comments = _build(records, resolver, stats)
+        if comments and not dry_run:
+            _save(comments, batch_size)
+        stats.created += len(comments)
+        stats.chunks += 1
+        stats.last_line = stats.lines
+        records.clear()
+        if progress is not None:
+            progress(stats)
+
+    for number, raw in enumerate(lines, start=1):
+        if number <= skip_lines:
+            continue
+        stats.lines = number
+        if not raw.strip():
+            continue
+        try:
+            records.append((number, parse_record(raw)))
+        except IngestError as exc:
+            stats.error(number, str(exc))
+        if len(records) >= chunk_size:
+            flush()
+    if records or stats.lines > stats.last_line:
+        flush()
+    return stats
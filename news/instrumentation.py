@@ -0,0 +1,335 @@
+"""
+Замеры производительности запросов: общее время, число и время SQL-запросов,
+время рендеринга шаблонов, попадания и промахи кэша.
+
+Результаты отдаются заголовком Server-Timing и копятся в гистограммах по view,
+которые выводит /metrics в текстовом формате Prometheus. Гистограммы живут
+в памяти процесса: при нескольких процессах Prometheus опрашивает каждый.
+Зонд SQL ставится на каждое соединение (сигнал connection_created), шаблоны и кэш
+замеряются бэкендами InstrumentedDjangoTemplates и InstrumentedLocMemCache, которые
+включаются в TEMPLATES и CACHES. Без активного замера зонды сводятся к чтению одной
+контекстной переменной; доля замеряемых запросов задаётся NEWS_METRICS_SAMPLE_RATE.
+"""
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import Http404, HttpResponse
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar('news_request_stats', default=None)
+_installed = False
+
+
+class RequestStats:
+    __slots__ = ('started', 'db_count', 'db_time', 'template_time', 'template_depth', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Registry:
+    """Метрики процесса: гистограммы и счётчики с метками {view, ...}."""
+
+    HISTOGRAMS = {
+        'news_request_duration_seconds': "Время обработки запроса",
+        'news_db_duration_seconds': "Суммарное время SQL-запросов за запрос",
+        'news_template_duration_seconds': "Время рендеринга шаблонов за запрос",
+    }
+    COUNTERS = {
+        'news_requests_total': "Число замеренных запросов",
+        'news_db_queries_total': "Число SQL-запросов",
+        'news_cache_hits_total': "Попадания в кэш",
+        'news_cache_misses_total': "Промахи кэша",
+    }
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def record(self, view, status, stats, duration):
+        labels = (('view', view),)
+        self.observe('news_request_duration_seconds', labels, duration)
+        self.observe('news_db_duration_seconds', labels, stats.db_time)
+        self.observe('news_template_duration_seconds', labels, stats.template_time)
+        self.inc('news_requests_total', labels + (('status', f'{status // 100}xx'),))
+        self.inc('news_db_queries_total', labels, stats.db_count)
+        self.inc('news_cache_hits_total', labels, stats.cache_hits)
+        self.inc('news_cache_misses_total', labels, stats.cache_misses)
+
+    def render(self):
+        """Текстовый формат экспозиции Prometheus."""
+
+        def format_labels(labels, extra=()):
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+
+        lines = []
+        for name, help_text in self.HISTOGRAMS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (metric, labels), histogram in histograms:
+                if metric != name:
+                    continue
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'{name}_bucket{format_labels(labels, [("le", bound)])} {count}')
+                lines.append(f'{name}_bucket{format_labels(labels, [("le", "+Inf")])} {histogram.count}')
+                lines.append(f'{name}_sum{format_labels(labels)} {histogram.total:.6f}')
+                lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+        for name, help_text in self.COUNTERS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for (metric, labels), value in counters:
+                if metric == name:
+                    lines.append(f'{name}{format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry(getattr(settings, 'NEWS_METRICS_BUCKETS', DEFAULT_BUCKETS))
+
+
+# --- Зонды ---
+
+def query_probe(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - started
+        stats.db_count += 1
+
+
+def attach_query_probe(sender, connection, **kwargs):
+    # Соединения живут в своих потоках (в том числе под sync_to_async), поэтому зонд
+    # ставится на каждое соединение, а замер находит свой запрос через контекстную переменную
+    if query_probe not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_probe)
+
+
+class InstrumentedTemplate(Template):
+    """Шаблон, время рендеринга которого попадает в замер текущего запроса."""
+
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(context, request)
+        # Вложенные render (render_to_string внутри тегов) уже учтены внешним
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if stats.template_depth == 0:
+                stats.template_time += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Бэкенд шаблонов с замером времени рендеринга; включается в TEMPLATES['BACKEND']."""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+_MISS = object()
+
+
+class InstrumentedCacheMixin:
+    """
+    Считает попадания и промахи кэша в замер текущего запроса. Подмешивается
+    к классу бэкенда, указанному в CACHES (см. InstrumentedLocMemCache).
+    """
+
+    def get(self, key, default=None, version=None):
+        stats = _current.get()
+        if stats is None:
+            return super().get(key, default, version)
+        value = super().get(key, _MISS, version)
+        if value is _MISS:
+            stats.cache_misses += 1
+            return default
+        stats.cache_hits += 1
+        return value
+
+    def get_many(self, keys, version=None):
+        stats = _current.get()
+        if stats is None:
+            return super().get_many(keys, version)
+        keys = list(keys)
+        # Базовый get_many может сам вызывать get — считаем по итогу, а не по вызовам
+        hits, misses = stats.cache_hits, stats.cache_misses
+        result = super().get_many(keys, version)
+        stats.cache_hits = hits + len(result)
+        stats.cache_misses = misses + len(keys) - len(result)
+        return result
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+def install():
+    """Ставит зонд SQL на соединения один раз на процесс (из AppConfig.ready)."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    connection_created.connect(attach_query_probe, dispatch_uid='news_query_probe')
+    for connection in connections.all(initialized_only=True):
+        attach_query_probe(None, connection)
+
+
+# --- Middleware и /metrics ---
+
+def _sample_rate():
+    if not getattr(settings, 'NEWS_METRICS_ENABLED', True):
+        return 0.0
+    return getattr(settings, 'NEWS_METRICS_SAMPLE_RATE', 0.05)
+
+
+def server_timing(stats, duration):
+    parts = [
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.db_count} queries"',
+        f'tpl;dur={stats.template_time * 1000:.1f}',
+        f'cache;desc="hit {stats.cache_hits} miss {stats.cache_misses}"',
+        f'total;dur={duration * 1000:.1f}',
+    ]
+    return ', '.join(parts)
+
+
+def _show_server_timing(request):
+    if getattr(settings, 'NEWS_METRICS_SERVER_TIMING', settings.DEBUG):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and user.is_staff)
+
+
+def _finish(request, response, stats, token):
+    _current.reset(token)
+    duration = time.perf_counter() - stats.started
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match is not None else 'unresolved'
+    if view == 'news:metrics':
+        return response
+    registry.record(view, response.status_code, stats, duration)
+    if _show_server_timing(request):
+        response['Server-Timing'] = server_timing(stats, duration)
+    return response
+
+
+class InstrumentationMiddleware:
+    """
+    Замеряет выборку запросов (NEWS_METRICS_SAMPLE_RATE). Для потоковых ответов
+    (SSE, файлы) учитывается время до первого байта, а не вся передача.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        rate = _sample_rate()
+        if not rate or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            _current.reset(token)
+            raise
+        return _finish(request, response, stats, token)
+
+    async def __acall__(self, request):
+        rate = _sample_rate()
+        if not rate or (rate < 1 and random.random() >= rate):
+            return await self.get_response(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            _current.reset(token)
+            raise
+        return _finish(request, response, stats, token)
+
+
+def metrics_view(request):
+    """Метрики процесса для Prometheus: только с разрешённых адресов или для персонала."""
+    allowed = getattr(settings, 'NEWS_METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+    user = getattr(request, 'user', None)
+    is_staff = bool(user is not None and user.is_authenticated and user.is_staff)
+    if not is_staff and request.META.get('REMOTE_ADDR') not in allowed:
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from news.benchmarks.concurrency import SETUPS, prepare_data, run_comment_posting
+from news.benchmarks.database import temporary_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает пропускную способность параллельной записи комментариев при разных "
+        "настройках SQLite. Замер идёт на временной копии схемы, рабочая база не меняется."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Число параллельных писателей.")
+        parser.add_argument('--per-thread', type=int, default=50, help="Комментариев на одного писателя.")
+        parser.add_argument(
+            '--setups', default=','.join(SETUPS),
+            help=f"Варианты настройки через запятую ({', '.join(SETUPS)}).",
+        )
+        parser.add_argument('--json', dest='json_path', help="Сохранить результаты в JSON-файл.")
+
+    def handle(self, *args, **options):
+        setups = [name.strip() for name in options['setups'].split(',') if name.strip()]
+        unknown = [name for name in setups if name not in SETUPS]
+        if unknown:
+            raise CommandError(f"Неизвестные варианты: {', '.join(unknown)}")
+
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError("Замер рассчитан на SQLite.")
+
+        with temporary_database():
+            user_ids, news_ids = prepare_data()
+            results = []
+            for name in setups:
+                self.stdout.write(f"Вариант {name}...")
+                result = run_comment_posting(
+                    name, threads=options['threads'], per_thread=options['per_thread'],
+                    user_ids=user_ids, news_ids=news_ids,
+                )
+                results.append(result)
+                self.stdout.write(
+                    f"  {result['committed']}/{result['attempted']} за {result['seconds']} с: "
+                    f"{result['throughput']} комм./с, медиана {result['median_ms']} мс, "
+                    f"p95 {result['p95_ms']} мс, ошибок {result['errors']}"
+                )
+                for sample in result['error_samples']:
+                    self.stdout.write(self.style.WARNING(f"    {sample}"))
+                self.stdout.write(f"  PRAGMA: {result['pragmas']}")
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fp:
+                json.dump(results, fp, ensure_ascii=False, indent=2)
@@ -0,0 +1,96 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from news.benchmarks.database import temporary_database
+from news.benchmarks.endpoints import SCENARIOS, run_asgi, run_wsgi
+from news.benchmarks.seed import seed_dataset
+from news.counters import view_buffer
+from news.presence import last_seen_buffer
+
+RUNNERS = {'wsgi': run_wsgi, 'asgi': run_asgi}
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный прогон публичных endpoint'ов внутри процесса (WSGI и/или ASGI) "
+        "на временной базе с заданным объёмом данных: p50/p95/p99, пропускная способность "
+        "и число SQL-запросов по сценариям."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=2000, help="Сколько новостей создать.")
+        parser.add_argument('--comments', type=int, default=20, help="Комментариев на новость.")
+        parser.add_argument('--users', type=int, default=500, help="Сколько пользователей создать.")
+        parser.add_argument('--image-share', type=float, default=0.05, help="Доля комментариев с картинкой.")
+        parser.add_argument('--voice-share', type=float, default=0.05, help="Доля голосовых комментариев.")
+        parser.add_argument('--requests', type=int, default=200, help="Запросов на каждый сценарий.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Число параллельных клиентов.")
+        parser.add_argument('--mode', choices=['wsgi', 'asgi', 'both'], default='wsgi')
+        parser.add_argument(
+            '--scenarios', default=','.join(SCENARIOS),
+            help=f"Сценарии через запятую ({', '.join(SCENARIOS)}).",
+        )
+        parser.add_argument('--json', dest='json_path', help="Сохранить результаты в JSON-файл.")
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = [name for name in scenarios if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f"Неизвестные сценарии: {', '.join(unknown)}")
+        modes = ['wsgi', 'asgi'] if options['mode'] == 'both' else [options['mode']]
+
+        setup_test_environment()
+        try:
+            with temporary_database() as workdir, override_settings(
+                MEDIA_ROOT=workdir,
+                # Фоновая обработка медиа пережила бы временную базу
+                NEWS_TASKS_MODE='off',
+                NEWS_METRICS_SAMPLE_RATE=1.0,
+                NEWS_METRICS_SERVER_TIMING=True,
+            ):
+                self.stdout.write("Генерация данных...")
+                sample = seed_dataset(
+                    news=options['news'], comments_per_news=options['comments'], users=options['users'],
+                    image_share=options['image_share'], voice_share=options['voice_share'],
+                )
+                runs = []
+                for mode in modes:
+                    self.stdout.write(f"Прогон {mode}...")
+                    report = RUNNERS[mode](
+                        sample, scenarios,
+                        requests_per_scenario=options['requests'], concurrency=options['concurrency'],
+                    )
+                    runs.append(report)
+                    self.print_report(report)
+                # Отложенные записи должны попасть во временную базу, а не пережить её
+                view_buffer.flush()
+                last_seen_buffer.flush()
+        finally:
+            teardown_test_environment()
+
+        if options['json_path']:
+            payload = {
+                'rows': {
+                    'news': options['news'], 'comments_per_news': options['comments'], 'users': options['users'],
+                    'image_share': options['image_share'], 'voice_share': options['voice_share'],
+                },
+                'requests_per_scenario': options['requests'],
+                'runs': runs,
+            }
+            with open(options['json_path'], 'w', encoding='utf-8') as fp:
+                json.dump(payload, fp, ensure_ascii=False, indent=2)
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"  {report['requests']} запросов за {report['seconds']} с, {report['throughput']} запр./с "
+            f"({report['concurrency']} клиентов)"
+        )
+        for row in report['scenarios']:
+            style = self.style.ERROR if row['errors'] else (lambda text: text)
+            self.stdout.write(style(
+                f"  {row['scenario']:<16} p50 {row['p50_ms']} мс, p95 {row['p95_ms']} мс, p99 {row['p99_ms']} мс, "
+                f"SQL {row['avg_queries']} (макс {row['max_queries']}), "
+                f"ошибок {row['errors']} {row['error_statuses'] or ''}"
+            ))
@@ -0,0 +1,85 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from news.benchmarks.database import temporary_database
+from news.benchmarks.polling import run_asgi, run_wsgi, within_slo
+from news.benchmarks.seed import seed_dataset
+from news.counters import view_buffer
+from news.presence import last_seen_buffer
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает, сколько одновременно опрашивающих клиентов (get_user_status и "
+        "update_activity) выдерживает приложение под WSGI с фиксированным числом "
+        "потоков и под ASGI, на временной базе."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clients', default='50,100,200,400',
+            help="Числа одновременных клиентов через запятую, по возрастанию.",
+        )
+        parser.add_argument('--interval', type=float, default=1.0, help="Период опроса одного клиента, с.")
+        parser.add_argument('--duration', type=float, default=10.0, help="Длительность каждого прогона, с.")
+        parser.add_argument('--workers', type=int, default=8, help="Потоков WSGI-сервера.")
+        parser.add_argument(
+            '--heartbeat-every', type=int, default=6,
+            help="Каждый какой опрос клиента — update_activity (0 — только get_user_status).",
+        )
+        parser.add_argument('--slo', type=float, default=200.0, help="Допустимый p95 задержки, мс.")
+        parser.add_argument('--mode', choices=['wsgi', 'asgi', 'both'], default='both')
+        parser.add_argument('--json', dest='json_path', help="Сохранить результаты в JSON-файл.")
+
+    def handle(self, *args, **options):
+        levels = sorted(int(value) for value in options['clients'].split(',') if value.strip())
+        modes = ['wsgi', 'asgi'] if options['mode'] == 'both' else [options['mode']]
+        common = {
+            'interval': options['interval'],
+            'duration': options['duration'],
+            'heartbeat_every': options['heartbeat_every'],
+        }
+
+        setup_test_environment()
+        runs, capacity = [], {}
+        try:
+            with temporary_database() as workdir, override_settings(MEDIA_ROOT=workdir, NEWS_TASKS_MODE='off'):
+                sample = seed_dataset(news=10, comments_per_news=0, users=max(levels), reporters=1)
+                for mode in modes:
+                    self.stdout.write(f"Прогон {mode}...")
+                    capacity[mode] = 0
+                    for clients in levels:
+                        if mode == 'wsgi':
+                            report = run_wsgi(sample, clients, workers=options['workers'], **common)
+                        else:
+                            report = run_asgi(sample, clients, **common)
+                        report['within_slo'] = within_slo(report, options['slo'])
+                        runs.append(report)
+                        self.print_report(report)
+                        if not report['within_slo']:
+                            break
+                        capacity[mode] = clients
+                view_buffer.flush()
+                last_seen_buffer.flush()
+        finally:
+            teardown_test_environment()
+
+        for mode, clients in capacity.items():
+            self.stdout.write(self.style.SUCCESS(
+                f"{mode}: выдерживает {clients} клиентов при p95 ≤ {options['slo']:g} мс"
+            ) if clients else self.style.WARNING(f"{mode}: не выдерживает даже {levels[0]} клиентов"))
+
+        if options['json_path']:
+            payload = {'slo_ms': options['slo'], **common, 'capacity': capacity, 'runs': runs}
+            with open(options['json_path'], 'w', encoding='utf-8') as fp:
+                json.dump(payload, fp, ensure_ascii=False, indent=2)
+
+    def print_report(self, report):
+        style = (lambda text: text) if report['within_slo'] else self.style.ERROR
+        self.stdout.write(style(
+            f"  {report['clients']:>5} клиентов: {report['achieved_rps']} из {report['expected_rps']} запр./с, "
+            f"p50 {report['p50_ms']} мс, p95 {report['p95_ms']} мс, p99 {report['p99_ms']} мс, "
+            f"ошибок {report['errors']}"
+        ))
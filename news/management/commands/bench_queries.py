@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from news.benchmarks.database import temporary_database
+from news.benchmarks.queries import run_queries
+from news.benchmarks.seed import seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу тестовыми данными, записывает EXPLAIN QUERY PLAN и время "
+        "«горячих» запросов. Данные создаются во временной базе и удаляются вместе с ней."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=5000, help="Сколько новостей создать.")
+        parser.add_argument('--comments', type=int, default=20, help="Комментариев на новость.")
+        parser.add_argument('--users', type=int, default=1000, help="Сколько пользователей создать.")
+        parser.add_argument('--repeat', type=int, default=20, help="Сколько раз выполнить каждый запрос.")
+        parser.add_argument('--json', dest='json_path', help="Сохранить результаты в JSON-файл.")
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Завершиться с ошибкой, если запрос не использует ожидаемый индекс.",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            with temporary_database() as workdir, override_settings(MEDIA_ROOT=workdir, NEWS_TASKS_MODE='off'):
+                self.stdout.write("Генерация данных...")
+                sample = seed_dataset(
+                    news=options['news'], comments_per_news=options['comments'], users=options['users'],
+                )
+                results = run_queries(sample, repeat=options['repeat'])
+        finally:
+            teardown_test_environment()
+
+        for result in results:
+            style = self.style.SUCCESS if result['uses_index'] else self.style.ERROR
+            self.stdout.write(style(
+                f"{result['name']}: медиана {result['median_ms']} мс "
+                f"(мин {result['min_ms']}, макс {result['max_ms']}), индекс {result['expected_index']}: "
+                f"{'да' if result['uses_index'] else 'НЕТ'}"
+            ))
+            self.stdout.write(f"    {result['plan']}".replace('\n', '\n    '))
+
+        if options['json_path']:
+            payload = {
+                'rows': {'news': options['news'], 'comments_per_news': options['comments'], 'users': options['users']},
+                'repeat': options['repeat'],
+                'queries': results,
+            }
+            with open(options['json_path'], 'w', encoding='utf-8') as fp:
+                json.dump(payload, fp, ensure_ascii=False, indent=2)
+
+        missing = [result['name'] for result in results if not result['uses_index']]
+        if options['check'] and missing:
+            raise CommandError(f"Запросы без ожидаемого индекса: {', '.join(missing)}")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from news.seeding import bootstrap
+
+
+class Command(BaseCommand):
+    help = "Создаёт начальные данные сайта (страница «О нас», репортёры, новости). Повторный запуск безопасен."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help="Повторно применить все версии начальных данных, даже уже применённые.",
+        )
+
+    def handle(self, *args, **options):
+        applied = bootstrap(force=options['force'])
+        if applied:
+            versions = ', '.join(f"v{version}" for version in applied)
+            self.stdout.write(self.style.SUCCESS(f"Применены начальные данные: {versions}"))
+        else:
+            self.stdout.write("Начальные данные уже актуальны.")
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from news.export import EXPORTS, FORMATS, ExportError, export_rows, parse_bound, render
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковая выгрузка новостей (с просмотрами), комментариев (с медиафайлами) "
+        "или присутствия пользователей в NDJSON или CSV с фильтром по дате."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+        parser.add_argument('--since', help="Начало диапазона дат (ISO 8601), включительно.")
+        parser.add_argument('--until', help="Конец диапазона: дата включительно или момент времени.")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Строк за одно чтение из базы.")
+        parser.add_argument('--output', '-o', default='-', help="Файл; '-' — стандартный вывод.")
+
+    def handle(self, *args, **options):
+        try:
+            rows = export_rows(
+                options['name'],
+                since=parse_bound(options['since']),
+                until=parse_bound(options['until'], upper=True),
+                chunk_size=options['chunk_size'],
+            )
+        except ExportError as exc:
+            raise CommandError(str(exc))
+
+        content = render(options['name'], rows, options['format'])
+        if options['output'] == '-':
+            for line in content:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as fp:
+            fp.writelines(content)
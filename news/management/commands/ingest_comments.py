@@ -0,0 +1,62 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from news.ingest import ingest_comments
+
+
+class Command(BaseCommand):
+    help = (
+        "Массовая загрузка комментариев из файла JSON Lines (формат — в news/ingest.py): "
+        "потоковое чтение, проверка и bulk_create пачками в транзакциях."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Файл JSON Lines; '-' — стандартный ввод.")
+        parser.add_argument('--chunk-size', type=int, help="Строк в пачке (одна транзакция).")
+        parser.add_argument('--batch-size', type=int, help="Строк в одном INSERT.")
+        parser.add_argument('--skip-lines', type=int, default=0, help="Пропустить уже загруженные строки.")
+        parser.add_argument('--max-errors', type=int, help="Сколько ошибок перечислить в отчёте.")
+        parser.add_argument('--dry-run', action='store_true', help="Только проверить записи.")
+        parser.add_argument('--json', dest='json_path', help="Сохранить отчёт в JSON-файл.")
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            source = sys.stdin
+        else:
+            try:
+                source = open(options['path'], encoding='utf-8')
+            except OSError as exc:
+                raise CommandError(f"Не удалось открыть {options['path']}: {exc}")
+
+        with source:
+            stats = ingest_comments(
+                source,
+                chunk_size=options['chunk_size'],
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+                skip_lines=options['skip_lines'],
+                max_errors=options['max_errors'],
+                progress=self.print_progress,
+            )
+
+        for error in stats.errors:
+            self.stdout.write(self.style.WARNING(f"  строка {error['line']}: {error['error']}"))
+        if stats.skipped > len(stats.errors):
+            self.stdout.write(self.style.WARNING(f"  ... и ещё {stats.skipped - len(stats.errors)} ошибок"))
+        verb = "Проверено" if options['dry_run'] else "Загружено"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats.created} комментариев, пропущено {stats.skipped} строк "
+            f"за {stats.seconds:.1f} с ({stats.rate:.0f} комм./с)"
+        ))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fp:
+                json.dump(stats.as_dict(), fp, ensure_ascii=False, indent=2)
+
+    def print_progress(self, stats):
+        self.stdout.write(
+            f"  строка {stats.last_line}: загружено {stats.created}, пропущено {stats.skipped}, "
+            f"{stats.rate:.0f} комм./с"
+        )
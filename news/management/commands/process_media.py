@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from news.media import needs_processing, process_avatar, process_comment_media, process_news_image
+from news.models import Comment, NewsItem, UserProfile
+
+
+class Command(BaseCommand):
+    help = "Обрабатывает медиа, для которых ещё нет производных файлов (миниатюры, перекодированные голосовые)."
+
+    def handle(self, *args, **options):
+        jobs = [
+            (NewsItem.objects.exclude(image='').exclude(image__isnull=True), process_news_image),
+            (UserProfile.objects.exclude(avatar='').exclude(avatar__isnull=True), process_avatar),
+            (
+                Comment.objects.filter(
+                    (Q(image__isnull=False) & ~Q(image='')) | (Q(audio_file__isnull=False) & ~Q(audio_file=''))
+                ),
+                process_comment_media,
+            ),
+        ]
+        processed = 0
+        for queryset, process in jobs:
+            for obj in queryset.iterator(chunk_size=500):
+                if needs_processing(obj):
+                    process(obj.pk)
+                    processed += 1
+        self.stdout.write(self.style.SUCCESS(f"Обработано объектов: {processed}"))
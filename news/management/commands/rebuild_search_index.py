@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from news.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Полностью перестраивает поисковый индекс новостей и комментариев."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Сколько объектов индексировать за раз.")
+
+    def handle(self, *args, **options):
+        total = rebuild_index(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Проиндексировано объектов: {total}"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from news.comment_stats import reconcile
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает comment_count, last_comment_at и latest_comment_ids у всех новостей."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Сколько новостей читать за раз.")
+
+    def handle(self, *args, **options):
+        fixed = reconcile(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Исправлено новостей: {fixed}"))
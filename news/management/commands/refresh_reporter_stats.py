@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from news.reporter_stats import refresh_all
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает ReporterStats (публикации, просмотры, комментарии, последняя публикация) у всех репортёров."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Сколько репортёров пересчитывать за запрос.")
+
+    def handle(self, *args, **options):
+        total = refresh_all(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано репортёров: {total}"))
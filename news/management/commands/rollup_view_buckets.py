@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from news.analytics import rebuild_trends, rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Сворачивает часовые корзины просмотров старше NEWS_ANALYTICS_HOURLY_RETENTION_DAYS "
+        "в суточные и удаляет устаревшие суточные. Запускать по расписанию, например раз в час."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild-trends', action='store_true',
+            help="Дополнительно пересчитать рейтинг «в тренде» по часовым корзинам.",
+        )
+
+    def handle(self, *args, **options):
+        folded, days, expired = rollup()
+        self.stdout.write(self.style.SUCCESS(
+            f"Свёрнуто часовых строк: {folded}, записано суточных: {days}, удалено устаревших: {expired}"
+        ))
+        if options['rebuild_trends']:
+            self.stdout.write(self.style.SUCCESS(f"Рейтинг пересчитан для {rebuild_trends()} новостей"))
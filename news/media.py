@@ -0,0 +1,244 @@
+import io
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .tasks import enqueue
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = {
+    'news': (1200, 1200),
+    'comment': (800, 800),
+    'avatar': (256, 256),
+}
+WEBP_QUALITY = 80
+AUDIO_BITRATE = '24k'
+WAVEFORM_SAMPLE_RATE = 8000
+WAVEFORM_BARS = 64
+
+
+def derivative_name(source_name, extension):
+    """Имя производного файла рядом с оригиналом: news/images/a.jpg -> news/images/thumbs/a.jpg.webp"""
+    directory, filename = os.path.split(source_name)
+    return os.path.join(directory, 'thumbs', f"{filename}.{extension}")
+
+
+def is_derived_from(derivative, source):
+    """Производный файл сделан из текущего оригинала (хранилище могло добавить суффикс к имени)."""
+    if not derivative or not source:
+        return False
+    expected = os.path.splitext(derivative_name(source.name, 'x'))[0]
+    return derivative.name.startswith(expected)
+
+
+def make_webp_thumbnail(field_file, size):
+    with field_file.open('rb') as fp:
+        image = Image.open(fp)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        output = io.BytesIO()
+        image.save(output, format='WEBP', quality=WEBP_QUALITY, method=4)
+    return ContentFile(output.getvalue())
+
+
+def ffmpeg_binary():
+    return getattr(settings, 'NEWS_FFMPEG_BINARY', None) or shutil.which('ffmpeg')
+
+
+def ffprobe_binary():
+    return getattr(settings, 'NEWS_FFPROBE_BINARY', None) or shutil.which('ffprobe')
+
+
+@contextmanager
+def local_copy(field_file, suffix=''):
+    """Путь к файлу на диске: ffmpeg не умеет читать из произвольного хранилища Django."""
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        with field_file.open('rb') as fp:
+            for chunk in fp.chunks():
+                tmp.write(chunk)
+        tmp.flush()
+        yield tmp.name
+
+
+def probe_duration(path):
+    ffprobe = ffprobe_binary()
+    if not ffprobe:
+        return None
+    result = subprocess.run(
+        [ffprobe, '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=nw=1:nk=1', path],
+        capture_output=True, text=True, timeout=60,
+    )
+    try:
+        return max(round(float(result.stdout.strip())), 0)
+    except ValueError:
+        return None
+
+
+def transcode_voice(field_file):
+    """
+    Перекодирует голосовое сообщение в Opus (моно, AUDIO_BITRATE) и считает длительность.
+    Возвращает (ContentFile или None, длительность в секундах или None).
+    Без ffmpeg возвращает (None, None).
+    """
+    ffmpeg = ffmpeg_binary()
+    if not ffmpeg:
+        return None, None
+
+    with local_copy(field_file) as source_path, tempfile.TemporaryDirectory() as workdir:
+        output_path = os.path.join(workdir, 'voice.ogg')
+        subprocess.run(
+            [ffmpeg, '-v', 'error', '-y', '-i', source_path, '-vn', '-ac', '1',
+             '-c:a', 'libopus', '-b:a', AUDIO_BITRATE, '-application', 'voip', output_path],
+            check=True, capture_output=True, timeout=300,
+        )
+        # В webm из MediaRecorder длительность часто не записана, у ogg она есть всегда
+        duration = probe_duration(output_path)
+        with open(output_path, 'rb') as fp:
+            return ContentFile(fp.read()), duration
+
+
+def decode_pcm(field_file):
+    """Декодирует аудио в моно PCM s16le c частотой WAVEFORM_SAMPLE_RATE. Без ffmpeg — None."""
+    ffmpeg = ffmpeg_binary()
+    if not ffmpeg:
+        return None
+    with local_copy(field_file) as source_path:
+        result = subprocess.run(
+            [ffmpeg, '-v', 'error', '-i', source_path, '-vn', '-ac', '1',
+             '-ar', str(WAVEFORM_SAMPLE_RATE), '-f', 's16le', '-'],
+            check=True, capture_output=True, timeout=300,
+        )
+    return result.stdout
+
+
+def numpy_available():
+    try:
+        import numpy  # noqa
+    except ImportError:
+        return False
+    return True
+
+
+def compute_peaks(pcm, bars=WAVEFORM_BARS):
+    """
+    Пики громкости для отрисовки волны: максимум модуля сигнала в каждом из bars
+    равных отрезков, нормированный в 0..100. Требует NumPy; без него — None.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+
+    samples = np.frombuffer(pcm, dtype='<i2')
+    if samples.size == 0:
+        return [0] * bars
+    amplitude = np.abs(samples.astype(np.int32))
+    # Дополняем нулями до кратного bars, чтобы разрезать массив одним reshape
+    padded = np.pad(amplitude, (0, -amplitude.size % bars))
+    peaks = padded.reshape(bars, -1).max(axis=1)
+    loudest = peaks.max()
+    if loudest == 0:
+        return [0] * bars
+    return np.rint(peaks * 100.0 / loudest).astype(int).tolist()
+
+
+def process_news_image(news_id):
+    from .models import NewsItem
+
+    item = NewsItem.objects.filter(pk=news_id).first()
+    if item is None or not item.image or is_derived_from(item.image_thumb, item.image):
+        return
+    thumbnail = make_webp_thumbnail(item.image, THUMBNAIL_SIZES['news'])
+    item.image_thumb.save(derivative_name(item.image.name, 'webp'), thumbnail, save=False)
+    item.save(update_fields=['image_thumb'])
+
+
+def process_avatar(profile_id):
+    from .models import UserProfile
+
+    profile = UserProfile.objects.filter(pk=profile_id).first()
+    if profile is None or not profile.avatar or is_derived_from(profile.avatar_thumb, profile.avatar):
+        return
+    thumbnail = make_webp_thumbnail(profile.avatar, THUMBNAIL_SIZES['avatar'])
+    profile.avatar_thumb.save(derivative_name(profile.avatar.name, 'webp'), thumbnail, save=False)
+    profile.save(update_fields=['avatar_thumb'])
+
+
+def process_comment_media(comment_id):
+    from .models import Comment
+
+    comment = Comment.objects.filter(pk=comment_id).first()
+    if comment is None:
+        return
+    update_fields = []
+
+    if comment.image and not is_derived_from(comment.image_thumb, comment.image):
+        thumbnail = make_webp_thumbnail(comment.image, THUMBNAIL_SIZES['comment'])
+        comment.image_thumb.save(derivative_name(comment.image.name, 'webp'), thumbnail, save=False)
+        update_fields.append('image_thumb')
+
+    if comment.audio_file and not is_derived_from(comment.audio_compact, comment.audio_file):
+        compact, duration = transcode_voice(comment.audio_file)
+        if compact is not None:
+            comment.audio_compact.save(derivative_name(comment.audio_file.name, 'ogg'), compact, save=False)
+            update_fields.append('audio_compact')
+        if duration is not None:
+            comment.audio_duration = duration
+            update_fields.append('audio_duration')
+
+    if comment.is_voice_message and comment.audio_file and comment.waveform is None:
+        pcm = decode_pcm(comment.audio_file)
+        peaks = compute_peaks(pcm) if pcm is not None else None
+        if peaks is not None:
+            comment.waveform = peaks
+            update_fields.append('waveform')
+
+    if update_fields:
+        comment.save(update_fields=update_fields)
+
+
+def needs_processing(instance):
+    from .models import Comment, NewsItem, UserProfile
+
+    if isinstance(instance, NewsItem):
+        return bool(instance.image) and not is_derived_from(instance.image_thumb, instance.image)
+    if isinstance(instance, UserProfile):
+        return bool(instance.avatar) and not is_derived_from(instance.avatar_thumb, instance.avatar)
+    if isinstance(instance, Comment):
+        if instance.image and not is_derived_from(instance.image_thumb, instance.image):
+            return True
+        if not instance.audio_file:
+            return False
+        if ffmpeg_binary() is None:
+            # Без ffmpeg длительность голосового так и останется неизвестной
+            logger.warning("ffmpeg не найден: аудио комментария %s не будет обработано", instance.pk)
+            return False
+        return (
+            not is_derived_from(instance.audio_compact, instance.audio_file)
+            or (instance.is_voice_message and instance.waveform is None and numpy_available())
+        )
+    return False
+
+
+def schedule_processing(instance):
+    """Ставит в очередь обработку медиа объекта, если производные файлы ещё не готовы."""
+    from .models import Comment, NewsItem, UserProfile
+
+    if not needs_processing(instance):
+        return
+    if isinstance(instance, NewsItem):
+        enqueue(process_news_image, instance.pk)
+    elif isinstance(instance, UserProfile):
+        enqueue(process_avatar, instance.pk)
+    elif isinstance(instance, Comment):
+        enqueue(process_comment_media, instance.pk)
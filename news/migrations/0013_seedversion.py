@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0012_userprofile_custom_status_userprofile_is_reporter_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeedVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(unique=True, verbose_name='Версия')),
+                ('applied_at', models.DateTimeField(auto_now_add=True, verbose_name='Применено')),
+            ],
+            options={
+                'verbose_name': 'Версия начальных данных',
+                'verbose_name_plural': 'Версии начальных данных',
+                'ordering': ['version'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    # Таблица создаётся пустой: уже существующие записи индексирует news.search.rebuild_index
+    # после migrate (news.apps), живым кодом стеммера, а не его копией в миграции
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS news_search_index "
+        "USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS news_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0014_userprofile_last_activity_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0015_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='audio_compact',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='image_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='newsitem',
+            name='image_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='', verbose_name='Миниатюра изображения'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='', verbose_name='Миниатюра аватара'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0016_media_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='waveform',
+            field=models.JSONField(blank=True, editable=False, help_text='Пики громкости голосового сообщения (0..100) для отрисовки волны без загрузки аудио', null=True),
+        ),
+    ]
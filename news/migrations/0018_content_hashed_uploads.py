@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:22
+
+import news.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0017_comment_waveform'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aboutpage',
+            name='team_photo',
+            field=models.ImageField(blank=True, storage=news.storage.hashed_storage, upload_to='about/', verbose_name='Фото команды'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='audio_file',
+            field=models.FileField(blank=True, null=True, storage=news.storage.hashed_storage, upload_to='voice_messages/'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=news.storage.hashed_storage, upload_to='comment_images/'),
+        ),
+        migrations.AlterField(
+            model_name='newsitem',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=news.storage.hashed_storage, upload_to='news/images/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='reporter',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, storage=news.storage.hashed_storage, upload_to='reporters/profile_pics/', verbose_name='Фото профиля'),
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, storage=news.storage.hashed_storage, upload_to='users/avatars/', verbose_name='Аватар'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('news', '0019_comment_thread_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newsitem',
+            index=models.Index(fields=['-created_at', '-id'], name='newsitem_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reporter',
+            index=models.Index(fields=['-hire_date'], name='reporter_hire_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['email'], name='user_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['status', '-last_activity'], name='profile_status_activity_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:29
+
+from django.db import migrations, models
+
+LATEST_COMMENTS = 3
+
+
+def fill_comment_stats(apps, schema_editor):
+    NewsItem = apps.get_model('news', 'NewsItem')
+    Comment = apps.get_model('news', 'Comment')
+    for item in NewsItem.objects.all().iterator():
+        latest = list(
+            Comment.objects.filter(news_item_id=item.pk)
+            .order_by('-created_at', '-id')
+            .values_list('pk', 'created_at')[:LATEST_COMMENTS]
+        )
+        NewsItem.objects.filter(pk=item.pk).update(
+            comment_count=Comment.objects.filter(news_item_id=item.pk).count(),
+            last_comment_at=latest[0][1] if latest else None,
+            latest_comment_ids=[pk for pk, _ in latest],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0020_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsitem',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.AddField(
+            model_name='newsitem',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последний комментарий'),
+        ),
+        migrations.AddField(
+            model_name='newsitem',
+            name='latest_comment_ids',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(fill_comment_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0022_comment_created_at_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsItemTrend',
+            fields=[
+                ('news_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='news.newsitem')),
+                ('score', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Рейтинг новости',
+                'verbose_name_plural': 'Рейтинг новостей',
+            },
+        ),
+        migrations.CreateModel(
+            name='NewsItemViewBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('hour', 'Час'), ('day', 'Сутки')], default='hour', max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('news_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_buckets', to='news.newsitem')),
+            ],
+            options={
+                'verbose_name': 'Просмотры за интервал',
+                'verbose_name_plural': 'Просмотры по интервалам',
+                'indexes': [models.Index(fields=['resolution', 'bucket'], name='view_bucket_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('news_item', 'resolution', 'bucket'), name='view_bucket_unique')],
+            },
+        ),
+    ]
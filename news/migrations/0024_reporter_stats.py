@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def fill_reporter_stats(apps, schema_editor):
+    Reporter = apps.get_model('news', 'Reporter')
+    NewsItem = apps.get_model('news', 'NewsItem')
+    ReporterStats = apps.get_model('news', 'ReporterStats')
+    totals = {
+        row['reporter_id']: row
+        for row in NewsItem.objects.filter(reporter__isnull=False)
+        .values('reporter_id')
+        .annotate(posts=Count('pk'), views=Sum('views'), comments=Sum('comment_count'), last=Max('created_at'))
+    }
+    ReporterStats.objects.bulk_create(
+        [
+            ReporterStats(
+                reporter_id=pk,
+                post_count=totals.get(pk, {}).get('posts') or 0,
+                total_views=totals.get(pk, {}).get('views') or 0,
+                comments_received=totals.get(pk, {}).get('comments') or 0,
+                last_post_at=totals.get(pk, {}).get('last'),
+            )
+            for pk in Reporter.objects.values_list('pk', flat=True)
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0023_view_buckets_and_trends'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReporterStats',
+            fields=[
+                ('reporter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='news.reporter')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Публикаций')),
+                ('total_views', models.PositiveBigIntegerField(default=0, verbose_name='Просмотров')),
+                ('comments_received', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+                ('last_post_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя публикация')),
+            ],
+            options={
+                'verbose_name': 'Статистика репортёра',
+                'verbose_name_plural': 'Статистика репортёров',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='newsitem',
+            index=models.Index(fields=['reporter', '-created_at'], name='newsitem_reporter_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reporterstats',
+            index=models.Index(fields=['-total_views'], name='reporter_stats_views_idx'),
+        ),
+        migrations.RunPython(fill_reporter_stats, migrations.RunPython.noop),
+    ]
@@ -2,9 +2,15 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
+from .storage import hashed_storage
+
 class User(AbstractUser):
     class Meta:
         db_table = 'news_user'
+        indexes = [
+            # Проверка занятости email при регистрации
+            models.Index(fields=['email'], name='user_email_idx'),
+        ]
     
     groups = models.ManyToManyField(
         'auth.Group',
@@ -35,10 +41,18 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     avatar = models.ImageField(
         upload_to='users/avatars/',
+        storage=hashed_storage,
         verbose_name="Аватар",
         blank=True,
         null=True
     )
+    # Уменьшенная WebP-копия, её создаёт фоновая обработка (news.media)
+    avatar_thumb = models.ImageField(
+        verbose_name="Миниатюра аватара",
+        blank=True,
+        null=True,
+        editable=False
+    )
     bio = models.TextField(verbose_name="Биография", blank=True)
     status = models.CharField(
         max_length=20,
@@ -55,35 +69,57 @@ class UserProfile(models.Model):
         default=False,
         verbose_name="Репортёр"
     )
+    # Обновляется пачками из news.presence, а не при каждом сохранении профиля
     last_activity = models.DateTimeField(
-        auto_now=True,
+        default=timezone.now,
         verbose_name="Последняя активность"
     )
     
     class Meta:
         verbose_name = "Профиль пользователя"
         verbose_name_plural = "Профили пользователей"
+        indexes = [
+            # Списки «кто в сети»: фильтр по статусу, сортировка по активности
+            models.Index(fields=['status', '-last_activity'], name='profile_status_activity_idx'),
+        ]
     
     def __str__(self):
         return f"Профиль {self.user.username}"
     
+    @property
+    def display_avatar_url(self):
+        """URL для показа: миниатюра, пока она не готова — оригинал"""
+        if self.avatar_thumb:
+            return self.avatar_thumb.url
+        return self.avatar.url if self.avatar else ''
+
     def get_display_status(self):
         """Возвращает отображаемый статус с учетом невидимости"""
         if self.status == 'invisible':
             return 'offline'
         return self.status
     
+    def last_seen(self):
+        """Время последней активности: свежий heartbeat из кэша или сохранённое значение"""
+        from .presence import last_seen
+        return last_seen(self.user_id) or self.last_activity
+
     def is_online(self):
         """Проверяет, онлайн ли пользователь"""
+        from .presence import last_seen, presence_ttl
         if self.status in ['offline', 'invisible']:
             return False
-        return timezone.now() - self.last_activity < timezone.timedelta(minutes=5)
+        seen = last_seen(self.user_id)
+        if seen is not None:
+            return True
+        return timezone.now() - self.last_activity < timezone.timedelta(seconds=presence_ttl())
 
 class Reporter(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='reporter_profile')
     bio = models.TextField(verbose_name="Биография", blank=True)
     profile_picture = models.ImageField(
         upload_to='reporters/profile_pics/',
+        storage=hashed_storage,
         verbose_name="Фото профиля",
         blank=True,
         null=True
@@ -99,10 +135,46 @@ class Reporter(models.Model):
         verbose_name = "Репортер"
         verbose_name_plural = "Репортеры"
         ordering = ['-hire_date']
+        indexes = [
+            models.Index(fields=['-hire_date'], name='reporter_hire_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.get_full_name() or self.user.username}"
 
+class ReporterStats(models.Model):
+    """
+    Итоги по репортёру, которые иначе пришлось бы считать JOIN'ами по новостям
+    и комментариям. Обновляются инкрементально (news.reporter_stats), расхождения
+    исправляет команда refresh_reporter_stats.
+    """
+    reporter = models.OneToOneField(Reporter, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    post_count = models.PositiveIntegerField(default=0, verbose_name="Публикаций")
+    total_views = models.PositiveBigIntegerField(default=0, verbose_name="Просмотров")
+    comments_received = models.PositiveIntegerField(default=0, verbose_name="Комментариев")
+    last_post_at = models.DateTimeField(null=True, blank=True, verbose_name="Последняя публикация")
+
+    class Meta:
+        verbose_name = "Статистика репортёра"
+        verbose_name_plural = "Статистика репортёров"
+        indexes = [
+            # Рейтинги репортёров в API
+            models.Index(fields=['-total_views'], name='reporter_stats_views_idx'),
+        ]
+
+    def __str__(self):
+        return f"Статистика {self.reporter_id}"
+
+class NewsItemQuerySet(models.QuerySet):
+    def with_feed_data(self):
+        """
+        Загружает автора с профилем одним JOIN. Количество и последние комментарии
+        хранятся в самой новости (comment_count, latest_comment_ids);
+        сами комментарии подставляет news.comment_stats.attach_latest_comments.
+        """
+        return self.select_related('reporter__user__profile')
+
+
 class NewsItem(models.Model):
     views = models.PositiveIntegerField(default=0, verbose_name="Количество просмотров")
     reporter = models.ForeignKey(
@@ -118,39 +190,154 @@ class NewsItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
     image = models.ImageField(
         upload_to='news/images/',
+        storage=hashed_storage,
         verbose_name="Изображение",
         blank=True,
         null=True
     )
+    image_thumb = models.ImageField(
+        verbose_name="Миниатюра изображения",
+        blank=True,
+        null=True,
+        editable=False
+    )
+    # Денормализованные данные о комментариях (news.comment_stats)
+    comment_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Комментариев")
+    last_comment_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Последний комментарий")
+    latest_comment_ids = models.JSONField(default=list, blank=True, editable=False)
+
+    COMMENT_STATS_FIELDS = ('comment_count', 'last_comment_at', 'latest_comment_ids')
+    # Счётчики, которые меняются только отдельным UPDATE: просмотры (news.counters) и данные о комментариях
+    DENORMALIZED_FIELDS = ('views',) + COMMENT_STATS_FIELDS
+
+    objects = NewsItemQuerySet.as_manager()
     
     class Meta:
         verbose_name = "Новостной пост"
         verbose_name_plural = "Новостные посты"
         ordering = ['-created_at']
+        indexes = [
+            # Лента и keyset-пагинация по (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='newsitem_feed_idx'),
+            # Публикации репортёра на его странице и последняя публикация при пересчёте
+            models.Index(fields=['reporter', '-created_at'], name='newsitem_reporter_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Просмотры и данные о комментариях меняются отдельным UPDATE с F(); сохранение
+        # ранее загруженной новости (например, в админке) не должно их затирать
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DENORMALIZED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def display_image_url(self):
+        if self.image_thumb:
+            return self.image_thumb.url
+        return self.image.url if self.image else ''
+
+class NewsItemViewBucket(models.Model):
+    """
+    Просмотры новости за час или сутки (news.analytics). Строки пополняются
+    пачками при сбросе буфера просмотров; часовые старше срока хранения
+    сворачиваются в суточные командой rollup_view_buckets.
+    """
+    HOUR = 'hour'
+    DAY = 'day'
+    RESOLUTION_CHOICES = [
+        (HOUR, 'Час'),
+        (DAY, 'Сутки'),
+    ]
+
+    news_item = models.ForeignKey('NewsItem', on_delete=models.CASCADE, related_name='view_buckets')
+    resolution = models.CharField(max_length=4, choices=RESOLUTION_CHOICES, default=HOUR)
+    # Начало интервала в UTC
+    bucket = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Просмотры за интервал"
+        verbose_name_plural = "Просмотры по интервалам"
+        constraints = [
+            models.UniqueConstraint(fields=['news_item', 'resolution', 'bucket'], name='view_bucket_unique'),
+        ]
+        indexes = [
+            # Свёртка и выборки за период без привязки к новости
+            models.Index(fields=['resolution', 'bucket'], name='view_bucket_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.news_item_id} {self.resolution} {self.bucket:%Y-%m-%d %H:%M}: {self.count}"
+
+
+class NewsItemTrend(models.Model):
+    """
+    Затухающий счёт просмотров для рейтинга «в тренде»: score приведён к моменту
+    updated_at и пересчитывается при каждом сбросе просмотров (news.analytics).
+    """
+    news_item = models.OneToOneField('NewsItem', on_delete=models.CASCADE, primary_key=True, related_name='trend')
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Рейтинг новости"
+        verbose_name_plural = "Рейтинг новостей"
+
+    def __str__(self):
+        return f"{self.news_item_id}: {self.score:.1f}"
+
 class Comment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     news_item = models.ForeignKey('NewsItem', on_delete=models.CASCADE, related_name='comments')
     text = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    image = models.ImageField(upload_to='comment_images/', blank=True, null=True)
-    audio_file = models.FileField(upload_to='voice_messages/', blank=True, null=True)
+    # default, а не auto_now_add: импорт архива (news.ingest) сохраняет исходное время
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    image = models.ImageField(upload_to='comment_images/', storage=hashed_storage, blank=True, null=True)
+    image_thumb = models.ImageField(blank=True, null=True, editable=False)
+    audio_file = models.FileField(upload_to='voice_messages/', storage=hashed_storage, blank=True, null=True)
+    # Перекодированная в Opus копия голосового сообщения
+    audio_compact = models.FileField(blank=True, null=True, editable=False)
     is_voice_message = models.BooleanField(default=False)
     audio_duration = models.IntegerField(blank=True, null=True, help_text="Длительность аудио в секундах")
+    waveform = models.JSONField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Пики громкости голосового сообщения (0..100) для отрисовки волны без загрузки аудио"
+    )
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Постраничная ветка комментариев и последние комментарии в ленте
+            models.Index(fields=['news_item', 'created_at'], name='comment_thread_idx'),
+        ]
 
     def __str__(self):
         return f'Комментарий от {self.user.username} к новости "{self.news_item.title[:30]}..."'
 
+    @property
+    def display_image_url(self):
+        if self.image_thumb:
+            return self.image_thumb.url
+        return self.image.url if self.image else ''
+
+    @property
+    def display_audio_url(self):
+        if self.audio_compact:
+            return self.audio_compact.url
+        return self.audio_file.url if self.audio_file else ''
+
 class AboutPage(models.Model):
     title = models.CharField(max_length=200, verbose_name="Заголовок")
     description = models.TextField(verbose_name="Описание")
-    team_photo = models.ImageField(upload_to='about/', verbose_name="Фото команды", blank=True)
+    team_photo = models.ImageField(upload_to='about/', storage=hashed_storage, verbose_name="Фото команды", blank=True)
     stats = models.JSONField(verbose_name="Статистика", default=dict, blank=True)
     
     class Meta:
@@ -158,4 +345,16 @@ class AboutPage(models.Model):
         verbose_name_plural = "Страницы 'О нас'"
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+class SeedVersion(models.Model):
+    version = models.PositiveIntegerField(unique=True, verbose_name="Версия")
+    applied_at = models.DateTimeField(auto_now_add=True, verbose_name="Применено")
+
+    class Meta:
+        verbose_name = "Версия начальных данных"
+        verbose_name_plural = "Версии начальных данных"
+        ordering = ['version']
+
+    def __str__(self):
+        return f"Начальные данные v{self.version}"
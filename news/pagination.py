@@ -0,0 +1,74 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor', 'offset'])
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(value, pk, offset):
+    """Курсор — непрозрачная строка: значение ключа сортировки, id и число уже выданных записей."""
+    payload = json.dumps({'v': value.isoformat(), 'id': pk, 'n': offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = parse_datetime(payload['v'])
+        pk = int(payload['id'])
+        offset = int(payload.get('n', 0))
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if value is None:
+        raise InvalidCursor(cursor)
+    return value, pk, offset
+
+
+def keyset_filter(queryset, cursor=None, field='created_at', descending=True):
+    """
+    Сортирует queryset по (field, id) и оставляет записи после курсора.
+    Возвращает (queryset, число уже выданных записей).
+    """
+    if descending:
+        queryset = queryset.order_by(f'-{field}', '-id')
+        lookup = 'lt'
+    else:
+        queryset = queryset.order_by(field, 'id')
+        lookup = 'gt'
+
+    offset = 0
+    if cursor:
+        value, pk, offset = decode_cursor(cursor)
+        # Условие-диапазон по field позволяет базе начать с позиции курсора в индексе,
+        # а не просматривать его с начала
+        queryset = queryset.filter(
+            Q(**{f'{field}__{lookup}e': value}),
+            Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': pk}),
+        )
+    return queryset, offset
+
+
+def keyset_page(queryset, cursor=None, page_size=10, field='created_at', descending=True):
+    """
+    Возвращает страницу по ключу (field, id) вместо OFFSET: стоимость запроса
+    не зависит от того, насколько глубоко листает пользователь.
+    """
+    queryset, offset = keyset_filter(queryset, cursor, field, descending)
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk, offset + page_size)
+
+    return KeysetPage(items, next_cursor, offset)
@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from .buffers import WriteBehindBuffer
+
+PRESENCE_KEY = 'presence:seen:{}'
+STATUS_KEY = 'presence:status:{}'
+FLUSH_BATCH_SIZE = 500
+
+
+def presence_ttl():
+    """Сколько секунд после последнего heartbeat пользователь считается онлайн."""
+    return getattr(settings, 'NEWS_PRESENCE_TTL', 5 * 60)
+
+
+def flush_last_seen(last_seen):
+    """Сохраняет время последней активности пачкой, одним UPDATE на FLUSH_BATCH_SIZE профилей."""
+    from .models import UserProfile
+
+    items = list(last_seen.items())
+    for start in range(0, len(items), FLUSH_BATCH_SIZE):
+        chunk = items[start:start + FLUSH_BATCH_SIZE]
+        UserProfile.objects.filter(user_id__in=[user_id for user_id, _ in chunk]).update(
+            last_activity=Case(*[When(user_id=user_id, then=Value(seen)) for user_id, seen in chunk])
+        )
+
+
+last_seen_buffer = WriteBehindBuffer(
+    flush_last_seen,
+    merge=max,
+    threshold=getattr(settings, 'NEWS_PRESENCE_FLUSH_THRESHOLD', 500),
+    interval=getattr(settings, 'NEWS_PRESENCE_FLUSH_INTERVAL', 60),
+)
+
+
+def heartbeat(user_id):
+    """Отмечает активность пользователя. В базу ничего не пишет — только кэш и буфер."""
+    now = timezone.now()
+    cache.set(PRESENCE_KEY.format(user_id), now, timeout=presence_ttl())
+    last_seen_buffer.add(user_id, now)
+    return now
+
+
+async def aheartbeat(user_id):
+    """heartbeat для async-view."""
+    now = timezone.now()
+    await cache.aset(PRESENCE_KEY.format(user_id), now, timeout=presence_ttl())
+    await last_seen_buffer.aadd(user_id, now)
+    return now
+
+
+def last_seen(user_id):
+    """Время последнего heartbeat, если он был в пределах NEWS_PRESENCE_TTL, иначе None."""
+    return cache.get(PRESENCE_KEY.format(user_id))
+
+
+def status_payload(user):
+    """
+    Данные для индикатора статуса в навигации (status, status_display, custom_status).
+    Читаются из кэша; профиль из базы загружается только при промахе. None — если профиля нет.
+    """
+    key = STATUS_KEY.format(user.pk)
+    payload = cache.get(key)
+    if payload is not None:
+        return payload
+
+    from .models import UserProfile
+
+    try:
+        profile = UserProfile.objects.get(user_id=user.pk)
+    except UserProfile.DoesNotExist:
+        return None
+    payload = profile_status(profile)
+    cache.set(key, payload, timeout=None)
+    return payload
+
+
+async def astatus_payload(user):
+    """status_payload для async-view: кэш и профиль читаются без блокировки цикла событий."""
+    key = STATUS_KEY.format(user.pk)
+    payload = await cache.aget(key)
+    if payload is not None:
+        return payload
+
+    from .models import UserProfile
+
+    try:
+        profile = await UserProfile.objects.aget(user_id=user.pk)
+    except UserProfile.DoesNotExist:
+        return None
+    payload = profile_status(profile)
+    await cache.aset(key, payload, timeout=None)
+    return payload
+
+
+def profile_status(profile):
+    return {
+        'status': profile.status,
+        'status_display': profile.get_status_display(),
+        'custom_status': profile.custom_status,
+    }
+
+
+def invalidate_status(user_id):
+    cache.delete(STATUS_KEY.format(user_id))
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+KEEPALIVE_SECONDS = 25
+
+
+class Subscription:
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, message):
+        """Вызывается в цикле событий подписчика. Медленный клиент теряет сообщения, а не память сервера."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    Pub/sub внутри процесса. Публиковать можно из любого потока (в том числе из
+    синхронных view), подписчики — асинхронные SSE-потоки того же процесса.
+    Для нескольких процессов подменяется через NEWS_PUSH_BROKER на брокер
+    с тем же интерфейсом поверх внешней шины.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            channel_subscribers = self._subscribers.get(subscription.channel)
+            if channel_subscribers is not None:
+                channel_subscribers.discard(subscription)
+                if not channel_subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def has_subscribers(self, channel):
+        with self._lock:
+            return bool(self._subscribers.get(channel))
+
+    def publish(self, channel, event, data):
+        message = {'event': event, 'data': data}
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # Цикл событий подписчика уже закрыт
+                self.unsubscribe(subscription)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = import_string(getattr(settings, 'NEWS_PUSH_BROKER', 'news.push.LocalBroker'))
+                _broker = broker_class()
+    return _broker
+
+
+def status_channel(user_id):
+    return f'status:{user_id}'
+
+
+def comments_channel(news_id):
+    return f'comments:{news_id}'
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def event_stream_response(request, channel, initial=None):
+    """
+    Ответ text/event-stream с событиями канала. Работает только под ASGI: под WSGI
+    поток занял бы рабочий поток навсегда, поэтому отдаём 501 и клиент продолжает опрос.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'status': 'error', 'message': 'Push-канал доступен только под ASGI'}, status=501)
+
+    broker = get_broker()
+
+    async def stream():
+        with broker.subscribe(channel) as subscription:
+            yield "retry: 5000\n\n"
+            if initial is not None:
+                yield format_event(*initial)
+            while True:
+                try:
+                    message = await subscription.get(timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(message['event'], message['data'])
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
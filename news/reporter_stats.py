@@ -0,0 +1,105 @@
+"""
+Материализованная статистика репортёров (ReporterStats): число публикаций,
+просмотры, полученные комментарии и время последней публикации.
+
+Частые события меняют строку одним UPDATE с F(): новая публикация, сброс буфера
+просмотров, новый или удалённый комментарий. Редкие (удаление новости, смена
+автора, массовая загрузка комментариев) пересчитывают затронутых репортёров
+целиком по денормализованным полям NewsItem — без JOIN с комментариями.
+"""
+from django.db.models import Case, Count, F, Max, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import NewsItem, Reporter, ReporterStats
+
+
+def refresh(reporter_ids):
+    """Пересчитывает статистику заданных репортёров одним агрегирующим запросом на пачку."""
+    reporter_ids = sorted({pk for pk in reporter_ids if pk is not None})
+    if not reporter_ids:
+        return
+    totals = {
+        row['reporter_id']: row
+        for row in NewsItem.objects.filter(reporter_id__in=reporter_ids)
+        .values('reporter_id')
+        .annotate(posts=Count('pk'), views=Sum('views'), comments=Sum('comment_count'), last=Max('created_at'))
+    }
+    existing = set(Reporter.objects.filter(pk__in=reporter_ids).values_list('pk', flat=True))
+    rows = []
+    for pk in reporter_ids:
+        if pk not in existing:
+            continue
+        row = totals.get(pk, {})
+        rows.append(ReporterStats(
+            reporter_id=pk,
+            post_count=row.get('posts') or 0,
+            total_views=row.get('views') or 0,
+            comments_received=row.get('comments') or 0,
+            last_post_at=row.get('last'),
+        ))
+    ReporterStats.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['reporter'],
+        update_fields=['post_count', 'total_views', 'comments_received', 'last_post_at'],
+    )
+
+
+def _apply(reporter_id, **changes):
+    """UPDATE строки репортёра; если строки ещё нет — полный пересчёт."""
+    if reporter_id is None:
+        return
+    if not ReporterStats.objects.filter(reporter_id=reporter_id).update(**changes):
+        refresh([reporter_id])
+
+
+def post_added(news_item):
+    _apply(
+        news_item.reporter_id,
+        post_count=F('post_count') + 1,
+        total_views=F('total_views') + news_item.views,
+        last_post_at=Greatest(Coalesce(F('last_post_at'), Value(news_item.created_at)), Value(news_item.created_at)),
+    )
+
+
+def comment_added(news_id, delta=1):
+    """Комментарий к новости: репортёр находится подзапросом в том же UPDATE."""
+    reporter_ids = NewsItem.objects.filter(pk=news_id).values('reporter_id')
+    ReporterStats.objects.filter(reporter_id__in=reporter_ids).update(
+        comments_received=Greatest(F('comments_received') + Value(delta), Value(0)),
+    )
+
+
+def views_added(deltas):
+    """Пачка просмотров {news_id: прирост} из сброса буфера: один UPDATE на пачку репортёров."""
+    by_reporter = {}
+    for news_id, reporter_id in NewsItem.objects.filter(pk__in=list(deltas)).values_list('pk', 'reporter_id'):
+        if reporter_id is not None:
+            by_reporter[reporter_id] = by_reporter.get(reporter_id, 0) + deltas[news_id]
+    if by_reporter:
+        increment = Case(*[When(pk=pk, then=Value(delta)) for pk, delta in by_reporter.items()], default=Value(0))
+        ReporterStats.objects.filter(pk__in=list(by_reporter)).update(total_views=F('total_views') + increment)
+
+
+def stats_for(reporter):
+    """Строка статистики репортёра; если её нет (репортёр создан в обход сигналов) — пересчёт."""
+    try:
+        return reporter.stats
+    except ReporterStats.DoesNotExist:
+        refresh([reporter.pk])
+        return ReporterStats.objects.get(pk=reporter.pk)
+
+
+def as_dict(stats):
+    return {
+        'post_count': stats.post_count,
+        'total_views': stats.total_views,
+        'comments_received': stats.comments_received,
+        'last_post_at': stats.last_post_at.isoformat() if stats.last_post_at else None,
+    }
+
+
+def refresh_all(chunk_size=500):
+    """Пересчитывает статистику всех репортёров. Возвращает их число."""
+    ids = list(Reporter.objects.values_list('pk', flat=True))
+    for start in range(0, len(ids), chunk_size):
+        refresh(ids[start:start + chunk_size])
+    return len(ids)
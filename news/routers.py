@@ -0,0 +1,83 @@
+"""
+Маршрутизация запросов между основной базой и репликами.
+
+Чтение моделей ленты (READ_MODELS) уходит на реплику из NEWS_DB_REPLICAS, запись —
+всегда в основную базу. Чтобы пользователь сразу видел свои изменения
+(read-your-writes), после записи чтение закрепляется за основной базой: до конца
+текущего запроса (контекстная переменная) и на NEWS_DB_PIN_SECONDS секунд после
+него (cookie, её ставит ReplicaPinMiddleware).
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+READ_MODELS = frozenset((
+    'newsitem', 'comment', 'reporter', 'aboutpage', 'userprofile', 'newsitemviewbucket', 'newsitemtrend',
+))
+PIN_COOKIE = 'news_db_pin'
+
+_pinned = ContextVar('news_db_pinned', default=False)
+_written = ContextVar('news_db_written', default=False)
+
+
+def replicas():
+    return list(getattr(settings, 'NEWS_DB_REPLICAS', []))
+
+
+def pin_to_primary():
+    """Все чтения до конца текущего запроса (контекста) идут в основную базу."""
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+def start_request(pinned=False):
+    _pinned.set(pinned)
+    _written.set(False)
+
+
+def wrote_in_request():
+    return _written.get()
+
+
+def is_replicated(model):
+    """Модель читается с реплик: только её запись требует read-your-writes."""
+    return model._meta.app_label == 'news' and model._meta.model_name in READ_MODELS
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not is_replicated(model):
+            return None
+        aliases = replicas()
+        if not aliases or _pinned.get():
+            return DEFAULT_DB_ALIAS
+        # Чтение внутри транзакции записи должно видеть её же данные
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == DEFAULT_DB_ALIAS:
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        # Сессии, last_login, журнал админки не читаются с реплик и не закрепляют запрос
+        if not is_replicated(model):
+            return None
+        _pinned.set(True)
+        _written.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
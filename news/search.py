@@ -0,0 +1,216 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .stemmer import tokenize
+
+FTS_TABLE = 'news_search_index'
+
+# Тип объекта кодируется в rowid (id * KIND_STRIDE + тип): обновление и удаление
+# записи идут по rowid, без сканирования индекса
+KINDS = {'news': 0, 'comment': 1}
+KIND_STRIDE = 4
+
+
+def _kind_of(obj):
+    from .models import Comment, NewsItem
+
+    if isinstance(obj, NewsItem):
+        return 'news'
+    if isinstance(obj, Comment):
+        return 'comment'
+    return None
+
+
+def document_for(obj):
+    """Индексируемые поля объекта: (заголовок, текст)."""
+    kind = _kind_of(obj)
+    if kind == 'news':
+        return obj.title, obj.text
+    return '', f"{obj.text or ''} {obj.user.username}"
+
+
+class SQLiteFTSBackend:
+    """
+    Инвертированный индекс на виртуальной таблице FTS5. В индекс пишутся уже
+    нормализованные стеммером термы, поэтому морфология русского языка учитывается
+    и при индексации, и в запросах. Ранжирование — bm25, заголовок весит больше текста.
+    """
+
+    def available(self):
+        return connection.vendor == 'sqlite'
+
+    def _rowid(self, kind, pk):
+        return pk * KIND_STRIDE + KINDS[kind]
+
+    def index(self, obj):
+        kind = _kind_of(obj)
+        title, body = document_for(obj)
+        rowid = self._rowid(kind, obj.pk)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [rowid])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)",
+                [rowid, ' '.join(tokenize(title)), ' '.join(tokenize(body))],
+            )
+
+    def index_many(self, objects):
+        rows = []
+        for obj in objects:
+            title, body = document_for(obj)
+            rows.append([self._rowid(_kind_of(obj), obj.pk), ' '.join(tokenize(title)), ' '.join(tokenize(body))])
+        if rows:
+            with connection.cursor() as cursor:
+                cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [[row[0]] for row in rows])
+                cursor.executemany(f"INSERT INTO {FTS_TABLE} (rowid, title, body) VALUES (%s, %s, %s)", rows)
+
+    def remove(self, kind, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [self._rowid(kind, pk)])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def match_expression(self, query):
+        terms = tokenize(query)
+        # Префиксный поиск сглаживает расхождения основ у разных словоформ
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def _where(self, expression, kind):
+        return f"{FTS_TABLE} MATCH %s AND (rowid %% {KIND_STRIDE}) = %s", [expression, KINDS[kind]]
+
+    def search(self, query, kind, limit, offset=0):
+        """Возвращает (id объектов в порядке релевантности, общее число совпадений)."""
+        expression = self.match_expression(query)
+        if not expression:
+            return [], 0
+        where, params = self._where(expression, kind)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {FTS_TABLE} WHERE {where}", params)
+            total = cursor.fetchone()[0]
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {where} "
+                f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0) LIMIT %s OFFSET %s",
+                params + [limit, offset],
+            )
+            ids = [rowid // KIND_STRIDE for rowid, in cursor.fetchall()]
+        return ids, total
+
+    def matching_ids(self, query, kind):
+        """Подзапрос id всех совпадений, без ранжирования и лимита — для pk__in."""
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        where, params = self._where(expression, kind)
+        return RawSQL(f"SELECT rowid / {KIND_STRIDE} FROM {FTS_TABLE} WHERE {where}", params)
+
+
+class DatabaseBackend:
+    """Запасной вариант для баз без FTS: поиск подстрокой, без ранжирования."""
+
+    def available(self):
+        return True
+
+    def index(self, obj):
+        pass
+
+    def index_many(self, objects):
+        pass
+
+    def remove(self, kind, pk):
+        pass
+
+    def clear(self):
+        pass
+
+    def _queryset(self, words, kind):
+        from .models import Comment, NewsItem
+
+        if kind == 'news':
+            queryset = NewsItem.objects.all()
+            for word in words:
+                queryset = queryset.filter(Q(title__icontains=word) | Q(text__icontains=word))
+        else:
+            queryset = Comment.objects.all()
+            for word in words:
+                queryset = queryset.filter(Q(text__icontains=word) | Q(user__username__icontains=word))
+        return queryset
+
+    def search(self, query, kind, limit, offset=0):
+        words = query.split()
+        if not words:
+            return [], 0
+        queryset = self._queryset(words, kind).order_by('-created_at')
+        return list(queryset.values_list('pk', flat=True)[offset:offset + limit]), queryset.count()
+
+    def matching_ids(self, query, kind):
+        words = query.split()
+        if not words:
+            return []
+        return self._queryset(words, kind).values('pk')
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        backend = import_string(getattr(settings, 'NEWS_SEARCH_BACKEND', 'news.search.SQLiteFTSBackend'))()
+        _backend = backend if backend.available() else DatabaseBackend()
+    return _backend
+
+
+def index_object(obj):
+    get_backend().index(obj)
+
+
+def remove_object(obj):
+    kind = _kind_of(obj)
+    if kind is not None:
+        get_backend().remove(kind, obj.pk)
+
+
+def rebuild_index(chunk_size=1000):
+    from .models import Comment, NewsItem
+
+    backend = get_backend()
+    backend.clear()
+    total = 0
+    for queryset in (NewsItem.objects.all(), Comment.objects.select_related('user')):
+        chunk = []
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            chunk.append(obj)
+            if len(chunk) >= chunk_size:
+                backend.index_many(chunk)
+                total += len(chunk)
+                chunk = []
+        backend.index_many(chunk)
+        total += len(chunk)
+    return total
+
+
+def search(query, kind='news', page=1, page_size=20):
+    """
+    Ранжированный постраничный поиск. Возвращает (объекты страницы, всего найдено).
+    """
+    from .models import Comment, NewsItem
+
+    offset = (max(page, 1) - 1) * page_size
+    ids, total = get_backend().search(query, kind, page_size, offset)
+    if kind == 'news':
+        objects = NewsItem.objects.select_related('reporter__user').in_bulk(ids)
+    else:
+        objects = Comment.objects.select_related('user', 'news_item').in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects], total
+
+
+def search_ids(query, kind):
+    """
+    Все найденные id в виде подзапроса — для фильтрации queryset (например, в админке).
+    Без лимита: иначе список и счётчик результатов молча обрезались бы.
+    """
+    return get_backend().matching_ids(query, kind)
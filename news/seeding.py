@@ -0,0 +1,101 @@
+import datetime
+import json
+from pathlib import Path
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AboutPage, Comment, NewsItem, Reporter, SeedVersion, User
+
+SEED_DIR = Path(__file__).resolve().parent / 'fixtures' / 'seed'
+
+
+def load_fixtures():
+    """Возвращает версионированные наборы начальных данных в порядке версий."""
+    fixtures = []
+    for path in sorted(SEED_DIR.glob('*.json')):
+        with path.open(encoding='utf-8') as fp:
+            fixtures.append(json.load(fp))
+    return sorted(fixtures, key=lambda fixture: fixture['version'])
+
+
+def pending_fixtures(force=False):
+    fixtures = load_fixtures()
+    if force:
+        return fixtures
+    applied = set(SeedVersion.objects.values_list('version', flat=True))
+    return [fixture for fixture in fixtures if fixture['version'] not in applied]
+
+
+def bootstrap(force=False):
+    """
+    Применяет ещё не применённые наборы начальных данных.
+    Повторный запуск ничего не меняет: каждый шаг идемпотентен.
+    Возвращает список применённых версий.
+    """
+    applied = []
+    for fixture in pending_fixtures(force=force):
+        with transaction.atomic():
+            apply_fixture(fixture)
+            SeedVersion.objects.get_or_create(version=fixture['version'])
+        applied.append(fixture['version'])
+    return applied
+
+
+def apply_fixture(fixture):
+    if 'about_page' in fixture:
+        about_data = dict(fixture['about_page'])
+        AboutPage.objects.update_or_create(id=about_data.pop('id', 1), defaults=about_data)
+
+    users = {}
+    for user_data in fixture.get('users', []):
+        users[user_data['username']] = _get_or_create_user(user_data)
+
+    reporters = {}
+    for reporter_data in fixture.get('reporters', []):
+        user = _get_or_create_user(reporter_data)
+        reporter, _ = Reporter.objects.get_or_create(
+            user=user,
+            defaults={
+                'specialization': reporter_data.get('specialization', ''),
+                'bio': reporter_data.get('bio', ''),
+            }
+        )
+        reporters[reporter_data['username']] = reporter
+
+    now = timezone.now()
+    for news_data in fixture.get('news', []):
+        post, created = NewsItem.objects.get_or_create(
+            title=news_data['title'],
+            defaults={
+                'reporter': reporters.get(news_data.get('reporter')),
+                'text': news_data['text'],
+            }
+        )
+        if not created:
+            continue
+
+        # created_at заполняется через auto_now_add, поэтому дату выставляем отдельно
+        created_at = now - datetime.timedelta(hours=news_data.get('age_hours', 0))
+        NewsItem.objects.filter(pk=post.pk).update(created_at=created_at)
+
+        for comment_data in news_data.get('comments', []):
+            Comment.objects.create(
+                news_item=post,
+                user=users[comment_data['user']],
+                text=comment_data['text'],
+            )
+
+
+def _get_or_create_user(user_data):
+    user, created = User.objects.get_or_create(
+        username=user_data['username'],
+        defaults={
+            'first_name': user_data.get('first_name', ''),
+            'last_name': user_data.get('last_name', ''),
+        }
+    )
+    if created:
+        user.set_unusable_password()
+        user.save(update_fields=['password'])
+    return user
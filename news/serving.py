@@ -0,0 +1,166 @@
+"""
+Отдача файлов из MEDIA_ROOT: Range-запросы (перемотка голосовых сообщений),
+потоковая передача без чтения файла в память, строгие ETag и долгое кэширование
+файлов с именами по хэшу содержимого. В продакшене отдачу можно переложить на
+веб-сервер через X-Accel-Redirect (nginx) или X-Sendfile (Apache, lighttpd).
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from .storage import is_content_hashed
+
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# Форматы, которых может не быть в системной базе mime-типов
+for _type, _extension in (
+    ('audio/webm', '.webm'),
+    ('audio/ogg', '.ogg'),
+    ('audio/ogg', '.opus'),
+    ('image/webp', '.webp'),
+):
+    mimetypes.add_type(_type, _extension)
+
+
+def file_etag(path, stat):
+    """
+    Строгий ETag: у файлов с именем по хэшу — сам хэш, у остальных — время
+    изменения и размер (как у nginx).
+    """
+    name = os.path.basename(path)
+    if is_content_hashed(name):
+        return quote_etag(name.split('.', 1)[0])
+    return quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+
+def parse_range(header, size):
+    """
+    Разбирает заголовок Range с одним диапазоном. Возвращает (start, end) включительно,
+    None — если заголовок не поддерживается (отдаём файл целиком), или
+    'unsatisfiable' — если диапазон за пределами файла.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N: последние N байт
+        length = int(last)
+        # В пустом файле нет ни одного байта, который можно отдать
+        if length == 0 or size == 0:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        return 'unsatisfiable'
+    return start, end
+
+
+def iter_range(path, start, length, chunk_size=CHUNK_SIZE):
+    with open(path, 'rb') as fp:
+        fp.seek(start)
+        while length > 0:
+            chunk = fp.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def offload_response(path, relative_path):
+    """Пустой ответ с заголовком, по которому файл отдаст веб-сервер. None — если отдача не вынесена."""
+    mode = getattr(settings, 'NEWS_MEDIA_OFFLOAD', None)
+    if mode == 'x-accel-redirect':
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = getattr(settings, 'NEWS_MEDIA_ACCEL_PREFIX', '/protected-media/') + relative_path
+        return response
+    if mode == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = path
+        return response
+    return None
+
+
+def patch_media_headers(response, path, content_type, etag, last_modified):
+    response['Content-Type'] = content_type
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Accept-Ranges'] = 'bytes'
+    if is_content_hashed(path):
+        response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        max_age = getattr(settings, 'NEWS_MEDIA_MAX_AGE', 60 * 60)
+        response['Cache-Control'] = f'public, max-age={max_age}'
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    etag = file_etag(full_path, stat)
+    last_modified = http_date(stat.st_mtime)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        return patch_media_headers(not_modified, full_path, content_type, etag, last_modified)
+
+    # Range и условные заголовки веб-сервер обработает сам
+    response = offload_response(full_path, path)
+    if response is not None:
+        return patch_media_headers(response, full_path, content_type, etag, last_modified)
+
+    size = stat.st_size
+    byte_range = parse_range(request.headers.get('Range'), size)
+    # If-Range: диапазон отдаётся, только если файл не изменился
+    if_range = request.headers.get('If-Range')
+    if byte_range is not None and if_range and if_range not in (etag, last_modified):
+        byte_range = None
+
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return patch_media_headers(response, full_path, content_type, etag, last_modified)
+
+    if byte_range is None:
+        if request.method == 'HEAD':
+            response = HttpResponse()
+        else:
+            # FileResponse отдаёт файл через wsgi.file_wrapper — с sendfile там, где сервер его умеет
+            response = FileResponse(open(full_path, 'rb'))
+            response.block_size = CHUNK_SIZE
+        response['Content-Length'] = size
+        return patch_media_headers(response, full_path, content_type, etag, last_modified)
+
+    start, end = byte_range
+    length = end - start + 1
+    if request.method == 'HEAD':
+        response = HttpResponse(status=206)
+    else:
+        response = StreamingHttpResponse(iter_range(full_path, start, length), status=206)
+    response['Content-Length'] = length
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return patch_media_headers(response, full_path, content_type, etag, last_modified)
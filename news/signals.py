@@ -1,8 +1,169 @@
-from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from django.template.response import TemplateResponse
+from django.template.loader import render_to_string
 
-@receiver(request_finished)
-def debug_middleware(sender, **kwargs):
-    if hasattr(sender, 'context_data'):
-        print(f"\nSIGNAL DEBUG: Context keys - {list(sender.context_data.keys())}")
\ No newline at end of file
+from . import about, comment_stats, fragments, media, presence, reporter_stats, search
+from .http_cache import touch_content
+from .models import AboutPage, Comment, NewsItem, Reporter, UserProfile
+from .push import comments_channel, get_broker, status_channel
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_user_status(sender, instance, **kwargs):
+    """Сбрасывает закэшированный статус для индикатора в навигации."""
+    presence.invalidate_status(instance.user_id)
+
+
+@receiver(post_save, sender=UserProfile)
+def push_user_status(sender, instance, **kwargs):
+    channel = status_channel(instance.user_id)
+    broker = get_broker()
+    if broker.has_subscribers(channel):
+        payload = presence.profile_status(instance)
+        transaction.on_commit(lambda: broker.publish(channel, 'status', payload))
+
+
+@receiver(post_save, sender=Comment)
+def push_new_comment(sender, instance, created, **kwargs):
+    """Рассылает подписчикам страницы комментариев готовый HTML нового комментария."""
+    channel = comments_channel(instance.news_item_id)
+    broker = get_broker()
+    if not created or not broker.has_subscribers(channel):
+        return
+
+    def publish():
+        html = render_to_string('news/comment_partial.html', {'comment': instance})
+        broker.publish(channel, 'comment', {'id': instance.pk, 'html': html})
+
+    transaction.on_commit(publish)
+
+
+@receiver([post_save, post_delete], sender=NewsItem)
+def invalidate_news_fragments(sender, instance, **kwargs):
+    fragments.bump('newsitem', instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        comment_stats.comment_added(instance)
+        reporter_stats.comment_added(instance.news_item_id)
+
+
+@receiver(post_delete, sender=Comment)
+def count_removed_comment(sender, instance, **kwargs):
+    comment_stats.comment_removed(instance)
+    reporter_stats.comment_added(instance.news_item_id, -1)
+
+
+@receiver(post_save, sender=Reporter)
+def create_reporter_stats(sender, instance, created, **kwargs):
+    if created:
+        reporter_stats.refresh([instance.pk])
+
+
+@receiver(pre_save, sender=NewsItem)
+def remember_news_reporter(sender, instance, update_fields=None, **kwargs):
+    """Прежний автор нужен, чтобы при смене автора пересчитать обоих."""
+    if instance._state.adding or (update_fields is not None and 'reporter' not in update_fields):
+        return
+    instance._previous_reporter_id = (
+        NewsItem.objects.filter(pk=instance.pk).values_list('reporter_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=NewsItem)
+def count_reporter_post(sender, instance, created, **kwargs):
+    if created:
+        reporter_stats.post_added(instance)
+        return
+    previous = getattr(instance, '_previous_reporter_id', instance.reporter_id)
+    if previous != instance.reporter_id:
+        reporter_stats.refresh([previous, instance.reporter_id])
+
+
+@receiver(post_delete, sender=NewsItem)
+def count_removed_post(sender, instance, **kwargs):
+    reporter_stats.refresh([instance.reporter_id])
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment_fragments(sender, instance, **kwargs):
+    """Комментарий входит и в свой фрагмент, и в карточку новости (счётчик, аватары)."""
+    fragments.bump('comment', instance.pk)
+    fragments.bump('newsitem', instance.news_item_id)
+
+
+@receiver(post_save, sender=Reporter)
+def invalidate_reporter_fragments(sender, instance, **kwargs):
+    fragments.bump('newsitem', *instance.news_posts.values_list('pk', flat=True))
+
+
+AVATAR_FIELDS = ('avatar', 'avatar_thumb')
+
+
+def _avatar_names(names):
+    return tuple(name or '' for name in names)
+
+
+@receiver(pre_save, sender=UserProfile)
+def remember_avatar(sender, instance, update_fields=None, **kwargs):
+    """Прежние файлы аватара: кэш сбрасывается, только если они изменились, а не при любой правке профиля."""
+    if instance._state.adding or (update_fields is not None and not set(AVATAR_FIELDS) & set(update_fields)):
+        return
+    previous = UserProfile.objects.filter(pk=instance.pk).values_list(*AVATAR_FIELDS).first()
+    instance._previous_avatar = _avatar_names(previous) if previous is not None else None
+
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_avatar_fragments(sender, instance, created, **kwargs):
+    """Смена аватара или готовая миниатюра: комментарии автора и карточки новостей, где он виден."""
+    current = _avatar_names(getattr(instance, field).name for field in AVATAR_FIELDS)
+    if created:
+        changed = any(current)
+    else:
+        changed = instance.__dict__.pop('_previous_avatar', current) != current
+    if not changed:
+        return
+    fragments.bump('avatar', instance.user_id)
+    touch_content()
+    news_ids = set(Comment.objects.filter(user_id=instance.user_id).values_list('news_item_id', flat=True).distinct())
+    news_ids.update(NewsItem.objects.filter(reporter__user_id=instance.user_id).values_list('pk', flat=True))
+    fragments.bump('newsitem', *news_ids)
+
+
+@receiver([post_save, post_delete], sender=AboutPage)
+def invalidate_about_page(sender, **kwargs):
+    # После коммита: иначе другой процесс успеет закэшировать старую версию под новым ключом
+    transaction.on_commit(about.invalidate_about_page)
+
+
+@receiver([post_save, post_delete], sender=NewsItem)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Reporter)
+@receiver([post_save, post_delete], sender=AboutPage)
+def invalidate_page_cache(sender, **kwargs):
+    """Меняет Last-Modified/ETag страниц и тем самым отбрасывает их полные копии в кэше."""
+    touch_content()
+
+
+@receiver(post_save, sender=NewsItem)
+@receiver(post_save, sender=Comment)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'title', 'text'} & set(update_fields):
+        return
+    search.index_object(instance)
+
+
+@receiver(post_delete, sender=NewsItem)
+@receiver(post_delete, sender=Comment)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_object(instance)
+
+
+@receiver(post_save, sender=NewsItem)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=UserProfile)
+def schedule_media_processing(sender, instance, **kwargs):
+    """Миниатюры и перекодирование делаются в фоне, после коммита."""
+    media.schedule_processing(instance)
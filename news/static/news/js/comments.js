@@ -9,7 +9,6 @@ document.addEventListener('DOMContentLoaded', function() {
     const commentForm = document.querySelector('.comment-form');
     const commentInputField = document.querySelector('.comment-input-area textarea');
     const commentsContainer = document.querySelector('.comments-container');
-    const voiceDurationInput = document.getElementById('voice-duration-input');
 
     const voiceBtn = document.getElementById('voice-btn');
     const voiceModal = document.querySelector('.voice-modal');
@@ -231,9 +230,6 @@ document.addEventListener('DOMContentLoaded', function() {
     if (voiceSendBtn) {
         voiceSendBtn.addEventListener('click', () => {
             if (audioChunks.length > 0) {
-                // Сохраняем длительность в скрытое поле формы
-                voiceDurationInput.value = recordedDuration;
-                
                 const audioBlob = new Blob(audioChunks, { type: 'audio/webm' });
                 sendComment('', audioBlob, 'audio');
             }
@@ -279,8 +275,6 @@ document.addEventListener('DOMContentLoaded', function() {
             event.preventDefault();
             const commentText = commentInputField.value.trim();
             if (commentText) {
-                // Сбрасываем длительность для текстовых сообщений
-                voiceDurationInput.value = 0;
                 sendComment(commentText, null, 'text');
                 commentInputField.value = '';
             }
@@ -298,11 +292,6 @@ document.addEventListener('DOMContentLoaded', function() {
         
         formData.append('csrfmiddlewaretoken', csrfToken);
         formData.append('comment_text', text);
-        
-        // Добавляем длительность для голосовых сообщений
-        if (type === 'audio') {
-            formData.append('voice_duration', voiceDurationInput.value);
-        }
 
         if (type === 'image') {
             if (file) {
@@ -345,7 +334,6 @@ document.addEventListener('DOMContentLoaded', function() {
                 if (result.comment_html) {
                     appendNewComment(result.comment_html);
                     commentInputField.value = '';
-                    voiceDurationInput.value = '0';
                 }
             } else {
                 showMessage(result.message || 'Ошибка при отправке комментария');
@@ -362,13 +350,24 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    function appendNewComment(commentHtml) {
+    function appendNewComment(commentHtml, fromStream = false) {
         try {
             const tempDiv = document.createElement('div');
-            tempDiv.innerHTML = commentHtml;
-            const newComment = tempDiv.firstChild;
+            tempDiv.innerHTML = commentHtml.trim();
+            const newComment = tempDiv.firstElementChild;
             
             if (newComment) {
+                // Комментарий мог уже прийти через push-канал (или наоборот)
+                const commentId = newComment.dataset.commentId;
+                if (commentId && commentsContainer.querySelector(`[data-comment-id="${commentId}"]`)) {
+                    return;
+                }
+
+                const emptyMessage = commentsContainer.querySelector('.empty-comments-message');
+                if (emptyMessage) {
+                    emptyMessage.remove();
+                }
+
                 commentsContainer.appendChild(newComment);
                 commentsContainer.scrollTop = commentsContainer.scrollHeight;
 
@@ -379,7 +378,9 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
                 
                 // Показываем сообщение об успехе
-                showMessage('Комментарий успешно добавлен!', false);
+                if (!fromStream) {
+                    showMessage('Комментарий успешно добавлен!', false);
+                }
             }
         } catch (error) {
             console.error('Error appending comment:', error);
@@ -396,8 +397,7 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
         
-        const audio = new Audio(audioUrl);
-        let audioContext, analyser, visualizerDisplay, playbackLoop;
+        let audio, audioContext, analyser, visualizerDisplay, playbackLoop;
 
         visualizerDisplay = button.closest('.voice-message-container').querySelector('.voice-visualizer-display');
         const durationSpan = button.closest('.voice-message-container').querySelector('.voice-duration');
@@ -406,8 +406,32 @@ document.addEventListener('DOMContentLoaded', function() {
         if (durationSpan.dataset.duration) {
             durationSpan.textContent = formatTime(durationSpan.dataset.duration);
         }
+
+        // Пики посчитаны на сервере: волна рисуется сразу, без загрузки и декодирования аудио
+        const peaks = visualizerDisplay && visualizerDisplay.dataset.peaks
+            ? visualizerDisplay.dataset.peaks.split(',').map(Number)
+            : null;
+        drawIdle();
+
+        // Аудио создаётся только при первом нажатии «play», до этого файл не скачивается
+        function getAudio() {
+            if (!audio) {
+                audio = new Audio();
+                audio.preload = 'none';
+                audio.src = audioUrl;
+                audio.addEventListener('ended', () => {
+                    button.innerHTML = '<i class="fas fa-play"></i>';
+                    if (playbackLoop) {
+                        cancelAnimationFrame(playbackLoop);
+                    }
+                    drawIdle();
+                });
+            }
+            return audio;
+        }
         
         button.addEventListener('click', () => {
+            const audio = getAudio();
             if (!audioContext) {
                 try {
                     audioContext = new (window.AudioContext || window.webkitAudioContext)();
@@ -450,18 +474,21 @@ document.addEventListener('DOMContentLoaded', function() {
             }
         });
 
-        audio.addEventListener('ended', () => {
-            button.innerHTML = '<i class="fas fa-play"></i>';
-            if (playbackLoop) {
-                cancelAnimationFrame(playbackLoop);
-            }
-            if (visualizerDisplay) {
-                const canvasCtx = visualizerDisplay.getContext('2d');
-                canvasCtx.clearRect(0, 0, visualizerDisplay.width, visualizerDisplay.height);
-                canvasCtx.fillStyle = 'rgba(43, 82, 120, 0.5)';
-                canvasCtx.fillRect(0, 0, visualizerDisplay.width, visualizerDisplay.height);
-            }
-        });
+        function drawIdle() {
+            if (!visualizerDisplay) return;
+            const canvasCtx = visualizerDisplay.getContext('2d');
+            const { width, height } = visualizerDisplay;
+            canvasCtx.clearRect(0, 0, width, height);
+            canvasCtx.fillStyle = 'rgba(43, 82, 120, 0.5)';
+            canvasCtx.fillRect(0, 0, width, height);
+            if (!peaks || !peaks.length) return;
+            const barWidth = width / peaks.length;
+            canvasCtx.fillStyle = '#52a4e8';
+            peaks.forEach((peak, i) => {
+                const barHeight = Math.max(peak / 100 * height, 1);
+                canvasCtx.fillRect(i * barWidth, (height - barHeight) / 2, Math.max(barWidth - 1, 1), barHeight);
+            });
+        }
 
         function drawPlaybackVisualizer(canvas, analyser) {
             if (!canvas || !analyser) return;
@@ -497,4 +524,60 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Update all durations on page load
     updateAllDurations();
+
+    // Более ранние комментарии догружаются страницами над уже показанными
+    const olderBlock = commentsContainer.querySelector('.older-comments');
+    if (olderBlock) {
+        const olderBtn = olderBlock.querySelector('.btn-older-comments');
+        olderBtn.addEventListener('click', () => {
+            olderBtn.disabled = true;
+            const url = new URL(olderBlock.dataset.url, window.location.origin);
+            url.searchParams.set('cursor', olderBlock.dataset.cursor);
+            fetch(url, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+                .then(response => response.json())
+                .then(data => {
+                    if (data.status !== 'success') {
+                        throw new Error(data.message);
+                    }
+                    const tempDiv = document.createElement('div');
+                    tempDiv.innerHTML = data.html.trim();
+                    const fragment = document.createDocumentFragment();
+                    Array.from(tempDiv.children).forEach(comment => {
+                        const commentId = comment.dataset.commentId;
+                        if (commentId && commentsContainer.querySelector(`[data-comment-id="${commentId}"]`)) {
+                            return;
+                        }
+                        fragment.appendChild(comment);
+                        comment.querySelectorAll('.voice-play-btn').forEach(initVoicePlayback);
+                    });
+                    olderBlock.after(fragment);
+
+                    if (data.next_cursor) {
+                        olderBlock.dataset.cursor = data.next_cursor;
+                        olderBtn.disabled = false;
+                    } else {
+                        olderBlock.remove();
+                    }
+                })
+                .catch(error => {
+                    console.error('Error loading older comments:', error);
+                    showMessage('Не удалось загрузить комментарии');
+                    olderBtn.disabled = false;
+                });
+        });
+    }
+
+    // Новые комментарии других пользователей приходят через push-канал (SSE, только под ASGI)
+    if (window.EventSource && commentsContainer.dataset.streamUrl) {
+        const commentSource = new EventSource(commentsContainer.dataset.streamUrl);
+        commentSource.addEventListener('comment', event => {
+            const data = JSON.parse(event.data);
+            appendNewComment(data.html, true);
+        });
+        commentSource.onerror = () => {
+            if (commentSource.readyState === EventSource.CLOSED) {
+                console.warn('Push-канал комментариев недоступен, новые комментарии появятся после перезагрузки');
+            }
+        };
+    }
 });
\ No newline at end of file
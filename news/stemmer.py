@@ -0,0 +1,138 @@
+"""
+Стеммер для русского языка по алгоритму Snowball (Russian stemming algorithm)
+и токенизатор для поискового индекса.
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND_1 = ('в', 'вши', 'вшись')
+PERFECTIVE_GERUND_2 = ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись')
+ADJECTIVE = (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом',
+    'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею',
+)
+PARTICIPLE_1 = ('ем', 'нн', 'вш', 'ющ', 'щ')
+PARTICIPLE_2 = ('ивш', 'ывш', 'ующ')
+REFLEXIVE = ('ся', 'сь')
+VERB_1 = ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет', 'ют', 'ны', 'ть', 'ешь', 'нно')
+VERB_2 = (
+    'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй', 'ил', 'ыл', 'им', 'ым',
+    'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+)
+NOUN = (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и', 'ией', 'ей', 'ой', 'ий',
+    'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю',
+    'ия', 'ья', 'я',
+)
+SUPERLATIVE = ('ейш', 'ейше')
+DERIVATIONAL = ('ост', 'ость')
+
+STOP_WORDS = frozenset((
+    'и', 'в', 'во', 'не', 'что', 'он', 'на', 'я', 'с', 'со', 'как', 'а', 'то', 'все', 'она', 'так',
+    'его', 'но', 'да', 'ты', 'к', 'у', 'же', 'вы', 'за', 'бы', 'по', 'от', 'из', 'о', 'об', 'ли',
+    'или', 'до', 'для', 'при', 'это', 'же', 'the', 'a', 'an', 'of', 'and', 'or', 'to', 'in',
+))
+
+TOKEN_RE = re.compile(r'[0-9a-zа-я]+')
+CYRILLIC_RE = re.compile(r'[а-я]')
+
+
+def _by_length(*groups):
+    endings = [(ending, group) for group, items in enumerate(groups, start=1) for ending in items]
+    return sorted(endings, key=lambda pair: len(pair[0]), reverse=True)
+
+
+_PERFECTIVE_GERUND = _by_length(PERFECTIVE_GERUND_1, PERFECTIVE_GERUND_2)
+_ADJECTIVE = _by_length((), ADJECTIVE)
+_PARTICIPLE = _by_length(PARTICIPLE_1, PARTICIPLE_2)
+_REFLEXIVE = _by_length((), REFLEXIVE)
+_VERB = _by_length(VERB_1, VERB_2)
+_NOUN = _by_length((), NOUN)
+_SUPERLATIVE = _by_length((), SUPERLATIVE)
+
+
+def _strip(word, endings):
+    """
+    Отрезает самое длинное подходящее окончание. Окончания первой группы
+    допустимы только после «а» или «я»; если самое длинное совпадение это условие
+    не выполняет, более короткие не пробуются (как among в Snowball).
+    """
+    for ending, group in endings:
+        if word.endswith(ending):
+            rest = word[:-len(ending)]
+            if group == 1 and not rest.endswith(('а', 'я')):
+                return None
+            return rest
+    return None
+
+
+def _region_after_vowel_consonant(word, start):
+    for i in range(max(start, 1), len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+
+    rv = next((i + 1 for i, char in enumerate(word) if char in VOWELS), len(word))
+    r1 = _region_after_vowel_consonant(word, 1)
+    r2 = _region_after_vowel_consonant(word, r1 + 1)
+
+    # Все шаги работают внутри RV
+    prefix, rest = word[:rv], word[rv:]
+
+    # Шаг 1
+    stripped = _strip(rest, _PERFECTIVE_GERUND)
+    if stripped is not None:
+        rest = stripped
+    else:
+        stripped = _strip(rest, _REFLEXIVE)
+        if stripped is not None:
+            rest = stripped
+        stripped = _strip(rest, _ADJECTIVE)
+        if stripped is not None:
+            rest = stripped
+            stripped = _strip(rest, _PARTICIPLE)
+            if stripped is not None:
+                rest = stripped
+        else:
+            stripped = _strip(rest, _VERB)
+            if stripped is None:
+                stripped = _strip(rest, _NOUN)
+            if stripped is not None:
+                rest = stripped
+
+    # Шаг 2
+    if rest.endswith('и'):
+        rest = rest[:-1]
+
+    # Шаг 3: словообразовательный суффикс, только в R2
+    r2_part = rest[max(r2 - rv, 0):]
+    for ending in DERIVATIONAL[::-1]:
+        if r2_part.endswith(ending):
+            rest = rest[:-len(ending)]
+            break
+
+    # Шаг 4
+    stripped = _strip(rest, _SUPERLATIVE)
+    if stripped is not None:
+        rest = stripped[:-1] if stripped.endswith('нн') else stripped
+    elif rest.endswith('нн'):
+        rest = rest[:-1]
+    elif rest.endswith('ь'):
+        rest = rest[:-1]
+
+    return prefix + rest
+
+
+def tokenize(text):
+    """Разбивает текст на нормализованные термы: русские слова — основы, остальное как есть."""
+    terms = []
+    for token in TOKEN_RE.findall((text or '').lower().replace('ё', 'е')):
+        if token in STOP_WORDS:
+            continue
+        terms.append(stem(token) if CYRILLIC_RE.search(token) else token)
+    return terms
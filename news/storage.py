@@ -0,0 +1,50 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASH_LENGTH = 32
+# Имя вида <sha256[:32]>.ext; хранилище может добавить суффикс _XXXXXXX.
+# Производные файлы (<хэш>.jpg.webp) названы по хэшу оригинала, а не своему
+# содержимому, поэтому под шаблон не подходят: их можно пересоздать
+HASHED_NAME_RE = re.compile(r'^[0-9a-f]{%d}(_[0-9A-Za-z]{7})?\.[^.]+$' % HASH_LENGTH)
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def is_content_hashed(name):
+    """Имя файла задано его содержимым: по этому адресу всегда лежат одни и те же байты."""
+    return bool(HASHED_NAME_RE.match(os.path.basename(name)))
+
+
+class ContentHashedStorage(FileSystemStorage):
+    """
+    Сохраняет загруженные файлы под именем, полученным из хэша содержимого:
+    voice_messages/запись.webm -> voice_messages/<хэш>.webm. Такие файлы можно
+    кэшировать в браузере и на прокси без срока годности.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, content_hash(content) + extension)
+        return super().save(name, content, max_length=max_length)
+
+
+_hashed_storage = ContentHashedStorage()
+
+
+def hashed_storage():
+    return _hashed_storage
@@ -0,0 +1,50 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'NEWS_TASK_WORKERS', 2),
+                    thread_name_prefix='news-task',
+                )
+    return _executor
+
+
+def _run(func, args, close_connections=True):
+    # Ошибка задачи только логируется: объект, для которого она запущена, уже сохранён
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Фоновая задача %s%r завершилась с ошибкой", func.__name__, args)
+    finally:
+        # Соединения потока пула закрываются; в режиме 'sync' соединение принадлежит запросу
+        if close_connections:
+            connections.close_all()
+
+
+def enqueue(func, *args):
+    """
+    Запускает задачу после коммита текущей транзакции в локальном пуле потоков.
+    NEWS_TASKS_MODE: 'thread' — в пуле, 'sync' — сразу в этом же потоке, 'off' — не запускать
+    (задачи подберёт команда process_media).
+    """
+    mode = getattr(settings, 'NEWS_TASKS_MODE', 'thread')
+    if mode == 'off':
+        return
+    if mode == 'sync':
+        transaction.on_commit(lambda: _run(func, args, close_connections=False))
+        return
+    transaction.on_commit(lambda: get_executor().submit(_run, func, args))
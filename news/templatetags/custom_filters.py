@@ -19,4 +19,17 @@ def duration_format(seconds):
     minutes = seconds // 60
     remaining_seconds = seconds % 60
     
-    return f"{minutes}:{remaining_seconds:02d}"
\ No newline at end of file
+    return f"{minutes}:{remaining_seconds:02d}"
+
+@register.simple_tag
+def fragment_version(obj):
+    """
+    Версия закэшированного HTML объекта для тега {% cache %}.
+    Обычно её заранее проставляет view пачкой; здесь — запасной путь для одного объекта.
+    """
+    version = getattr(obj, 'fragment_version', None)
+    if version is None:
+        from news.fragments import attach_versions
+        attach_versions([obj])
+        version = obj.fragment_version
+    return version
@@ -0,0 +1,10 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class NewsTestRunner(DiscoverRunner):
+    """Тестовые базы создаются без демо-данных (NEWS_AUTO_BOOTSTRAP): тесты создают свои."""
+
+    def setup_databases(self, **kwargs):
+        with override_settings(NEWS_AUTO_BOOTSTRAP=False):
+            return super().setup_databases(**kwargs)
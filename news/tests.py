@@ -1,3 +1,996 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from .models import Comment, NewsItem, Reporter, User, UserProfile
+
+
+class BootstrapTests(TestCase):
+    def test_demo_seed_skips_test_database_but_runs_on_demand(self):
+        from .models import SeedVersion
+        from .seeding import bootstrap
+
+        self.assertFalse(SeedVersion.objects.exists())
+        applied = bootstrap()
+        self.assertTrue(applied)
+        self.assertEqual(SeedVersion.objects.count(), len(applied))
+        self.assertEqual(bootstrap(), [])
+
+
+class LandingQueryBudgetTests(TestCase):
+    """Число запросов главной страницы не должно зависеть от количества новостей."""
+
+    QUERY_BUDGET = 5
+
+    def create_news(self, count, comments_per_item=4):
+        for i in range(count):
+            author = User.objects.create_user(username=f'reporter_{NewsItem.objects.count()}_{i}')
+            UserProfile.objects.create(user=author)
+            reporter = Reporter.objects.create(user=author, specialization='Тест')
+            item = NewsItem.objects.create(reporter=reporter, title=f'Новость {i}', text='Текст')
+            for j in range(comments_per_item):
+                reader = User.objects.create_user(username=f'reader_{item.pk}_{j}')
+                UserProfile.objects.create(user=reader)
+                Comment.objects.create(user=reader, news_item=item, text=f'Комментарий {j}')
+
+    def count_landing_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('news:landing'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_query_count_is_constant(self):
+        self.create_news(2)
+        small, _ = self.count_landing_queries()
+
+        self.create_news(10)
+        large, response = self.count_landing_queries()
+
+        self.assertLessEqual(small, self.QUERY_BUDGET)
+        self.assertEqual(small, large)
+
+        items = list(response.context['base_news'])
+        for item in items:
+            self.assertEqual(item.comment_count, item.comments.count())
+            self.assertLessEqual(len(item.latest_comments), 3)
+
+
+class CommentStatsTests(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username='stats_reader')
+        UserProfile.objects.create(user=self.reader)
+        self.item = NewsItem.objects.create(title='Счётчик', text='Текст')
+
+    def test_counters_follow_comments(self):
+        comments = [Comment.objects.create(user=self.reader, news_item=self.item, text=str(i)) for i in range(5)]
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.comment_count, 5)
+        self.assertEqual(self.item.latest_comment_ids, [c.pk for c in comments[:1:-1]])
+        self.assertEqual(self.item.last_comment_at, comments[-1].created_at)
+
+        comments[-1].delete()
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.comment_count, 4)
+        self.assertEqual(self.item.latest_comment_ids, [c.pk for c in comments[3:0:-1]])
+
+    def test_stale_save_keeps_counters_and_reconcile_fixes_drift(self):
+        from .comment_stats import reconcile
+
+        stale = NewsItem.objects.get(pk=self.item.pk)
+        Comment.objects.create(user=self.reader, news_item=self.item, text='новый')
+        stale.title = 'Новый заголовок'
+        stale.save()
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.comment_count, 1)
+
+        NewsItem.objects.filter(pk=self.item.pk).update(comment_count=42, latest_comment_ids=[])
+        self.assertEqual(reconcile(), 1)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.comment_count, 1)
+        self.assertEqual(len(self.item.latest_comment_ids), 1)
+
+
+class NewsFeedPaginationTests(TestCase):
+    def test_cursor_pages_cover_feed_without_gaps(self):
+        reporter = Reporter.objects.create(user=User.objects.create_user(username='feed_reporter'))
+        for i in range(25):
+            NewsItem.objects.create(reporter=reporter, title=f'Лента {i}', text='Текст')
+        expected = list(NewsItem.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        with self.settings(NEWS_FEED_PAGE_SIZE=10):
+            response = self.client.get(reverse('news:landing'))
+            seen = [item.id for item in response.context['base_news']]
+            cursor = response.context['next_cursor']
+            while cursor:
+                data = self.client.get(reverse('news:news_feed'), {'cursor': cursor}).json()
+                seen.extend(item['id'] for item in data['items'])
+                cursor = data['next_cursor']
+
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('news:news_feed'), {'cursor': 'мусор'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CommentThreadPaginationTests(TestCase):
+    def test_newest_page_first_then_older_pages(self):
+        reader = User.objects.create_user(username='thread_reader')
+        UserProfile.objects.create(user=reader)
+        item = NewsItem.objects.create(title='Ветка', text='Текст')
+        for i in range(12):
+            Comment.objects.create(user=reader, news_item=item, text=f'Комментарий {i}')
+        expected = list(item.comments.order_by('created_at', 'id').values_list('id', flat=True))
+        self.client.force_login(reader)
+
+        with self.settings(NEWS_COMMENTS_PAGE_SIZE=5):
+            response = self.client.get(reverse('news:news_comments', args=[item.id]))
+            seen = [comment.id for comment in response.context['comments']]
+            self.assertEqual(seen, expected[-5:])
+            cursor = response.context['older_cursor']
+            html = self.client.get(reverse('news:older_comments', args=[item.id]), {'cursor': cursor}).json()['html']
+            self.assertIn(f'data-comment-id="{expected[-6]}"', html)
+            while cursor:
+                data = self.client.get(
+                    reverse('news:older_comments', args=[item.id]), {'cursor': cursor, 'format': 'json'}
+                ).json()
+                self.assertNotIn('html', data)
+                seen = [comment['id'] for comment in data['items']] + seen
+                cursor = data['next_cursor']
+
+        self.assertEqual(seen, expected)
+
+
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.item = NewsItem.objects.create(title='Просмотры', text='Текст')
+        self.url = reverse('news:increment_views', args=[self.item.pk])
+
+    def test_views_are_deduplicated_and_flushed_in_batch(self):
+        from .counters import view_buffer
+
+        first = self.client.post(self.url, REMOTE_ADDR='10.0.0.1').json()
+        repeat = self.client.post(self.url, REMOTE_ADDR='10.0.0.1').json()
+        other = self.client.post(self.url, REMOTE_ADDR='10.0.0.2').json()
+
+        self.assertEqual((first['views'], repeat['views'], other['views']), (1, 1, 2))
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.views, 0)
+
+        view_buffer.flush()
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.views, 2)
+
+    def test_stale_save_keeps_flushed_views(self):
+        from .counters import flush_view_deltas
+
+        stale = NewsItem.objects.get(pk=self.item.pk)
+        flush_view_deltas({self.item.pk: 7})
+        stale.title = 'Новый заголовок'
+        stale.save()
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.title, self.item.views), ('Новый заголовок', 7))
+
+    def test_unknown_news_item(self):
+        response = self.client.post(reverse('news:increment_views', args=[10 ** 6]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ViewAnalyticsTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.hot = NewsItem.objects.create(title='Горячая', text='Текст')
+        self.cold = NewsItem.objects.create(title='Холодная', text='Текст')
+
+    def test_flush_upserts_hour_buckets_and_decays_trend(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .analytics import bucket_start, half_life, record_views
+        from .counters import flush_view_deltas
+        from .models import NewsItemTrend, NewsItemViewBucket
+
+        flush_view_deltas({self.hot.pk: 3, 10 ** 6: 1})
+        flush_view_deltas({self.hot.pk: 2})
+        bucket = NewsItemViewBucket.objects.get(news_item=self.hot)
+        self.assertEqual((bucket.resolution, bucket.count), ('hour', 5))
+        self.assertEqual(bucket.bucket, bucket_start(timezone.now()))
+        self.hot.refresh_from_db()
+        self.assertEqual(self.hot.views, 5)
+
+        trend = NewsItemTrend.objects.get(pk=self.hot.pk)
+        record_views({self.hot.pk: 1}, trend.updated_at + timedelta(seconds=half_life()))
+        trend.refresh_from_db()
+        self.assertAlmostEqual(trend.score, 5 * 0.5 + 1, places=4)
+
+    def test_rollup_folds_old_hours_into_days(self):
+        from datetime import datetime, timedelta, timezone as dt_timezone
+        from .analytics import rollup
+        from .models import NewsItemViewBucket
+
+        day = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        for hour, count in ((1, 4), (5, 6)):
+            NewsItemViewBucket.objects.create(news_item=self.hot, bucket=day + timedelta(hours=hour), count=count)
+        recent = NewsItemViewBucket.objects.create(news_item=self.hot, bucket=day + timedelta(days=9), count=1)
+
+        self.assertEqual(rollup(now=day + timedelta(days=10)), (2, 1, 0))
+        daily = NewsItemViewBucket.objects.get(resolution='day')
+        self.assertEqual((daily.bucket, daily.count), (day, 10))
+        self.assertTrue(NewsItemViewBucket.objects.filter(pk=recent.pk).exists())
+
+    def test_trending_endpoint_and_landing_block(self):
+        from .counters import flush_view_deltas
+
+        flush_view_deltas({self.hot.pk: 10, self.cold.pk: 1})
+        items = self.client.get(reverse('news:trending_api'), {'limit': 2}).json()['items']
+        self.assertEqual([item['id'] for item in items], [self.hot.pk, self.cold.pk])
+
+        response = self.client.get(reverse('news:landing'))
+        self.assertContains(response, 'class="trending-list"')
+        self.assertContains(response, reverse('news:news_comments', args=[self.hot.pk]))
+
+
+class ReporterStatsTests(TestCase):
+    def setUp(self):
+        self.first = Reporter.objects.create(user=User.objects.create_user(username='first_reporter'))
+        self.second = Reporter.objects.create(user=User.objects.create_user(username='second_reporter'))
+        self.reader = User.objects.create_user(username='stats_reader')
+
+    def stats(self, reporter):
+        from .models import ReporterStats
+        return ReporterStats.objects.get(pk=reporter.pk)
+
+    def test_incremental_updates_match_full_refresh(self):
+        from .counters import flush_view_deltas
+        from .reporter_stats import refresh_all
+
+        self.assertEqual(self.stats(self.first).post_count, 0)
+        item = NewsItem.objects.create(reporter=self.first, title='Первая', text='Текст', views=2)
+        other = NewsItem.objects.create(reporter=self.first, title='Вторая', text='Текст')
+        comment = Comment.objects.create(user=self.reader, news_item=item, text='Комментарий')
+        Comment.objects.create(user=self.reader, news_item=other, text='Ещё')
+        flush_view_deltas({item.pk: 5, other.pk: 1})
+
+        stats = self.stats(self.first)
+        self.assertEqual((stats.post_count, stats.total_views, stats.comments_received), (2, 8, 2))
+        self.assertEqual(stats.last_post_at, NewsItem.objects.get(pk=other.pk).created_at)
+
+        comment.delete()
+        item.reporter = self.second
+        item.save()
+        other.delete()
+        first, second = self.stats(self.first), self.stats(self.second)
+        self.assertEqual((first.post_count, first.total_views, first.comments_received), (0, 0, 0))
+        self.assertIsNone(first.last_post_at)
+        self.assertEqual((second.post_count, second.total_views, second.comments_received), (1, 7, 0))
+
+        snapshot = [(s.post_count, s.total_views, s.comments_received) for s in (first, second)]
+        refresh_all()
+        self.assertEqual(
+            [(s.post_count, s.total_views, s.comments_received) for s in (self.stats(self.first), self.stats(self.second))],
+            snapshot,
+        )
+
+    def test_page_api_and_admin_read_stats(self):
+        item = NewsItem.objects.create(reporter=self.first, title='Заметка репортёра', text='Текст', views=3)
+        Comment.objects.create(user=self.reader, news_item=item, text='Комментарий')
+
+        response = self.client.get(reverse('news:reporter', args=[self.first.pk]))
+        self.assertContains(response, 'Заметка репортёра')
+
+        data = self.client.get(reverse('news:reporter_api', args=[self.first.pk])).json()
+        self.assertEqual(data['stats']['post_count'], 1)
+        self.assertEqual(data['stats']['comments_received'], 1)
+        self.assertEqual(data['recent_posts'][0]['id'], item.pk)
+
+        data = self.client.get(reverse('news:reporters_api'), {'order': 'views'}).json()
+        self.assertEqual(data['results'][0]['id'], self.first.pk)
+        self.assertEqual(self.client.get(reverse('news:reporters_api'), {'order': 'x'}).status_code, 400)
+
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='secret-pass-123')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:news_reporter_changelist'), {'o': '5'})
+        self.assertContains(response, 'column-total_views')
+
+
+class PushTests(TestCase):
+    def setUp(self):
+        import asyncio
+
+        from .push import get_broker
+
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.broker = get_broker()
+        self.user = User.objects.create_user(username='push_reader')
+        self.profile = UserProfile.objects.create(user=self.user)
+        self.item = NewsItem.objects.create(title='Прямой эфир', text='Текст')
+
+    def subscribe(self, channel):
+        async def subscribe():
+            return self.broker.subscribe(channel)
+        return self.loop.run_until_complete(subscribe())
+
+    def receive(self, subscription):
+        return self.loop.run_until_complete(subscription.get(timeout=1))
+
+    def test_new_comment_is_pushed_after_commit(self):
+        from .push import comments_channel
+
+        channel = comments_channel(self.item.pk)
+        with self.subscribe(channel) as subscription:
+            with self.captureOnCommitCallbacks(execute=True):
+                comment = Comment.objects.create(user=self.user, news_item=self.item, text='Первый!')
+            message = self.receive(subscription)
+        self.assertEqual(message['event'], 'comment')
+        self.assertEqual(message['data']['id'], comment.pk)
+        self.assertIn(f'data-comment-id="{comment.pk}"', message['data']['html'])
+        self.assertIn('Первый!', message['data']['html'])
+        self.assertFalse(self.broker.has_subscribers(channel))
+
+    def test_status_change_is_pushed(self):
+        from .push import status_channel
+
+        with self.subscribe(status_channel(self.user.pk)) as subscription:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.profile.status = 'idle'
+                self.profile.save()
+            message = self.receive(subscription)
+        self.assertEqual(message['event'], 'status')
+        self.assertEqual(message['data']['status'], 'idle')
+
+    def test_streams_need_asgi(self):
+        self.client.force_login(self.user)
+        for url in (reverse('news:status_stream'), reverse('news:comments_stream', args=[self.item.pk])):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 501)
+            self.assertEqual(response.json()['status'], 'error')
+
+
+class PresenceTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='presence', password='secret-pass-123')
+        self.profile = UserProfile.objects.create(user=self.user)
+        self.client.force_login(self.user)
+
+    def test_heartbeat_does_not_write_to_database(self):
+        from .presence import last_seen_buffer
+
+        before = self.profile.last_activity
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse('news:update_activity'))
+        writes = [q for q in ctx.captured_queries if q['sql'].startswith(('UPDATE', 'INSERT'))]
+        self.assertEqual(writes, [])
+        self.assertTrue(self.profile.is_online())
+
+        last_seen_buffer.flush()
+        self.profile.refresh_from_db()
+        self.assertGreater(self.profile.last_activity, before)
+
+    def test_status_payload_is_invalidated_on_profile_change(self):
+        self.assertEqual(self.client.get(reverse('news:get_user_status')).json()['status'], 'online')
+        self.client.post(reverse('news:update_status'), {'status': 'dnd'})
+        self.assertEqual(self.client.get(reverse('news:get_user_status')).json()['status'], 'dnd')
+
+
+class AsyncEndpointTests(TestCase):
+    """Опрашиваемые endpoint'ы — async-view и работают через ASGI-обработчик."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='async', password='secret-pass-123')
+        self.profile = UserProfile.objects.create(user=self.user)
+        self.item = NewsItem.objects.create(title='Async', text='Текст')
+        self.async_client.force_login(self.user)
+
+    def test_views_are_coroutines(self):
+        from asgiref.sync import iscoroutinefunction
+        from . import views
+
+        for view in (views.get_user_status, views.update_activity, views.update_status, views.increment_views):
+            self.assertTrue(iscoroutinefunction(view), view.__name__)
+
+    async def test_status_roundtrip(self):
+        response = await self.async_client.get(reverse('news:get_user_status'))
+        self.assertEqual(response.json()['status'], 'online')
+
+        await self.async_client.post(reverse('news:update_status'), {'status': 'idle'})
+        response = await self.async_client.get(reverse('news:get_user_status'))
+        self.assertEqual(response.json()['status'], 'idle')
+
+    async def test_heartbeat_and_views(self):
+        from asgiref.sync import sync_to_async
+        from .counters import view_buffer
+        from .presence import last_seen, last_seen_buffer
+
+        response = await self.async_client.post(reverse('news:update_activity'))
+        self.assertEqual(response.json()['status'], 'success')
+        self.assertIsNotNone(last_seen(self.user.pk))
+
+        url = reverse('news:increment_views', args=[self.item.pk])
+        self.assertEqual((await self.async_client.post(url)).json()['views'], 1)
+        self.assertEqual((await self.async_client.post(url)).json()['views'], 1)
+        self.assertEqual(view_buffer.pending(self.item.pk), 1)
+
+        missing = await self.async_client.post(reverse('news:increment_views', args=[10 ** 6]))
+        self.assertEqual(missing.status_code, 404)
+
+        await sync_to_async(view_buffer.flush)()
+        await sync_to_async(last_seen_buffer.flush)()
+        await self.item.arefresh_from_db()
+        self.assertEqual(self.item.views, 1)
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.item = NewsItem.objects.create(title='Исходный заголовок', text='Текст')
+
+    def test_card_is_reused_until_news_item_changes(self):
+        self.assertContains(self.client.get(reverse('news:landing')), 'Исходный заголовок')
+
+        # update() не шлёт сигналов — значит, карточка берётся из кэша
+        NewsItem.objects.filter(pk=self.item.pk).update(title='Тихая правка')
+        self.assertContains(self.client.get(reverse('news:landing')), 'Исходный заголовок')
+
+        self.item.title = 'Новый заголовок'
+        self.item.save()
+        self.assertContains(self.client.get(reverse('news:landing')), 'Новый заголовок')
+
+
+class ConditionalLandingTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_not_modified_until_content_changes(self):
+        response = self.client.get(reverse('news:landing'))
+        etag = response['ETag']
+        self.assertIn('public', response['Cache-Control'])
+
+        response = self.client.get(reverse('news:landing'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        NewsItem.objects.create(title='Свежая новость', text='Текст')
+        response = self.client.get(reverse('news:landing'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Свежая новость')
+
+    def test_etag_is_computed_once_per_request(self):
+        from unittest import mock
+
+        from . import http_cache
+
+        self.client.get(reverse('news:landing'))
+        with mock.patch.object(http_cache, '_etag', wraps=http_cache._etag) as etag:
+            response = self.client.get(reverse('news:landing'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(etag.call_count, 1)
+
+
+class SearchTests(TestCase):
+    def test_russian_word_forms_match_and_index_follows_changes(self):
+        item = NewsItem.objects.create(title='Встреча лидеров на саммите', text='Обсуждали торговые отношения.')
+
+        data = self.client.get(reverse('news:search_api'), {'q': 'торговых отношениях'}).json()
+        self.assertIn(item.id, [result['id'] for result in data['results']])
+
+        item.text = 'Обсуждали климат.'
+        item.save()
+        data = self.client.get(reverse('news:search_api'), {'q': 'торговых'}).json()
+        self.assertNotIn(item.id, [result['id'] for result in data['results']])
+
+        item.delete()
+        data = self.client.get(reverse('news:search_api'), {'q': 'лидеров'}).json()
+        self.assertNotIn(item.id, [result['id'] for result in data['results']])
+
+    def test_admin_search_is_not_capped(self):
+        from .search import rebuild_index
+
+        NewsItem.objects.bulk_create([NewsItem(title=f'Фестиваль {i}', text='Текст') for i in range(1005)])
+        NewsItem.objects.create(title='Погода', text='Текст')
+        rebuild_index()
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='secret-pass-123')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:news_newsitem_changelist'), {'q': 'Фестиваль'})
+        self.assertEqual(response.context['cl'].result_count, 1005)
+
+    def test_search_page_renders(self):
+        response = self.client.get(reverse('news:search'), {'q': 'Аляска'})
+        self.assertEqual(response.status_code, 200)
+
+
+class CommentIngestTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='archive_author')
+        self.first = NewsItem.objects.create(title='Первая', text='Текст')
+        self.second = NewsItem.objects.create(title='Вторая', text='Текст')
+
+    def lines(self):
+        import json
+
+        records = [
+            {'news_item': self.first.pk, 'user': self.author.pk, 'text': 'Старый архивный отзыв',
+             'created_at': '2015-03-01T10:00:00+00:00'},
+            {'news_item': self.first.pk, 'username': 'archive_author', 'text': 'Второй',
+             'created_at': '2015-03-02T10:00:00+00:00'},
+            {'news_item': self.second.pk, 'user': self.author.pk, 'text': 'Третий'},
+            {'news_item': 10 ** 6, 'user': self.author.pk, 'text': 'Нет новости'},
+            {'news_item': self.second.pk, 'username': 'nobody', 'text': 'Нет автора'},
+            {'news_item': self.second.pk, 'user': self.author.pk, 'text': '   '},
+        ]
+        return [json.dumps(record) for record in records] + ['', '{broken']
+
+    def test_ingest_in_chunks_updates_stats_and_search(self):
+        from .ingest import ingest_comments
+
+        stats = ingest_comments(self.lines(), chunk_size=2, batch_size=2)
+
+        self.assertEqual((stats.created, stats.skipped, stats.last_line), (3, 4, 8))
+        self.assertEqual(sorted(error['line'] for error in stats.errors), [4, 5, 6, 8])
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.comment_count, 2)
+        self.assertEqual(self.first.last_comment_at.year, 2015)
+        self.assertEqual(
+            self.first.latest_comment_ids,
+            list(Comment.objects.filter(news_item=self.first).order_by('-created_at').values_list('pk', flat=True)),
+        )
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.comment_count, 1)
+
+        data = self.client.get(reverse('news:search_api'), {'q': 'архивный', 'kind': 'comment'}).json()
+        self.assertEqual(data['total'], 1)
+
+    def test_dry_run_and_resume(self):
+        from .ingest import ingest_comments
+
+        self.assertEqual(ingest_comments(self.lines(), dry_run=True).created, 3)
+        self.assertFalse(Comment.objects.filter(user=self.author).exists())
+
+        stats = ingest_comments(self.lines(), skip_lines=2)
+        self.assertEqual(stats.created, 1)
+
+    def test_endpoint_is_staff_only(self):
+        url = reverse('news:ingest_comments')
+        body = '\n'.join(self.lines())
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.post(url, body, content_type='application/x-ndjson').status_code, 403)
+
+        self.author.is_staff = True
+        self.author.save()
+        data = self.client.post(url, body, content_type='application/x-ndjson').json()
+        self.assertEqual((data['created'], data['skipped']), (3, 4))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.staff = User.objects.create_user(username='exporter', is_staff=True)
+        UserProfile.objects.create(user=self.staff)
+        self.old = NewsItem.objects.create(title='Старая', text='Текст')
+        from datetime import datetime, timezone
+        NewsItem.objects.filter(pk=self.old.pk).update(created_at=datetime(2020, 1, 15, 12, tzinfo=timezone.utc))
+        self.new = NewsItem.objects.create(title='Новая, с запятой', text='Текст', views=5)
+        Comment.objects.create(
+            user=self.staff, news_item=self.new, text='Голосовое', is_voice_message=True,
+            audio_file='voice_messages/a.webm', audio_duration=12,
+        )
+
+    def test_rows_are_streamed_with_date_filter(self):
+        from .export import export_rows, parse_bound
+
+        ids = [row['id'] for row in export_rows('news', until=parse_bound('2020-01-15', upper=True))]
+        self.assertEqual(ids, [self.old.pk])
+        ids = [row['id'] for row in export_rows('news', since=parse_bound('2021-01-01'), chunk_size=1)]
+        self.assertIn(self.new.pk, ids)
+        self.assertNotIn(self.old.pk, ids)
+
+        comment = next(row for row in export_rows('comments') if row['user'] == 'exporter')
+        self.assertEqual(comment['audio_duration'], 12)
+        self.assertTrue(comment['audio_file_url'].endswith('voice_messages/a.webm'))
+        self.assertEqual(comment['image_url'], '')
+
+    def test_csv_cells_cannot_become_formulas(self):
+        import csv
+
+        from .export import export_rows, render
+
+        item = NewsItem.objects.create(title='=HYPERLINK("http://evil.example")', text='Текст')
+        Comment.objects.create(user=self.staff, news_item=item, text='@SUM(1+1)')
+        table = list(csv.reader(''.join(render('news', export_rows('news'), 'csv')).splitlines()))
+        row = next(row for row in table if row[0] == str(item.pk))
+        self.assertEqual(row[1], '\'=HYPERLINK("http://evil.example")')
+        self.assertEqual(row[4], '0')
+        table = list(csv.reader(''.join(render('comments', export_rows('comments'), 'csv')).splitlines()))
+        self.assertIn("'@SUM(1+1)", [row[4] for row in table])
+
+    def test_endpoint_formats_and_access(self):
+        import csv
+        import json
+
+        url = reverse('news:export', args=['news'])
+        self.client.force_login(self.staff)
+        self.client.post(reverse('news:update_activity'))
+
+        response = self.client.get(url, {'since': '2021-01-01'})
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertIn(self.new.pk, [row['id'] for row in rows])
+
+        response = self.client.get(url, {'format': 'csv'})
+        table = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(table[0][:2], ['id', 'title'])
+        self.assertIn('Новая, с запятой', [row[1] for row in table[1:]])
+
+        profiles = self.client.get(reverse('news:export', args=['profiles']))
+        rows = [json.loads(line) for line in b''.join(profiles.streaming_content).decode().splitlines()]
+        self.assertTrue(next(row for row in rows if row['username'] == 'exporter')['online'])
+
+        self.assertEqual(self.client.get(url, {'since': 'вчера'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('news:export', args=['users'])).status_code, 400)
+        self.staff.is_staff = False
+        self.staff.save()
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class WaveformPeaksTests(TestCase):
+    def test_peaks_are_normalized_per_bar(self):
+        from array import array
+
+        from .media import compute_peaks, numpy_available
+
+        if not numpy_available():
+            self.skipTest('NumPy не установлен')
+        samples = array('h', [0] * 100 + [1000] * 100 + [-2000] * 100 + [0] * 100)
+        self.assertEqual(compute_peaks(samples.tobytes(), bars=4), [0, 50, 100, 0])
+        self.assertEqual(compute_peaks(b'', bars=4), [0, 0, 0, 0])
+
+
+class MediaDerivativeTests(TestCase):
+    def setUp(self):
+        import tempfile
+
+        from django.core.cache import cache
+        from django.test import override_settings
+
+        cache.clear()
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_cached_pages_switch_to_avatar_thumbnail(self):
+        import io
+
+        from django.core.files.base import ContentFile
+        from PIL import Image
+
+        from .media import process_avatar
+
+        user = User.objects.create_user(username='avatar_reporter')
+        NewsItem.objects.create(reporter=Reporter.objects.create(user=user), title='С аватаром', text='Текст')
+        buffer = io.BytesIO()
+        Image.new('RGB', (400, 400), 'red').save(buffer, 'PNG')
+        profile = UserProfile.objects.create(user=user)
+        profile.avatar.save('avatar.png', ContentFile(buffer.getvalue()))
+
+        self.assertContains(self.client.get(reverse('news:landing')), profile.avatar.url)
+        process_avatar(profile.pk)
+        profile.refresh_from_db()
+        response = self.client.get(reverse('news:landing'))
+        self.assertContains(response, profile.avatar_thumb.url)
+        self.assertNotContains(response, profile.avatar.url)
+
+    def test_profile_edit_keeps_avatar_caches(self):
+        from django.core.cache import cache
+
+        from .fragments import get_versions
+        from .http_cache import CONTENT_KEY
+
+        user = User.objects.create_user(username='bio_author')
+        profile = UserProfile.objects.create(user=user, avatar='avatars/a.png')
+        version = get_versions('avatar', [user.pk])[user.pk]
+        stamp = cache.get(CONTENT_KEY)
+
+        profile.bio = 'Новая биография'
+        profile.save()
+        self.assertEqual(get_versions('avatar', [user.pk])[user.pk], version)
+        self.assertEqual(cache.get(CONTENT_KEY), stamp)
+
+        profile.avatar = 'avatars/b.png'
+        profile.save()
+        self.assertNotEqual(get_versions('avatar', [user.pk])[user.pk], version)
+
+    def test_voice_duration_from_client_is_ignored(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        user = User.objects.create_user(username='voice_author')
+        UserProfile.objects.create(user=user)
+        item = NewsItem.objects.create(title='Голосовые', text='Текст')
+        self.client.force_login(user)
+        response = self.client.post(reverse('news:add_comment', args=[item.pk]), {
+            'audio': SimpleUploadedFile('voice.webm', b'not really audio', content_type='audio/webm'),
+            'voice_duration': '9999',
+        })
+        self.assertEqual(response.json()['status'], 'success')
+        comment = Comment.objects.get(news_item=item)
+        self.assertTrue(comment.is_voice_message)
+        self.assertIsNone(comment.audio_duration)
+
+    def test_missing_ffmpeg_is_reported_by_system_check(self):
+        from unittest import mock
+
+        from .checks import check_media_tools
+
+        with mock.patch('shutil.which', return_value=None):
+            self.assertEqual([message.id for message in check_media_tools(None)], ['news.W001'])
+        with self.settings(NEWS_FFMPEG_BINARY='/opt/ffmpeg', NEWS_FFPROBE_BINARY='/opt/ffprobe'):
+            self.assertEqual(check_media_tools(None), [])
+
+    def test_sync_task_failure_is_logged_not_raised(self):
+        from .tasks import enqueue
+
+        def broken(pk):
+            raise ValueError(pk)
+
+        with self.settings(NEWS_TASKS_MODE='sync'), self.assertLogs('news.tasks', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                enqueue(broken, 1)
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        import tempfile
+
+        from django.core.files.base import ContentFile
+        from django.test import override_settings
+
+        from .storage import ContentHashedStorage
+
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.payload = bytes(range(256)) * 40
+        self.name = ContentHashedStorage().save('voice_messages/запись.webm', ContentFile(self.payload))
+        self.url = '/media/' + self.name
+
+    def test_upload_name_is_content_hash(self):
+        import hashlib
+
+        self.assertEqual(self.name, f"voice_messages/{hashlib.sha256(self.payload).hexdigest()[:32]}.webm")
+
+    def test_full_response_is_immutable(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.payload)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_range_request(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.payload)}')
+        self.assertEqual(b''.join(response.streaming_content), self.payload[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.payload[-10:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.payload)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_derivatives_are_not_immutable(self):
+        import os
+
+        from django.core.files.base import ContentFile
+
+        from .media import derivative_name
+        from .storage import ContentHashedStorage, is_content_hashed
+
+        self.assertTrue(is_content_hashed(self.name))
+        thumb = derivative_name(self.name, 'webp')
+        self.assertFalse(is_content_hashed(thumb))
+        super(ContentHashedStorage, ContentHashedStorage()).save(thumb, ContentFile(b'webp'))
+        response = self.client.get('/media/' + thumb)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertNotEqual(response['ETag'], f'"{os.path.basename(self.name).split(".")[0]}"')
+
+    def test_range_on_empty_file(self):
+        from django.core.files.base import ContentFile
+
+        from .storage import ContentHashedStorage
+
+        url = '/media/' + ContentHashedStorage().save('voice_messages/пусто.webm', ContentFile(b''))
+        for header in ('bytes=-10', 'bytes=0-'):
+            response = self.client.get(url, HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 416)
+            self.assertEqual(response['Content-Range'], 'bytes */0')
+
+    def test_path_traversal(self):
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+
+
+class QueryPlanTests(TestCase):
+    """Горячие запросы должны идти по своим индексам (news.benchmarks.queries)."""
+
+    def test_hot_queries_use_expected_indexes(self):
+        from .benchmarks.queries import run_queries
+        from .benchmarks.seed import seed_dataset
+
+        sample = seed_dataset(news=30, comments_per_news=3, users=10, reporters=3)
+        for result in run_queries(sample, repeat=1):
+            with self.subTest(query=result['name']):
+                self.assertTrue(result['uses_index'], result['plan'])
+
+
+class SQLiteProfileTests(TestCase):
+    def test_connection_gets_profile_pragmas(self):
+        from .db import SQLITE_PROFILES, current_pragmas
+
+        if connection.vendor != 'sqlite':
+            self.skipTest('Профили PRAGMA только для SQLite')
+        pragmas = current_pragmas(connection)
+        self.assertEqual(pragmas['busy_timeout'], SQLITE_PROFILES['production']['busy_timeout'])
+        self.assertEqual(pragmas['cache_size'], SQLITE_PROFILES['production']['cache_size'])
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        from .routers import start_request
+
+        self.addCleanup(start_request)
+        start_request()
+
+    def test_reads_go_to_replica_until_write(self):
+        from .routers import PrimaryReplicaRouter
+
+        router = PrimaryReplicaRouter()
+        with self.settings(NEWS_DB_REPLICAS=['replica']):
+            self.assertEqual(router.db_for_read(NewsItem), 'replica')
+            self.assertIsNone(router.db_for_read(User))
+            self.assertEqual(router.db_for_write(Comment), 'default')
+            self.assertEqual(router.db_for_read(NewsItem), 'default')
+        self.assertEqual(router.db_for_read(NewsItem), 'default')
+
+    def test_unreplicated_writes_and_bare_posts_do_not_pin(self):
+        from django.contrib.sessions.models import Session
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+
+        from .middleware import ReplicaPinMiddleware
+        from .routers import PIN_COOKIE, PrimaryReplicaRouter, is_pinned
+
+        def session_view(request):
+            self.assertIsNone(PrimaryReplicaRouter().db_for_write(Session))
+            self.assertIsNone(PrimaryReplicaRouter().db_for_write(User))
+            self.assertFalse(is_pinned())
+            return HttpResponse()
+
+        factory = RequestFactory()
+        with self.settings(NEWS_DB_REPLICAS=['replica']):
+            self.assertNotIn(PIN_COOKIE, ReplicaPinMiddleware(session_view)(factory.get('/')).cookies)
+            self.assertNotIn(PIN_COOKIE, ReplicaPinMiddleware(session_view)(factory.post('/')).cookies)
+
+    def test_pin_cookie_after_write(self):
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+
+        from .middleware import ReplicaPinMiddleware
+        from .routers import PIN_COOKIE, PrimaryReplicaRouter, is_pinned
+
+        def write_view(request):
+            PrimaryReplicaRouter().db_for_write(Comment)
+            return HttpResponse()
+
+        pinned = []
+
+        def read_view(request):
+            pinned.append(is_pinned())
+            return HttpResponse()
+
+        factory = RequestFactory()
+        with self.settings(NEWS_DB_REPLICAS=['replica']):
+            response = ReplicaPinMiddleware(write_view)(factory.get('/'))
+            self.assertIn(PIN_COOKIE, response.cookies)
+            self.assertNotIn(PIN_COOKIE, ReplicaPinMiddleware(read_view)(factory.get('/')).cookies)
+
+            request = factory.get('/')
+            request.COOKIES[PIN_COOKIE] = '1'
+            ReplicaPinMiddleware(read_view)(request)
+        self.assertEqual(pinned, [False, True])
+
+
+class AboutPageCacheTests(TestCase):
+    def test_page_and_stats_are_served_from_cache(self):
+        from .about import about_context, invalidate_about_page
+        from .models import AboutPage
+
+        invalidate_about_page()
+        page = AboutPage.objects.first() or AboutPage.objects.create(title='О нас', description='Текст')
+        about_context()
+        with self.assertNumQueries(0):
+            context = about_context()
+        self.assertEqual(context['about_page'].pk, page.pk)
+        self.assertEqual(context['about_stats']['posts'], NewsItem.objects.count())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            page.title = 'Новый заголовок'
+            page.save()
+        self.assertEqual(about_context()['about_page'].title, 'Новый заголовок')
+
+    def test_missing_page_is_cached_as_none(self):
+        from .about import get_about_page, invalidate_about_page
+        from .models import AboutPage
+
+        AboutPage.objects.all().delete()
+        invalidate_about_page()
+        self.assertIsNone(get_about_page())
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_about_page())
+
+
+class InstrumentationTests(TestCase):
+    def test_server_timing_and_metrics(self):
+        from django.core.cache import cache
+        cache.clear()
+        with self.settings(NEWS_METRICS_SAMPLE_RATE=1.0, NEWS_METRICS_SERVER_TIMING=True):
+            response = self.client.get(reverse('news:landing'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('cache;desc=', response['Server-Timing'])
+        self.assertNotIn('tpl;dur=0.0', response['Server-Timing'])
+        self.assertNotIn('hit 0 miss 0', response['Server-Timing'])
+
+        metrics = self.client.get(reverse('news:metrics')).content.decode()
+        self.assertIn('news_request_duration_seconds_bucket{view="news:landing",le="+Inf"}', metrics)
+        self.assertIn('news_db_queries_total{view="news:landing"}', metrics)
+
+    def test_sampling_off(self):
+        with self.settings(NEWS_METRICS_SAMPLE_RATE=0, NEWS_METRICS_SERVER_TIMING=True):
+            response = self.client.get(reverse('news:landing'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_probes_come_from_configured_backends(self):
+        from django.core.cache import cache
+        from django.core.cache.backends.locmem import LocMemCache
+        from django.template.backends.django import Template
+
+        from .instrumentation import RequestStats, _current
+
+        self.assertFalse(hasattr(Template.render, '__wrapped__'))
+        self.assertFalse(hasattr(LocMemCache.get, '__wrapped__'))
+        cache.set('probe:a', 1)
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            cache.get('probe:a')
+            cache.get_many(['probe:a', 'probe:b'])
+        finally:
+            _current.reset(token)
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (2, 1))
+
+    def test_metrics_hidden_from_outside(self):
+        response = self.client.get(reverse('news:metrics'), REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, 404)
+
+
+class BenchmarkHelpersTests(SimpleTestCase):
+    def test_percentile_nearest_rank(self):
+        from .benchmarks.endpoints import percentile
+
+        ordered = list(range(1, 101))
+        self.assertEqual(percentile(ordered, 0.50), 50)
+        self.assertEqual(percentile(ordered, 0.95), 95)
+        self.assertEqual(percentile(ordered, 0.99), 99)
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertIsNone(percentile([], 0.5))
@@ -1,17 +1,30 @@
 from django.urls import path, reverse_lazy
 from django.contrib.auth import views as auth_views
 from . import views
+from .instrumentation import metrics_view
 
 app_name = 'news'
 
 urlpatterns = [
     path('', views.landing_page, name='landing'),
+    path('feed/', views.news_feed, name='news_feed'),
+    path('search/', views.search_page, name='search'),
+    path('api/search/', views.search_api, name='search_api'),
+    path('api/trending/', views.trending_api, name='trending_api'),
+    path('reporters/<int:reporter_id>/', views.reporter_page, name='reporter'),
+    path('api/reporters/', views.reporters_api, name='reporters_api'),
+    path('api/reporters/<int:reporter_id>/', views.reporter_api, name='reporter_api'),
+    path('api/comments/ingest/', views.ingest_comments_api, name='ingest_comments'),
+    path('api/export/<str:name>/', views.export_data, name='export'),
     path('register/', views.register_user, name='register'),
     path('login/', views.login_user, name='login'),
     path('logout/', views.logout_user, name='logout'),
+    path('metrics', metrics_view, name='metrics'),
     
     path('<int:news_id>/comments/', views.news_comments, name='news_comments'),
+    path('<int:news_id>/comments/older/', views.older_comments, name='older_comments'),
     path('<int:news_id>/add_comment/', views.add_comment, name='add_comment'),
+    path('<int:news_id>/comments/stream/', views.comments_stream, name='comments_stream'),
     path('news/<int:news_id>/increment_views/', views.increment_views, name='increment_views'),
 
     path('profile/', views.profile_view, name='profile'),
@@ -19,6 +32,7 @@ urlpatterns = [
     path('update_activity/', views.update_activity, name='update_activity'),
     path('update_status/', views.update_status, name='update_status'),
     path('get_user_status/', views.get_user_status, name='get_user_status'),
+    path('status/stream/', views.status_stream, name='status_stream'),
         
     path('password_reset/', 
          auth_views.PasswordResetView.as_view(
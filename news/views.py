@@ -1,4 +1,5 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User as AuthUser
 from django.contrib.auth import login, logout
@@ -7,88 +8,148 @@ from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 from django.contrib import messages
 from django.views.decorators.http import require_POST, require_GET
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.template.response import TemplateResponse
-import datetime
 from django.utils import timezone
-from .models import NewsItem, AboutPage, Reporter, Comment, UserProfile
+from .models import NewsItem, AboutPage, Reporter, ReporterStats, Comment, UserProfile
 from django.contrib.auth.decorators import login_required
 import json
 from django.template.loader import render_to_string
 from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
 from .forms import EmailUserCreationForm, UserProfileForm
+from .pagination import keyset_page, InvalidCursor
+from .about import about_context
+from .comment_stats import attach_latest_comments
+from .counters import arecord_view, prime_views, viewer_key
+from .presence import aheartbeat, astatus_payload
+from .push import comments_channel, event_stream_response, status_channel
+from .fragments import attach_versions
+from .http_cache import cache_anonymous_page, landing_conditional, news_comments_conditional
+from django.utils.cache import patch_cache_control
+from .search import search
+from .ingest import ingest_comments
+from . import analytics, export, reporter_stats
 
 User = get_user_model()
 
+@landing_conditional
+@cache_anonymous_page
 def landing_page(request):
-    about_page = AboutPage.objects.first()
-    news_items = NewsItem.objects.all().order_by('-created_at')
-    
-    if not news_items:
-        geo_reporter, _ = Reporter.objects.get_or_create(
-            user__username='geo_reporter',
-            defaults={
-                'user': User.objects.create_user(username='geo_reporter', first_name='Иван', last_name='Петров'),
-                'specialization': 'Геополитика',
-                'bio': 'Опытный международный обозреватель'
-            }
-        )
-        editor_reporter, _ = Reporter.objects.get_or_create(
-            user__username='editor',
-            defaults={
-                'user': User.objects.create_user(username='editor', first_name='Редакция', last_name=''),
-                'specialization': 'Главный редактор'
-            }
-        )
-        spec_reporter, _ = Reporter.objects.get_or_create(
-            user__username='spec_correspondent',
-            defaults={
-                'user': User.objects.create_user(username='spec_correspondent', first_name='Алексей', last_name='Смирнов'),
-                'specialization': 'Специальный корреспондент'
-            }
-        )
-        news_items = [
-            NewsItem(
-                reporter=geo_reporter,
-                title='Итоги Аляскинского саммита: Шаг к разрядке или новая глава?',
-                text='Саммит на Аляске завершился. Лидеры обсудили вопросы климата, кибербезопасности и торговых отношений.',
-                created_at=timezone.now() - datetime.timedelta(hours=6)
-            ),
-            NewsItem(
-                reporter=editor_reporter,
-                title='Саммит на Аляске: Первые заявления после встречи',
-                text='По итогам встречи на Аляске стороны выступили с короткими, но ёмкими заявлениями.',
-                created_at=timezone.now() - datetime.timedelta(hours=4)
-            ),
-            NewsItem(
-                reporter=spec_reporter,
-                title='Аляска: Кулуарные настроения саммита',
-                text='Наш корреспондент сообщает о напряженной, но в то же время деловой атмосфере.',
-                created_at=timezone.now() - datetime.timedelta(hours=2)
-            ),
-        ]
-
-    for item in news_items:
-        item.latest_comments = item.comments.all().select_related('user__profile').order_by('-created_at')[:3]
-        item.comment_count = item.comments.count()
+    page = keyset_page(NewsItem.objects.with_feed_data(), page_size=settings.NEWS_FEED_PAGE_SIZE)
+    attach_latest_comments(page.items)
+    prime_views(page.items)
+    attach_versions(page.items)
     
     context = {
-        'about_page': about_page,
-        'base_news': news_items,
+        **about_context(),
+        'base_news': page.items,
+        'next_cursor': page.next_cursor,
+        'trending': analytics.trending(settings.NEWS_TRENDING_LANDING_SIZE),
     }
     
     return render(request, 'landing.html', context)
 
+@require_GET
+def news_feed(request):
+    """Следующая страница ленты для бесконечной прокрутки: HTML-фрагмент и данные в JSON."""
+    try:
+        page = keyset_page(
+            NewsItem.objects.with_feed_data(),
+            cursor=request.GET.get('cursor'),
+            page_size=settings.NEWS_FEED_PAGE_SIZE,
+        )
+    except InvalidCursor:
+        return JsonResponse({'status': 'error', 'message': 'Некорректный курсор'}, status=400)
+    attach_latest_comments(page.items)
+    prime_views(page.items)
+    attach_versions(page.items)
+
+    html = render_to_string(
+        'news/feed_page.html',
+        {'news_items': page.items, 'offset': page.offset},
+        request=request,
+    )
+    return JsonResponse({
+        'status': 'success',
+        'html': html,
+        'next_cursor': page.next_cursor,
+        'items': [
+            {
+                'id': item.id,
+                'title': item.title,
+                'views': item.views,
+                'comment_count': item.comment_count,
+                'created_at': item.created_at.isoformat(),
+            }
+            for item in page.items
+        ],
+    })
+
 @login_required
+@news_comments_conditional
 def news_comments(request, news_id):
     news_item = get_object_or_404(NewsItem, id=news_id)
-    comments = news_item.comments.all().select_related('user__profile')
+    # Первая отрисовка — только последняя страница ветки, более ранние догружаются по кнопке
+    page = _comments_page(news_item)
+    comments = attach_versions(page.items[::-1])
 
     context = {
         'news_item': news_item,
         'comments': comments,
+        'older_cursor': page.next_cursor,
+    }
+    response = render(request, 'news/news_comments.html', context)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def _comments_page(news_item, cursor=None):
+    """Страница комментариев от новых к старым по ключу (created_at, id)."""
+    return keyset_page(
+        news_item.comments.select_related('user__profile'),
+        cursor=cursor,
+        page_size=settings.NEWS_COMMENTS_PAGE_SIZE,
+    )
+
+@login_required
+def older_comments(request, news_id):
+    """
+    Более ранние комментарии: HTML-фрагмент (в хронологическом порядке) и данные в JSON.
+    С ?format=json фрагмент не рендерится.
+    """
+    news_item = get_object_or_404(NewsItem, id=news_id)
+    try:
+        page = _comments_page(news_item, cursor=request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({'status': 'error', 'message': 'Некорректный курсор'}, status=400)
+    comments = page.items[::-1]
+
+    data = {
+        'status': 'success',
+        'next_cursor': page.next_cursor,
+        'items': [
+            {
+                'id': comment.id,
+                'user': comment.user.username,
+                'text': comment.text,
+                'created_at': comment.created_at.isoformat(),
+                'image_url': comment.display_image_url,
+                'audio_url': comment.display_audio_url,
+                'audio_duration': comment.audio_duration,
+                'waveform': comment.waveform,
+            }
+            for comment in comments
+        ],
     }
-    return render(request, 'news/news_comments.html', context)
+    if request.GET.get('format') != 'json':
+        data['html'] = render_to_string(
+            'news/comments_page.html',
+            {'comments': attach_versions(comments)},
+            request=request,
+        )
+    response = JsonResponse(data)
+    patch_cache_control(response, private=True)
+    return response
 
 @login_required
 @require_POST
@@ -110,12 +171,8 @@ def add_comment(request, news_id):
             comment_data['text'] = "Голосовое сообщение"
             comment_data['audio_file'] = request.FILES['audio']
             comment_data['is_voice_message'] = True
-            
-            voice_duration = request.POST.get('voice_duration', 0)
-            try:
-                comment_data['audio_duration'] = int(voice_duration)
-            except (ValueError, TypeError):
-                comment_data['audio_duration'] = 0
+            # Длительность считает фоновая обработка (news.media) по самому файлу;
+            # значению от клиента не доверяем
 
         elif comment_text:
             comment_data['text'] = comment_text
@@ -128,6 +185,207 @@ def add_comment(request, news_id):
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': f'Ошибка при отправке комментария: {str(e)}'}, status=400)
 
+def _search_params(request):
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('kind', 'news')
+    if kind not in ('news', 'comment'):
+        kind = 'news'
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    return query, kind, page
+
+@require_GET
+def search_page(request):
+    query, kind, page = _search_params(request)
+    page_size = settings.NEWS_SEARCH_PAGE_SIZE
+    results, total = search(query, kind, page, page_size) if query else ([], 0)
+
+    context = {
+        'query': query,
+        'kind': kind,
+        'results': results,
+        'total': total,
+        'page': page,
+        'has_previous': page > 1,
+        'has_next': page * page_size < total,
+    }
+    return render(request, 'news/search.html', context)
+
+@require_GET
+def search_api(request):
+    query, kind, page = _search_params(request)
+    if not query:
+        return JsonResponse({'status': 'error', 'message': 'Пустой запрос'}, status=400)
+
+    page_size = settings.NEWS_SEARCH_PAGE_SIZE
+    results, total = search(query, kind, page, page_size)
+    if kind == 'news':
+        items = [
+            {
+                'id': item.id,
+                'title': item.title,
+                'text': item.text[:300],
+                'created_at': item.created_at.isoformat(),
+                'url': reverse('news:news_comments', args=[item.id]),
+            }
+            for item in results
+        ]
+    else:
+        items = [
+            {
+                'id': comment.id,
+                'news_id': comment.news_item_id,
+                'user': comment.user.username,
+                'text': (comment.text or '')[:300],
+                'created_at': comment.created_at.isoformat(),
+                'url': reverse('news:news_comments', args=[comment.news_item_id]),
+            }
+            for comment in results
+        ]
+    return JsonResponse({
+        'status': 'success',
+        'query': query,
+        'kind': kind,
+        'page': page,
+        'total': total,
+        'has_next': page * page_size < total,
+        'results': items,
+    })
+
+def _recent_posts(reporter):
+    return list(
+        NewsItem.objects.filter(reporter=reporter)
+        .order_by('-created_at')
+        .only('pk', 'title', 'created_at', 'views', 'comment_count')[:settings.NEWS_REPORTER_RECENT_POSTS]
+    )
+
+@require_GET
+def reporter_page(request, reporter_id):
+    """Страница репортёра: итоги из ReporterStats и последние публикации."""
+    reporter = get_object_or_404(Reporter.objects.select_related('user__profile', 'stats'), pk=reporter_id)
+    context = {
+        'reporter': reporter,
+        'stats': reporter_stats.stats_for(reporter),
+        'recent_posts': _recent_posts(reporter),
+    }
+    return render(request, 'news/reporter.html', context)
+
+@require_GET
+def reporter_api(request, reporter_id):
+    reporter = get_object_or_404(Reporter.objects.select_related('user', 'stats'), pk=reporter_id)
+    return JsonResponse({
+        'status': 'success',
+        'id': reporter.pk,
+        'name': str(reporter),
+        'specialization': reporter.specialization,
+        'stats': reporter_stats.as_dict(reporter_stats.stats_for(reporter)),
+        'recent_posts': [
+            {
+                'id': item.pk,
+                'title': item.title,
+                'created_at': item.created_at.isoformat(),
+                'views': item.views,
+                'comment_count': item.comment_count,
+                'url': reverse('news:news_comments', args=[item.pk]),
+            }
+            for item in _recent_posts(reporter)
+        ],
+    })
+
+REPORTER_ORDERINGS = {
+    'views': '-total_views',
+    'posts': '-post_count',
+    'comments': '-comments_received',
+    'recent': '-last_post_at',
+}
+
+@require_GET
+def reporters_api(request):
+    """Рейтинг репортёров прямо из ReporterStats: ?order=views|posts|comments|recent&limit=."""
+    ordering = REPORTER_ORDERINGS.get(request.GET.get('order', 'views'))
+    if ordering is None:
+        return JsonResponse({'status': 'error', 'message': 'Некорректный order'}, status=400)
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Некорректный limit'}, status=400)
+    rows = ReporterStats.objects.select_related('reporter__user').order_by(ordering, 'pk')[:limit]
+    return JsonResponse({
+        'status': 'success',
+        'results': [
+            {
+                'id': stats.reporter_id,
+                'name': str(stats.reporter),
+                'url': reverse('news:reporter', args=[stats.reporter_id]),
+                **reporter_stats.as_dict(stats),
+            }
+            for stats in rows
+        ],
+    })
+
+@require_GET
+def trending_api(request):
+    """Топ новостей по затухающему счёту просмотров (news.analytics), из кэша."""
+    try:
+        limit = int(request.GET.get('limit', settings.NEWS_TRENDING_SIZE))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Некорректный limit'}, status=400)
+    limit = min(max(limit, 1), settings.NEWS_TRENDING_MAX_SIZE)
+    response = JsonResponse({'status': 'success', 'items': analytics.trending(limit)})
+    patch_cache_control(response, public=True, max_age=settings.NEWS_TRENDING_CACHE_TTL)
+    return response
+
+@login_required
+@require_POST
+def ingest_comments_api(request):
+    """
+    Массовая загрузка комментариев для персонала: тело запроса — JSON Lines
+    (формат — в news.ingest), читается потоком, без загрузки целиком в память.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'status': 'error', 'message': 'Недостаточно прав'}, status=403)
+
+    options = {}
+    for name in ('chunk_size', 'batch_size', 'skip_lines'):
+        value = request.GET.get(name)
+        if value is None:
+            continue
+        try:
+            options[name] = max(int(value), 0)
+        except ValueError:
+            return JsonResponse({'status': 'error', 'message': f'Некорректный {name}'}, status=400)
+    options['dry_run'] = request.GET.get('dry_run') in ('1', 'true')
+
+    stats = ingest_comments(request, **options)
+    return JsonResponse({'status': 'success', **stats.as_dict()})
+
+@login_required
+@require_GET
+def export_data(request, name):
+    """
+    Потоковая выгрузка для персонала: /api/export/<news|comments|profiles>/
+    ?format=ndjson|csv&since=&until= (даты в ISO 8601, until включительно для дат).
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'status': 'error', 'message': 'Недостаточно прав'}, status=403)
+    fmt = request.GET.get('format', 'ndjson')
+    try:
+        rows = export.export_rows(
+            name,
+            since=export.parse_bound(request.GET.get('since')),
+            until=export.parse_bound(request.GET.get('until'), upper=True),
+        )
+        content = export.render(name, rows, fmt)
+    except export.ExportError as exc:
+        return JsonResponse({'status': 'error', 'message': str(exc)}, status=400)
+
+    response = StreamingHttpResponse(content, content_type=export.FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{export.filename(name, fmt)}"'
+    patch_cache_control(response, private=True, no_store=True)
+    return response
+
 def register_user(request):
     if request.method == 'POST':
         form = EmailUserCreationForm(request.POST)
@@ -172,13 +430,17 @@ def logout_user(request):
         messages.success(request, f'Вы успешно вышли из системы. До свидания, {username}!')
     return redirect('news:landing')
 
+# JSON-endpoint'ы, которые страницы опрашивают постоянно, асинхронные: под ASGI
+# опрос не занимает поток, а в базу они ходят только при промахе кэша
+
 @csrf_exempt
-def increment_views(request, news_id):
+async def increment_views(request, news_id):
     if request.method == 'POST':
-        news_item = get_object_or_404(NewsItem, id=news_id)
-        news_item.views += 1
-        news_item.save()
-        return JsonResponse({'status': 'success', 'views': news_item.views})
+        # Просмотр копится в буфере и попадает в базу пачкой (см. news.counters)
+        views = await arecord_view(news_id, viewer_key(request))
+        if views is None:
+            raise Http404("Новость не найдена")
+        return JsonResponse({'status': 'success', 'views': views})
     return JsonResponse({'status': 'error'}, status=400)
 
 @login_required
@@ -205,8 +467,11 @@ def update_avatar(request):
             profile, created = UserProfile.objects.get_or_create(user=request.user)
             
             if profile.avatar:
-                profile.avatar.delete()
+                profile.avatar.delete(save=False)
+            if profile.avatar_thumb:
+                profile.avatar_thumb.delete(save=False)
             
+            # Миниатюру создаст фоновая обработка после сохранения
             profile.avatar = request.FILES['avatar']
             profile.save()
             
@@ -229,23 +494,25 @@ def update_avatar(request):
 
 @login_required
 @require_POST
-def update_activity(request):
-    if request.user.is_authenticated:
-        profile, created = UserProfile.objects.get_or_create(user=request.user)
-        profile.last_activity = timezone.now()
-        profile.save()
+async def update_activity(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        # Heartbeat живёт в кэше, в базу он попадает пачкой (см. news.presence)
+        await aheartbeat(user.pk)
         return JsonResponse({'status': 'success'})
     return JsonResponse({'status': 'error'}, status=400)
 
 @login_required
 @require_POST
-def update_status(request):
+async def update_status(request):
     status = request.POST.get('status')
     
     if status in dict(UserProfile.STATUS_CHOICES).keys():
-        profile, created = UserProfile.objects.get_or_create(user=request.user)
+        user = await request.auser()
+        profile, created = await UserProfile.objects.aget_or_create(user=user)
         profile.status = status
-        profile.save()
+        # asave, а не aupdate: сигналы сбрасывают кэш статуса и рассылают push-событие
+        await profile.asave(update_fields=['status'])
         
         return JsonResponse({
             'status': 'success',
@@ -256,14 +523,24 @@ def update_status(request):
 
 @login_required
 @require_GET
-def get_user_status(request):
+async def get_user_status(request):
     """Возвращает JSON с данными о статусе пользователя."""
-    try:
-        profile = request.user.profile
-        return JsonResponse({
-            'status': profile.status,
-            'status_display': profile.get_status_display(),
-            'custom_status': profile.custom_status,
-        })
-    except UserProfile.DoesNotExist:
-        return JsonResponse({'status': 'offline', 'status_display': 'Не в сети'}, status=404)
\ No newline at end of file
+    payload = await astatus_payload(await request.auser())
+    if payload is None:
+        return JsonResponse({'status': 'offline', 'status_display': 'Не в сети'}, status=404)
+    return JsonResponse(payload)
+
+@login_required
+async def status_stream(request):
+    """SSE-поток изменений статуса текущего пользователя (замена опроса get_user_status)."""
+    user = await request.auser()
+    payload = await astatus_payload(user)
+    initial = ('status', payload) if payload is not None else None
+    return event_stream_response(request, status_channel(user.pk), initial=initial)
+
+@login_required
+async def comments_stream(request, news_id):
+    """SSE-поток новых комментариев к новости: каждое событие несёт HTML comment_partial.html."""
+    if not await NewsItem.objects.filter(pk=news_id).aexists():
+        raise Http404("Новость не найдена")
+    return event_stream_response(request, comments_channel(news_id))
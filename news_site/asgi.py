@@ -3,6 +3,28 @@ ASGI config for news_site project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Push-каналы (SSE: news:status_stream, news:comments_stream) работают только
+под ASGI-сервером, например:
+
+    uvicorn news_site.asgi:application
+
+Под WSGI (runserver, gunicorn с sync-воркерами) они отвечают 501 и страницы
+возвращаются к опросу.
+
+Опрашиваемые JSON-endpoint'ы (get_user_status, update_activity, update_status,
+increment_views) асинхронные, поэтому под ASGI ожидающий ответа опрос не
+держит поток. Профиль развёртывания под ASGI:
+
+    gunicorn news_site.asgi:application -k uvicorn.workers.UvicornWorker -w 4
+
+- по одному процессу на ядро: цикл событий однопоточный;
+- NEWS_DB_CONN_MAX_AGE=0 (ставится ниже по умолчанию): синхронный код под ASGI
+  выполняется в потоках sync_to_async, и постоянные соединения копились бы
+  в каждом из них — для PostgreSQL вместо этого нужен пул (pgbouncer);
+- NEWS_PUSH_BROKER — общий брокер, если процессов несколько.
+
+Сравнить ёмкость WSGI и ASGI под нагрузкой опроса: manage.py bench_polling.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +34,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'news_site.settings')
+os.environ.setdefault('NEWS_DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
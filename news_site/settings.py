@@ -42,7 +42,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'news.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'news.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,7 +58,8 @@ ROOT_URLCONF = 'news_site.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени рендеринга (news.instrumentation)
+        'BACKEND': 'news.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')], 
         'APP_DIRS': True,
         'OPTIONS': {
@@ -79,6 +82,40 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Постоянные соединения между запросами. Под ASGI соединения живут в потоках
+        # пула sync_to_async, поэтому news_site/asgi.py ставит NEWS_DB_CONN_MAX_AGE=0
+        'CONN_MAX_AGE': int(os.environ.get('NEWS_DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Транзакция сразу берёт блокировку записи: без этого два писателя, начавшие
+            # с чтения, получают «database is locked» без ожидания busy_timeout
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# Реплика для чтения ленты (news.routers). Локально это может быть копия файла базы:
+# NEWS_DB_REPLICA=/path/replica.sqlite3; для PostgreSQL псевдоним 'replica'
+# описывается здесь же с ENGINE postgresql. В тестах реплика — зеркало default
+if os.environ.get('NEWS_DB_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['NEWS_DB_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['news.routers.PrimaryReplicaRouter']
+
+
+# Cache
+# В продакшене с несколькими процессами сюда ставится общий кэш (Redis/Memcached):
+# на нём держатся счётчики просмотров и другие отложенные записи.
+
+CACHES = {
+    'default': {
+        # LocMemCache со счётчиками попаданий для замеров (news.instrumentation)
+        'BACKEND': 'news.instrumentation.InstrumentedLocMemCache',
+        'LOCATION': 'news-site',
     }
 }
 
@@ -150,4 +187,104 @@ if DEBUG:
 AUTH_USER_MODEL = 'news.User'
 LOGIN_URL = 'login'
 
-DEBUG = True
\ No newline at end of file
+DEBUG = True
+
+# Начальные данные (news/fixtures/seed) применяются после migrate.
+# Вручную: python manage.py bootstrap_news
+NEWS_AUTO_BOOTSTRAP = True
+
+# Тестовые базы создаются без начальных данных (NEWS_AUTO_BOOTSTRAP выключается на время создания)
+TEST_RUNNER = 'news.test_runner.NewsTestRunner'
+
+# Количество новостей на одной странице ленты (первая страница и догрузка при прокрутке)
+NEWS_FEED_PAGE_SIZE = 10
+
+# Комментариев на одной странице ветки: первая отрисовка — самые новые, остальные по кнопке
+NEWS_COMMENTS_PAGE_SIZE = 30
+
+# Счётчик просмотров: повторный просмотр той же новости тем же зрителем
+# не засчитывается в течение окна; приросты пишутся в базу пачкой
+NEWS_VIEWS_DEDUPE_WINDOW = 30 * 60
+NEWS_VIEWS_FLUSH_THRESHOLD = 100
+NEWS_VIEWS_FLUSH_INTERVAL = 10
+
+# Присутствие: пользователь онлайн NEWS_PRESENCE_TTL секунд после heartbeat,
+# время последней активности сохраняется в профиль пачкой
+NEWS_PRESENCE_TTL = 5 * 60
+NEWS_PRESENCE_FLUSH_THRESHOLD = 500
+NEWS_PRESENCE_FLUSH_INTERVAL = 60
+
+# Полностраничный кэш для анонимных посетителей главной (в кэше Django)
+# и разрешённое время хранения на обратном прокси (s-maxage)
+NEWS_PAGE_CACHE_TIMEOUT = 300
+NEWS_PROXY_CACHE_TIMEOUT = 60
+
+# Полнотекстовый поиск: на SQLite — FTS5, для других баз — запасной поиск подстрокой
+NEWS_SEARCH_BACKEND = 'news.search.SQLiteFTSBackend'
+NEWS_SEARCH_PAGE_SIZE = 20
+
+# Фоновая обработка медиа (миниатюры WebP, перекодирование голосовых в Opus).
+# NEWS_TASKS_MODE: 'thread' — локальный пул потоков, 'sync' — в запросе после коммита,
+# 'off' — только командой process_media. Без ffmpeg голосовые не перекодируются
+# и остаются без длительности (предупреждение news.W001 в manage.py check).
+NEWS_TASKS_MODE = 'thread'
+NEWS_TASK_WORKERS = 2
+NEWS_FFMPEG_BINARY = None
+NEWS_FFPROBE_BINARY = None
+
+# Брокер push-событий (SSE, только под ASGI). LocalBroker работает внутри процесса;
+# для нескольких процессов подставляется класс с тем же интерфейсом
+NEWS_PUSH_BROKER = 'news.push.LocalBroker'
+
+# Отдача медиафайлов (news.serving). NEWS_MEDIA_OFFLOAD: None — файлы отдаёт Django,
+# 'x-accel-redirect' — nginx (internal location с префиксом NEWS_MEDIA_ACCEL_PREFIX),
+# 'x-sendfile' — Apache/lighttpd. Файлы с именем по хэшу кэшируются навсегда,
+# остальные — на NEWS_MEDIA_MAX_AGE секунд
+NEWS_MEDIA_OFFLOAD = None
+NEWS_MEDIA_ACCEL_PREFIX = '/protected-media/'
+NEWS_MEDIA_MAX_AGE = 60 * 60
+
+# Набор PRAGMA для каждого соединения SQLite (news.db.SQLITE_PROFILES):
+# 'production' — WAL, synchronous=NORMAL, busy_timeout, mmap и кэш страниц;
+# 'default' — настройки SQLite по умолчанию. NEWS_SQLITE_PRAGMAS дополняет профиль
+NEWS_SQLITE_PROFILE = os.environ.get('NEWS_SQLITE_PROFILE', 'production')
+NEWS_SQLITE_PRAGMAS = {}
+
+# Псевдонимы реплик для чтения ленты и время (в секундах), на которое чтение
+# закрепляется за основной базой после записи пользователя
+NEWS_DB_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+NEWS_DB_PIN_SECONDS = 5
+
+# Живая статистика страницы «О нас» (репортёры, читатели, публикации)
+# пересчитывается не чаще раза в NEWS_ABOUT_STATS_TTL секунд
+NEWS_ABOUT_STATS_TTL = 10 * 60
+
+# Замеры запросов (news.instrumentation): доля замеряемых запросов (0 — выключено),
+# заголовок Server-Timing (по умолчанию в DEBUG и для персонала) и адреса,
+# с которых Prometheus может читать /metrics
+NEWS_METRICS_ENABLED = True
+NEWS_METRICS_SAMPLE_RATE = 0.05
+NEWS_METRICS_SERVER_TIMING = DEBUG
+NEWS_METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Массовая загрузка комментариев (news.ingest): строк в пачке-транзакции,
+# строк в одном INSERT и сколько ошибок перечислять в отчёте
+NEWS_INGEST_CHUNK_SIZE = 5000
+NEWS_INGEST_BATCH_SIZE = 500
+NEWS_INGEST_MAX_ERRORS = 100
+
+# Аналитика просмотров (news.analytics): часовые корзины хранятся
+# NEWS_ANALYTICS_HOURLY_RETENTION_DAYS дней, затем rollup_view_buckets сворачивает
+# их в суточные (None — суточные хранятся бессрочно). Рейтинг «в тренде»
+# затухает вдвое за NEWS_TRENDING_HALF_LIFE секунд и кэшируется на
+# NEWS_TRENDING_CACHE_TTL секунд
+NEWS_ANALYTICS_HOURLY_RETENTION_DAYS = 7
+NEWS_ANALYTICS_DAILY_RETENTION_DAYS = None
+NEWS_TRENDING_HALF_LIFE = 6 * 60 * 60
+NEWS_TRENDING_CACHE_TTL = 60
+NEWS_TRENDING_SIZE = 10
+NEWS_TRENDING_MAX_SIZE = 50
+NEWS_TRENDING_LANDING_SIZE = 5
+
+# Страница и API репортёра: сколько последних публикаций показывать
+NEWS_REPORTER_RECENT_POSTS = 10
@@ -1,21 +1,24 @@
 # Файл: project_name/urls.py (корневой)
 
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+
+from news.serving import serve_media
 
 urlpatterns = [
     # Эта строка обрабатывает главный URL (http://127.0.0.1:8000/)
     # и включает в себя все URL-адреса из news/urls.py.
     path('', include('news.urls')),
-    
+
     # Это URL-адрес для админ-панели Django.
     path('admin/', admin.site.urls),
 
     path('accounts/', include('django.contrib.auth.urls')),
-]
 
-# Добавляем маршруты для медиафайлов только в режиме DEBUG
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # Медиафайлы: Range-запросы, ETag, кэширование; в продакшене отдачу
+    # можно переложить на веб-сервер (NEWS_MEDIA_OFFLOAD)
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+]